@@ -2,9 +2,12 @@
 
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Count
 from .models import (
     CustomUser, Student, Teacher, Subject, Branch, Year,
-    Semester, Feedback, FeedbackSummary, Division, TeacherSubject
+    Semester, Feedback, FeedbackSummary, Division, TeacherSubject,
+    IdempotencyKey, FeedbackObligation, ReportJob, SentimentKeyword, FeedbackRollup,
+    SubmissionCounter
 )
 
 @admin.register(CustomUser)
@@ -40,7 +43,7 @@ class YearAdmin(admin.ModelAdmin):
 @admin.register(Semester)
 class SemesterAdmin(admin.ModelAdmin):
     """Admin interface for Semester"""
-    list_display = ('year', 'number')
+    list_display = ('year', 'number', 'closed_at')
     list_filter = ('year',)
     search_fields = ('year__name',)
     ordering = ('year', 'number')
@@ -69,13 +72,20 @@ class TeacherAdmin(admin.ModelAdmin):
     ordering = ('employee_id',)
     filter_horizontal = ('subjects',)
     
+    def get_queryset(self, request):
+        # One query for the changelist instead of a COUNT per row
+        return super().get_queryset(request).select_related('user', 'department').annotate(
+            subjects_count=Count('subjects', distinct=True)
+        )
+    
     def get_full_name(self, obj):
         return obj.user.get_full_name()
     get_full_name.short_description = 'Name'
     
     def get_subjects_count(self, obj):
-        return obj.subjects.count()
+        return obj.subjects_count
     get_subjects_count.short_description = 'Subjects'
+    get_subjects_count.admin_order_field = 'subjects_count'
 
 @admin.register(Student)
 class StudentAdmin(admin.ModelAdmin):
@@ -93,7 +103,7 @@ class StudentAdmin(admin.ModelAdmin):
 class FeedbackAdmin(admin.ModelAdmin):
     """Admin interface for Feedback"""
     list_display = ('id', 'student', 'teacher', 'subject', 'overall_satisfaction', 'comment_sentiment', 'created_at')
-    list_filter = ('overall_satisfaction', 'comment_sentiment', 'suggestion_sentiment', 'is_anonymous', 'created_at')
+    list_filter = ('overall_satisfaction', 'comment_sentiment', 'suggestion_sentiment', 'sentiment_version', 'is_anonymous', 'created_at')
     search_fields = ('student__prn_number', 'teacher__employee_id', 'subject__code', 'comments', 'suggestions')
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
@@ -115,3 +125,55 @@ class TeacherSubjectAdmin(admin.ModelAdmin):
     search_fields = ('teacher__employee_id', 'subject__code')
     ordering = ('-assigned_date',)
     readonly_fields = ('assigned_date',)
+
+
+@admin.register(FeedbackObligation)
+class FeedbackObligationAdmin(admin.ModelAdmin):
+    """Admin interface for FeedbackObligation"""
+    list_display = ('student', 'teacher', 'subject', 'semester', 'division', 'is_fulfilled', 'fulfilled_at')
+    list_filter = ('is_fulfilled', 'branch', 'semester', 'division')
+    search_fields = ('student__prn_number', 'teacher__employee_id', 'subject__code')
+    raw_id_fields = ('student', 'teacher', 'subject')
+    readonly_fields = ('fulfilled_at',)
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    """Admin interface for IdempotencyKey"""
+    list_display = ('key', 'username', 'endpoint', 'response_status', 'created_at', 'expires_at')
+    list_filter = ('endpoint', 'response_status')
+    search_fields = ('key', 'username')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at',)
+
+@admin.register(ReportJob)
+class ReportJobAdmin(admin.ModelAdmin):
+    """Admin interface for ReportJob"""
+    list_display = ('id', 'kind', 'scope', 'status', 'size_bytes', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('scope', 'data_version')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
+
+@admin.register(FeedbackRollup)
+class FeedbackRollupAdmin(admin.ModelAdmin):
+    """Admin interface for FeedbackRollup (maintained by refresh_rollups; read-only here)"""
+    list_display = ('level', 'branch', 'year', 'semester', 'division', 'teacher', 'subject', 'responses', 'refreshed_at')
+    list_filter = ('level', 'branch', 'semester')
+    raw_id_fields = ('teacher', 'subject')
+    readonly_fields = [field.name for field in FeedbackRollup._meta.fields]
+
+@admin.register(SubmissionCounter)
+class SubmissionCounterAdmin(admin.ModelAdmin):
+    """Admin interface for SubmissionCounter"""
+    list_display = ('resolution', 'bucket_start', 'branch', 'semester', 'division', 'count')
+    list_filter = ('resolution', 'branch', 'semester')
+    ordering = ('-bucket_start',)
+
+@admin.register(SentimentKeyword)
+class SentimentKeywordAdmin(admin.ModelAdmin):
+    """Admin interface for SentimentKeyword"""
+    list_display = ('word', 'weight', 'is_active', 'updated_at')
+    list_editable = ('weight', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('word',)
+    ordering = ('word',)
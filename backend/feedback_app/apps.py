@@ -1,8 +1,21 @@
 # feedback_app/apps.py
 
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class FeedbackAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'feedback_app'
\ No newline at end of file
+    name = 'feedback_app'
+
+    def ready(self):
+        from . import sqlstats  # noqa: F401  (connects the slow-query wrapper)
+
+        if settings.PRELOAD_HEAVY_IMPORTS:
+            from . import reports, sentiment
+            sentiment.preload()
+            reports.preload()
+
+        if settings.SENTIMENT_WARMUP:
+            from . import sentiment
+            sentiment.warm_up()
@@ -0,0 +1,718 @@
+# feedback_app/benchmarks.py
+
+"""
+Endpoint benchmark harness.
+
+Every named route in feedback_app/urls.py has an ENDPOINTS entry describing
+how to call it against the current database (normally one built with
+`generate_campus`). Each call runs through Django's test client inside a
+transaction that is rolled back, so write endpoints can be repeated and the
+dataset stays unchanged. Results are plain dicts that serialize to JSON and
+can be compared against a stored baseline.
+
+`measure_startup` boots fresh interpreters the way a worker does (django
+setup, then the URLconf) and reports import time, resident memory and the
+latency of the first and second sentiment analysis, with and without
+PRELOAD_HEAVY_IMPORTS and SENTIMENT_WARMUP.
+
+`measure_sentiment` runs analyze_sentiment over a corpus of stored feedback
+text plus the labelled sample texts, and reports throughput in one process
+and in a pool of forked processes, per-text latency percentiles and a
+confusion matrix against the labels.
+
+`measure_async` serves the project with uvicorn in a subprocess and loads
+each sync view and its async variant with the same number of concurrent
+keep-alive clients, reporting throughput and latency percentiles.
+"""
+
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connection, connections, reset_queries, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import (
+    Branch, Division, Feedback, FeedbackObligation, ReportJob, Semester,
+    Student, Subject, Teacher, TeacherSubject, Year
+)
+from .obligations import CURRENT
+from .reports import ALL_FEEDBACK_REPORT
+
+
+#  ROW COUNTING
+
+class RowCountingCursor:
+    """Cursor proxy counting the rows fetched through it"""
+
+    def __init__(self, cursor, counter):
+        self.cursor = cursor
+        self.counter = counter
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cursor.close()
+
+    def __iter__(self):
+        for row in self.cursor:
+            self.counter['rows'] += 1
+            yield row
+
+    def fetchone(self):
+        row = self.cursor.fetchone()
+        if row is not None:
+            self.counter['rows'] += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self.cursor.fetchmany(*args, **kwargs)
+        self.counter['rows'] += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self.cursor.fetchall()
+        self.counter['rows'] += len(rows)
+        return rows
+
+
+class count_rows:
+    """Count rows fetched on `connection` while the block runs"""
+
+    def __init__(self, conn=connection):
+        self.connection = conn
+        self.counter = {'rows': 0}
+
+    def __enter__(self):
+        conn, counter = self.connection, self.counter
+        make_cursor, make_debug_cursor = conn.make_cursor, conn.make_debug_cursor
+        conn.make_cursor = lambda cursor: RowCountingCursor(make_cursor(cursor), counter)
+        conn.make_debug_cursor = lambda cursor: RowCountingCursor(make_debug_cursor(cursor), counter)
+        return self
+
+    def __exit__(self, *exc_info):
+        # Drop the instance attributes so the class methods apply again
+        del self.connection.make_cursor
+        del self.connection.make_debug_cursor
+
+    @property
+    def rows(self):
+        return self.counter['rows']
+
+
+#  FIXTURE
+
+class BenchmarkContext:
+    """Representative rows of the current database used to fill in requests"""
+
+    def __init__(self, password='pass1234'):
+        self.password = password
+
+        obligation = FeedbackObligation.objects.filter(CURRENT, is_fulfilled=False).select_related(
+            'student__user', 'subject'
+        ).order_by('id').first()
+        if obligation:
+            self.student, self.subject, self.feedback_teacher = obligation.student, obligation.subject, obligation.teacher_id
+        else:
+            self.student = Student.objects.select_related('user').order_by('id').first()
+            self.subject = Subject.objects.order_by('id').first()
+            self.feedback_teacher = None
+
+        # The busiest teacher gives the heaviest teacher dashboards
+        self.teacher = Teacher.objects.select_related('user').annotate(
+            received=Count('feedback_received')
+        ).order_by('-received', 'id').first()
+        self.class_teacher = Teacher.objects.filter(is_class_teacher=True).select_related('user').order_by('id').first()
+        self.assignment = TeacherSubject.objects.order_by('id').first()
+        # Subjects with feedback cannot be deleted; prefer one that can
+        self.unused_subject = Subject.objects.filter(feedback__isnull=True).order_by('id').first() or self.subject
+
+        if not (self.student and self.teacher and self.class_teacher and self.subject and self.assignment):
+            raise ValueError('Benchmarks need students, teachers, a class teacher and subject assignments. Run generate_campus first.')
+
+        self.year_id = self.student.year_id
+        self.branch_id = self.student.branch_id
+        self.semester_id = self.student.semester_id
+        self.division_id = self.student.division_id
+        self.other_division = Division.objects.exclude(id=self.division_id).order_by('id').first() or self.student.division
+
+    def new_person(self, prefix):
+        return {
+            'email': f'{prefix.lower()}@benchmark.test',
+            'first_name': 'Bench',
+            'last_name': 'Mark',
+            'password': self.password,
+        }
+
+    def new_student(self, prn):
+        return {
+            **self.new_person(prn),
+            'prn_number': prn,
+            'year_id': self.year_id,
+            'branch_id': self.branch_id,
+            'semester_id': self.semester_id,
+            'division_id': self.division_id,
+        }
+
+
+def create_report_job(ctx):
+    return {'job_id': ReportJob.objects.create(
+        kind=ALL_FEEDBACK_REPORT, scope='all', data_version='benchmark', status=ReportJob.PENDING,
+        created_at=timezone.now()
+    ).id}
+
+
+def feedback_body(ctx):
+    return {
+        'username': ctx.student.user.username,
+        'subject_id': ctx.subject.id,
+        'teacher_id': ctx.feedback_teacher or ctx.teacher.id,
+        'teaching_effectiveness': 4,
+        'course_content': 4,
+        'interaction_quality': 3,
+        'assignment_feedback': 4,
+        'overall_satisfaction': 4,
+        'comments': 'Clear explanations and helpful examples.',
+        'suggestions': 'More practice problems would help.',
+    }
+
+
+# url name -> how to call it. Keys: method, kwargs, params (query string),
+# body (JSON), setup (called inside the rolled-back transaction, returns extra kwargs)
+ENDPOINTS = {
+    'login': lambda ctx: {'method': 'post', 'body': {'username': ctx.student.user.username, 'password': ctx.password}},
+    'logout': lambda ctx: {'method': 'post'},
+
+    'student_dashboard': lambda ctx: {'params': {'username': ctx.student.user.username}},
+    'student_subjects': lambda ctx: {'params': {'username': ctx.student.user.username}},
+    'submit_feedback': lambda ctx: {'method': 'post', 'body': feedback_body(ctx)},
+
+    'teacher_dashboard': lambda ctx: {'params': {'username': ctx.teacher.user.username}},
+    'teacher_feedback': lambda ctx: {'params': {'username': ctx.teacher.user.username}},
+    'download_feedback': lambda ctx: {'params': {'username': ctx.teacher.user.username}},
+
+    'class_teacher_dashboard': lambda ctx: {'params': {'username': ctx.class_teacher.user.username}},
+    'class_teacher_events': lambda ctx: {'params': {'username': ctx.class_teacher.user.username}},
+    'class_teacher_tracking': lambda ctx: {'params': {'username': ctx.class_teacher.user.username}},
+    'download_class_report': lambda ctx: {'params': {'username': ctx.class_teacher.user.username}},
+
+    'add_student': lambda ctx: {'method': 'post', 'body': ctx.new_student('BENCH0001')},
+    'add_teacher': lambda ctx: {'method': 'post', 'body': {
+        **ctx.new_person('BENCHT01'), 'employee_id': 'BENCHT01', 'department_id': ctx.branch_id,
+        'subject_ids': [ctx.subject.id],
+    }},
+    'add_subject': lambda ctx: {'method': 'post', 'body': {
+        'code': 'BENCH101', 'name': 'Benchmark Subject', 'credits': 4, 'year_id': ctx.year_id,
+        'branch_id': ctx.branch_id, 'semester_id': ctx.semester_id,
+    }},
+    'bulk_add_students': lambda ctx: {'method': 'post', 'body': {
+        'students': [ctx.new_student(f'BENCH{i:04d}') for i in range(2, 7)],
+    }},
+
+    'update_student': lambda ctx: {'method': 'put', 'kwargs': {'student_id': ctx.student.id}, 'body': {
+        'first_name': 'Bench', 'division_id': ctx.other_division.id,
+    }},
+    'update_teacher': lambda ctx: {'method': 'put', 'kwargs': {'teacher_id': ctx.teacher.id}, 'body': {'first_name': 'Bench'}},
+    'update_subject': lambda ctx: {'method': 'put', 'kwargs': {'subject_id': ctx.subject.id}, 'body': {'name': 'Renamed'}},
+
+    'delete_student': lambda ctx: {'method': 'delete', 'kwargs': {'student_id': ctx.student.id}},
+    'delete_teacher': lambda ctx: {'method': 'delete', 'kwargs': {'teacher_id': ctx.teacher.id}},
+    'delete_subject': lambda ctx: {'method': 'delete', 'kwargs': {'subject_id': ctx.unused_subject.id}},
+
+    'reset_student_password': lambda ctx: {
+        'method': 'post', 'kwargs': {'student_id': ctx.student.id}, 'body': {'new_password': ctx.password},
+    },
+    'reset_teacher_password': lambda ctx: {
+        'method': 'post', 'kwargs': {'teacher_id': ctx.teacher.id}, 'body': {'new_password': ctx.password},
+    },
+
+    'assign_class_teacher': lambda ctx: {'method': 'post', 'body': {
+        'teacher_id': ctx.class_teacher.id, 'year_id': ctx.class_teacher.assigned_class_year_id,
+        'branch_id': ctx.class_teacher.assigned_class_branch_id,
+        'semester_id': ctx.class_teacher.assigned_class_semester_id,
+        'division_id': ctx.class_teacher.assigned_class_division_id,
+    }},
+    'assign_subjects': lambda ctx: {
+        'method': 'post', 'kwargs': {'teacher_id': ctx.teacher.id}, 'body': {'subject_ids': [ctx.subject.id]},
+    },
+
+    'get_all_students': lambda ctx: {},
+    'get_all_teachers': lambda ctx: {},
+    'get_all_subjects': lambda ctx: {},
+    'manage_access': lambda ctx: {},
+    'get_admin_statistics': lambda ctx: {},
+    'completion_statistics': lambda ctx: {'params': {'branch_id': ctx.branch_id}},
+    'submission_rates': lambda ctx: {'params': {'branch_id': ctx.branch_id}},
+    'hod_analytics': lambda ctx: {'params': {'level': 'teacher', 'branch_id': ctx.branch_id}},
+    'teacher_rankings': lambda ctx: {'params': {'department_id': ctx.branch_id, 'min_responses': 5}},
+    'feedback_trends': lambda ctx: {'params': {'teacher_id': ctx.teacher.id}},
+
+    'download_all_feedback': lambda ctx: {},
+    'report_job_status': lambda ctx: {'setup': create_report_job},
+    'download_report_job': lambda ctx: {'setup': create_report_job},
+
+    'get_branches': lambda ctx: {},
+    'get_years': lambda ctx: {},
+    'get_semesters': lambda ctx: {'kwargs': {'year_id': ctx.year_id}},
+    'get_subjects': lambda ctx: {'kwargs': {
+        'year_id': ctx.year_id, 'branch_id': ctx.branch_id, 'semester_id': ctx.semester_id,
+    }},
+    'get_divisions': lambda ctx: {},
+
+    'search_users': lambda ctx: {'params': {'q': ctx.student.prn_number[:4]}},
+    'health_check': lambda ctx: {},
+    'metrics': lambda ctx: {},
+    'sql_stats': lambda ctx: {},
+
+    'subjects_by_class': lambda ctx: {'params': {
+        'year_id': ctx.year_id, 'branch_id': ctx.branch_id,
+        'semester_id': ctx.semester_id, 'division_id': ctx.division_id,
+    }},
+    'assign_subject_to_teacher': lambda ctx: {'method': 'post', 'body': {
+        'teacher_id': ctx.class_teacher.id, 'subject_id': ctx.subject.id,
+    }},
+    'teacher_subjects': lambda ctx: {'kwargs': {'teacher_id': ctx.teacher.id}},
+    'remove_subject_assignment': lambda ctx: {'method': 'delete', 'kwargs': {'assignment_id': ctx.assignment.id}},
+    'all_teacher_subject_assignments': lambda ctx: {},
+}
+
+
+# sync url name -> its async variant under /api/async/; both are called the same way
+ASYNC_VARIANTS = {
+    'student_dashboard': 'student_dashboard_async',
+    'get_admin_statistics': 'get_admin_statistics_async',
+    'get_branches': 'get_branches_async',
+    'get_years': 'get_years_async',
+    'get_semesters': 'get_semesters_async',
+    'get_divisions': 'get_divisions_async',
+}
+ENDPOINTS.update({variant: ENDPOINTS[name] for name, variant in ASYNC_VARIANTS.items()})
+
+
+#  RUNNER
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def _call(client, spec, kwargs):
+    path = reverse(spec['name'], kwargs=kwargs)
+    method = getattr(client, spec.get('method', 'get'))
+    if 'body' in spec:
+        return method(path, data=json.dumps(spec['body']), content_type='application/json')
+    return method(path, data=spec.get('params'))
+
+
+def _once(client, spec):
+    """One request inside a rolled-back transaction"""
+    with transaction.atomic():
+        kwargs = dict(spec.get('kwargs', {}))
+        if 'setup' in spec:
+            kwargs.update(spec['setup'](spec['ctx']))
+        started = time.perf_counter()
+        response = _call(client, spec, kwargs)
+        elapsed = (time.perf_counter() - started) * 1000
+        transaction.set_rollback(True)
+    return response, elapsed
+
+
+def benchmark_endpoint(client, spec, iterations=20, warmup=2):
+    for _ in range(warmup):
+        _once(client, spec)
+
+    timings = []
+    for _ in range(iterations):
+        response, elapsed = _once(client, spec)
+        timings.append(elapsed)
+
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries, count_rows() as rows:
+        _once(client, spec)
+    # Read now: the next request resets the connection's query log. The
+    # harness's own BEGIN/ROLLBACK (logged by SQLite) are not counted.
+    query_count = sum(1 for query in queries.captured_queries if query['sql'] not in ('BEGIN', 'ROLLBACK'))
+    row_count = rows.rows
+
+    tracemalloc.start()
+    try:
+        _once(client, spec)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'method': spec.get('method', 'get').upper(),
+        'status': response.status_code,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'queries': query_count,
+        'rows': row_count,
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def dataset_summary():
+    return {
+        'branches': Branch.objects.count(),
+        'years': Year.objects.count(),
+        'semesters': Semester.objects.count(),
+        'subjects': Subject.objects.count(),
+        'teachers': Teacher.objects.count(),
+        'students': Student.objects.count(),
+        'feedback': Feedback.objects.count(),
+        'obligations': FeedbackObligation.objects.count(),
+    }
+
+
+def run_benchmarks(names=None, iterations=20, warmup=2, password='pass1234', progress=None):
+    """Benchmark the given url names (default: all) and return a JSON-serializable result"""
+    ctx = BenchmarkContext(password=password)
+    client = Client()
+    results = {}
+
+    # DEBUG off so timings exclude query logging; expected 4xx responses are not logged
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+
+    try:
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name in names or sorted(ENDPOINTS):
+                spec = {**ENDPOINTS[name](ctx), 'name': name, 'ctx': ctx}
+                results[name] = benchmark_endpoint(client, spec, iterations=iterations, warmup=warmup)
+                if progress:
+                    progress(name, results[name])
+    finally:
+        request_logger.setLevel(level)
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'iterations': iterations,
+        'database': connection.vendor,
+        'dataset': dataset_summary(),
+        'endpoints': results,
+    }
+
+
+#  BASELINES
+
+def compare(baseline, current, threshold=0.2, min_ms=1.0):
+    """
+    Regressions of `current` against `baseline`, as readable strings.
+    Query counts must not grow at all; timings, rows and memory may grow by
+    `threshold` (timings also by `min_ms` to absorb noise on fast endpoints).
+    """
+    regressions = []
+    for name, result in sorted(current['endpoints'].items()):
+        base = baseline.get('endpoints', {}).get(name)
+        if base is None:
+            continue
+
+        if base['status'] < 500 <= result['status']:
+            regressions.append(f"{name}: status {base['status']} -> {result['status']}")
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name}: queries {base['queries']} -> {result['queries']}")
+
+        for metric, slack in (('p95_ms', min_ms), ('rows', 0), ('peak_kb', 0)):
+            allowed = base[metric] * (1 + threshold) + slack
+            if result[metric] > allowed:
+                regressions.append(f"{name}: {metric} {base[metric]} -> {result[metric]} (allowed {round(allowed, 3)})")
+
+    return regressions
+
+
+#  STARTUP
+
+HEAVY_MODULES = ('textblob', 'nltk', 'openpyxl', 'numpy', 'pandas')
+
+# Runs in a fresh interpreter and prints one JSON line
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+from importlib import import_module
+from django.conf import settings
+import_module(settings.ROOT_URLCONF)
+urls_done = time.perf_counter()
+try:
+    with open('/proc/self/status') as status:
+        rss_kb = int(next(line for line in status if line.startswith('VmRSS:')).split()[1])
+except OSError:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss_kb //= 1024
+heavy_modules = [name for name in %r if name in sys.modules]
+from feedback_app.sentiment import analyze_sentiment
+first_started = time.perf_counter()
+analyze_sentiment('The explanations were clear and helpful.')
+second_started = time.perf_counter()
+analyze_sentiment('Assignments were returned late.')
+second_done = time.perf_counter()
+print(json.dumps({
+    'setup_ms': (setup_done - started) * 1000,
+    'urls_ms': (urls_done - setup_done) * 1000,
+    'total_ms': (urls_done - started) * 1000,
+    'rss_kb': rss_kb,
+    'first_sentiment_ms': (second_started - first_started) * 1000,
+    'second_sentiment_ms': (second_done - second_started) * 1000,
+    'heavy_modules': heavy_modules,
+}))
+""" % (HEAVY_MODULES,)
+
+
+def _boot_once(preload, warmup):
+    env = dict(os.environ, PRELOAD_HEAVY_IMPORTS=str(preload), SENTIMENT_WARMUP=str(warmup))
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'feedback_system.settings')
+    completed = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT], cwd=settings.BASE_DIR, env=env,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+STARTUP_METRICS = ('setup_ms', 'urls_ms', 'total_ms', 'rss_kb', 'first_sentiment_ms', 'second_sentiment_ms')
+
+
+def measure_startup(preload=False, warmup=False, repeat=5):
+    """Median boot time, resident memory and first-call latency of a fresh worker process"""
+    runs = [_boot_once(preload, warmup) for _ in range(repeat)]
+    result = {
+        metric: round(statistics.median(run[metric] for run in runs), 1)
+        for metric in STARTUP_METRICS
+    }
+    result['heavy_modules'] = runs[-1]['heavy_modules']
+    result['preload'] = preload
+    result['warmup'] = warmup
+    return result
+
+
+#  SENTIMENT
+
+SENTIMENT_LABELS = ('positive', 'neutral', 'negative')
+
+
+def sentiment_corpus(limit=None):
+    """
+    (texts, labels): stored comments and suggestions as submitted (placeholders
+    and repeats included, so the mix matches production) with label None,
+    followed by the labelled sample texts
+    """
+    from .sample_text import COMMENTS, SUGGESTIONS
+
+    texts = []
+    rows = Feedback.objects.order_by('-id').values_list('comments', 'suggestions')
+    for comments, suggestions in rows[:limit] if limit else rows:
+        texts += [comments, suggestions]
+    labels = [None] * len(texts)
+    for samples in (COMMENTS, SUGGESTIONS):
+        for label, group in samples.items():
+            texts += group
+            labels += [label] * len(group)
+    return texts, labels
+
+
+def _sentiment_worker_init(backend):
+    from .sentiment import get_backend
+    # The forked child must not share the parent's database socket or file handle
+    connections.close_all()
+    get_backend(backend).load()
+
+
+def _sentiment_chunk(args):
+    from .sentiment import analyze_sentiment
+    texts, backend = args
+    for text in texts:
+        analyze_sentiment(text, backend=backend)
+    return len(texts)
+
+
+def _pool_throughput(texts, backend, processes, repeat):
+    """Texts per second over `repeat` passes, split across `processes` forked workers"""
+    chunk = max(1, len(texts) // (processes * 4))
+    chunks = [(texts[i:i + chunk], backend) for i in range(0, len(texts), chunk)]
+    with multiprocessing.get_context('fork').Pool(processes, _sentiment_worker_init, (backend,)) as pool:
+        pool.map(_sentiment_chunk, chunks[:processes])  # every worker loaded and warm
+        started = time.perf_counter()
+        done = sum(sum(pool.map(_sentiment_chunk, chunks)) for _ in range(repeat))
+        return done / (time.perf_counter() - started)
+
+
+def measure_sentiment(texts, labels, backend=None, processes=1, repeat=3):
+    """Throughput, per-text latency and label confusion of analyze_sentiment with `backend`"""
+    from .sentiment import analyze_sentiment, get_backend, is_placeholder
+
+    backend = get_backend(backend).name
+    results = [analyze_sentiment(text, backend=backend)[0] for text in texts]  # also loads and warms up
+
+    timings = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            began = time.perf_counter_ns()
+            analyze_sentiment(text, backend=backend)
+            timings.append(time.perf_counter_ns() - began)
+    single = len(texts) * repeat / (time.perf_counter() - started)
+
+    confusion = {expected: dict.fromkeys(SENTIMENT_LABELS + (None,), 0) for expected in SENTIMENT_LABELS}
+    for label, result in zip(labels, results):
+        if label is not None:
+            confusion[label][result] += 1
+    labelled = sum(label is not None for label in labels)
+    correct = sum(confusion[label][label] for label in SENTIMENT_LABELS)
+
+    return {
+        'backend': backend,
+        'texts': len(texts),
+        'skipped': sum(1 for text in texts if is_placeholder(text)),
+        'single_texts_per_s': round(single, 1),
+        'processes': processes,
+        'pool_texts_per_s': round(_pool_throughput(texts, backend, processes, repeat), 1) if processes > 1 else None,
+        'p50_us': round(percentile(timings, 50) / 1000, 1),
+        'p99_us': round(percentile(timings, 99) / 1000, 1),
+        'accuracy': round(correct / labelled, 4) if labelled else None,
+        'confusion': confusion,
+    }
+
+
+#  ASYNC UNDER LOAD
+
+def endpoint_path(name, ctx):
+    """URL with query string for a GET endpoint of ENDPOINTS"""
+    spec = ENDPOINTS[name](ctx)
+    path = reverse(name, kwargs=spec.get('kwargs'))
+    return f"{path}?{urlencode(spec['params'])}" if spec.get('params') else path
+
+
+def serve(port):
+    """Start uvicorn with one worker on `port` and wait until it answers"""
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'feedback_system.asgi:application', '--host', '127.0.0.1',
+         '--port', str(port), '--workers', '1', '--log-level', 'warning', '--no-access-log'],
+        cwd=settings.BASE_DIR, env={**os.environ, 'DEBUG': 'False'}
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'uvicorn exited with status {server.returncode}')
+        try:
+            http_get(http.client.HTTPConnection('127.0.0.1', port, timeout=2), reverse('health_check'))
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'uvicorn did not answer on port {port} within 30s')
+
+
+def http_get(conn, path):
+    conn.request('GET', path)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def load(port, path, concurrency, requests):
+    """`requests` GETs of `path` spread over `concurrency` keep-alive clients"""
+    remaining = [requests]
+    lock = threading.Lock()
+    timings, errors = [], []
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        mine = []
+        try:
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        break
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                try:
+                    status = http_get(conn, path)
+                except (OSError, http.client.HTTPException) as e:
+                    conn.close()
+                    errors.append(repr(e))
+                    continue
+                mine.append((time.perf_counter() - started) * 1000)
+                if status != 200:
+                    errors.append(status)
+        finally:
+            conn.close()
+            with lock:
+                timings.extend(mine)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': requests,
+        'errors': len(errors),
+        'throughput_rps': round(len(timings) / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3) if timings else None,
+        'p99_ms': round(percentile(timings, 99), 3) if timings else None,
+    }
+
+
+def measure_async(names=None, concurrency=(1, 16, 64), requests=1000, port=8765, password='pass1234', progress=None):
+    """
+    Load each sync view of ASYNC_VARIANTS and its async variant on a
+    uvicorn server at every concurrency level, sync first
+    """
+    ctx = BenchmarkContext(password=password)
+    pairs = [(name, ASYNC_VARIANTS[name]) for name in names or ASYNC_VARIANTS]
+    results = {}
+
+    server = serve(port)
+    try:
+        for name, variant in pairs:
+            paths = {'sync': endpoint_path(name, ctx), 'async': endpoint_path(variant, ctx)}
+            results[name] = {}
+            for level in concurrency:
+                row = results[name][str(level)] = {}
+                for mode, path in paths.items():
+                    load(port, path, level, max(level * 2, 20))  # warm up connections and caches
+                    row[mode] = load(port, path, level, requests)
+                if progress:
+                    progress(name, level, row)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'server': 'uvicorn, 1 worker',
+        'requests': requests,
+        'database': connection.vendor,
+        'dataset': dataset_summary(),
+        'endpoints': results,
+    }
@@ -0,0 +1,104 @@
+# feedback_app/completion.py
+
+"""
+Completion matrix of a class.
+
+One row per student and one bit per (teacher, subject) obligation, stored as
+plain Python ints. A matrix is built per request from a single query over
+Student + FeedbackObligation, so student tracking reads the same committed
+obligations as the class dashboard on every worker and never touches the
+Feedback table.
+"""
+
+from django.db.models import F, FilteredRelation, Q
+
+
+class CompletionMatrix:
+    """Students x obligations bitset for one class"""
+
+    def __init__(self, students, columns, expected, fulfilled):
+        self.students = students        # [{'id', 'prn', 'name', 'email', 'division'}]
+        self.columns = columns          # [(teacher_id, subject_id, subject_code, employee_id)]
+        self.expected = expected        # per-row bitmask of obligations the student has
+        self.fulfilled = fulfilled      # per-row bitmask of obligations already given
+
+    @classmethod
+    def build(cls, students):
+        """
+        Build from one LEFT JOIN of the class students to the obligations of
+        their current semester (earlier semesters are history)
+        """
+        rows = students.annotate(current=FilteredRelation(
+            'feedback_obligations', condition=Q(feedback_obligations__semester_id=F('semester_id'))
+        )).order_by('prn_number', 'current__subject__code').values_list(
+            'id', 'prn_number', 'user__first_name', 'user__last_name', 'user__email', 'division__name',
+            'current__teacher_id', 'current__subject_id',
+            'current__subject__code', 'current__teacher__employee_id',
+            'current__is_fulfilled',
+        )
+
+        student_list, columns, column_of = [], [], {}
+        expected, fulfilled, row_of = [], [], {}
+
+        for (student_id, prn, first_name, last_name, email, division,
+             teacher_id, subject_id, subject_code, employee_id, is_fulfilled) in rows:
+            row = row_of.get(student_id)
+            if row is None:
+                row = row_of[student_id] = len(student_list)
+                student_list.append({
+                    'id': student_id,
+                    'prn': prn,
+                    'name': f"{first_name} {last_name}".strip(),
+                    'email': email,
+                    'division': division or 'N/A',
+                })
+                expected.append(0)
+                fulfilled.append(0)
+
+            if teacher_id is None:
+                continue  # Student without any obligation
+
+            bit = column_of.get((teacher_id, subject_id))
+            if bit is None:
+                bit = column_of[(teacher_id, subject_id)] = len(columns)
+                columns.append((teacher_id, subject_id, subject_code, employee_id))
+
+            expected[row] |= 1 << bit
+            if is_fulfilled:
+                fulfilled[row] |= 1 << bit
+
+        return cls(student_list, columns, expected, fulfilled)
+
+    #  QUERIES
+
+    def label(self, bit):
+        _, _, subject_code, employee_id = self.columns[bit]
+        return f"{subject_code} ({employee_id})"
+
+    def _bits(self, mask):
+        return [bit for bit in range(len(self.columns)) if mask >> bit & 1]
+
+    def completed(self, row):
+        return [self.label(bit) for bit in self._bits(self.fulfilled[row])]
+
+    def pending(self, row):
+        return [self.label(bit) for bit in self._bits(self.expected[row] & ~self.fulfilled[row])]
+
+    def subject_count(self):
+        return len({column[1] for column in self.columns})
+
+    def column_gaps(self):
+        """Per (teacher, subject) pending counts, largest gap first"""
+        gaps = []
+        for bit, (teacher_id, subject_id, subject_code, employee_id) in enumerate(self.columns):
+            expected = sum(mask >> bit & 1 for mask in self.expected)
+            fulfilled = sum(mask >> bit & 1 for mask in self.fulfilled)
+            gaps.append({
+                'subject': subject_code,
+                'teacher': employee_id,
+                'expected': expected,
+                'submitted': fulfilled,
+                'pending': expected - fulfilled,
+            })
+        return sorted(gaps, key=lambda gap: (-gap['pending'], gap['subject']))
+
@@ -0,0 +1,181 @@
+# feedback_app/events.py
+
+"""
+Live class-completion events for Server-Sent Events streams.
+
+A class is identified by its class key, (branch_id, semester_id,
+division_id), the same denormalized columns FeedbackObligation carries.
+Streams subscribe to the broker with their class key and get an
+asyncio.Queue on their own event loop. Publishers run in request threads and
+hand each event over with loop.call_soon_threadsafe. An idle stream is one
+suspended coroutine: no thread and no queries, only a keepalive comment
+every EVENTS_KEEPALIVE_SECONDS.
+
+Events are produced by EVENTS_BACKEND:
+
+- 'local': a committed feedback insert publishes to the streams of its
+  class in the same process. Right for a single ASGI worker.
+- 'polling': one task per watched class and per process re-reads the
+  class's obligation counts every EVENTS_POLL_SECONDS and publishes what
+  changed. This is the stand-in for multi-process deployments, where the
+  insert may land in another worker. Its cost depends on the number of
+  watched classes, not on the number of open dashboards.
+
+Both send 'completion' events (obligation and student counts) and a
+'student-completed' event when a student's last pending feedback arrives.
+"""
+
+import asyncio
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .models import FeedbackObligation, Student
+from .obligations import CURRENT, completion_stats, scoped
+
+
+def class_key(branch_id, semester_id, division_id):
+    return (branch_id, semester_id, division_id)
+
+
+def _obligations(key):
+    branch_id, semester_id, division_id = key
+    obligations = scoped(branch_id, semester_id)
+    return obligations.filter(division_id=division_id) if division_id else obligations.filter(division__isnull=True)
+
+
+def completion_event(key):
+    """'completion' payload for a class: obligation and student counts in one query"""
+    stats = completion_stats(_obligations(key))
+    return {'event': 'completion', 'data': {
+        'expected': stats['expected'],
+        'received': stats['fulfilled'],
+        'completion_rate': stats['completion_rate'],
+        'students': stats['students'],
+        'students_complete': stats['students_complete'],
+    }}
+
+
+def complete_students(key):
+    """Ids of the class's students with nothing pending"""
+    return set(
+        _obligations(key).values('student_id').annotate(
+            pending=Count('id', filter=Q(is_fulfilled=False))
+        ).filter(pending=0).values_list('student_id', flat=True)
+    )
+
+
+def student_events(student_ids):
+    return [{'event': 'student-completed', 'data': {
+        'student_id': student['id'],
+        'prn': student['prn_number'],
+        'name': f"{student['user__first_name']} {student['user__last_name']}".strip(),
+    }} for student in Student.objects.filter(id__in=student_ids).values(
+        'id', 'prn_number', 'user__first_name', 'user__last_name'
+    ).order_by('prn_number')]
+
+
+#  BROKER
+
+class Subscription:
+    def __init__(self, key, loop):
+        self.key = key
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+
+    def deliver(self, event):
+        """Called on the subscriber's loop"""
+        if self.queue.full():
+            self.queue.get_nowait()  # a slow client loses the oldest event, counts are re-sent anyway
+        self.queue.put_nowait(event)
+
+
+class Broker:
+    """In-process pub/sub of class events; safe to publish from any thread"""
+
+    def __init__(self):
+        self._subscribers = {}  # class key -> set of Subscription
+        self._lock = threading.Lock()
+
+    def subscribe(self, key):
+        subscription = Subscription(key, asyncio.get_running_loop())
+        with self._lock:
+            first = key not in self._subscribers
+            self._subscribers.setdefault(key, set()).add(subscription)
+        if first and settings.EVENTS_BACKEND == 'polling':
+            start_poller(key)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.key)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.key]
+
+    def watched(self, key):
+        with self._lock:
+            return key in self._subscribers
+
+    def publish(self, key, events):
+        with self._lock:
+            subscribers = list(self._subscribers.get(key, ()))
+        for subscription in subscribers:
+            for event in events:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+                except RuntimeError:
+                    self.unsubscribe(subscription)  # its loop is closed
+
+
+broker = Broker()
+
+
+#  LOCAL BACKEND
+
+def feedback_committed(key, student_id):
+    """Publish a committed feedback insert to this process's streams of the class"""
+    if settings.EVENTS_BACKEND != 'local' or not broker.watched(key):
+        return
+    events = [completion_event(key)]
+    if not FeedbackObligation.objects.filter(CURRENT, student_id=student_id, is_fulfilled=False).exists():
+        events += student_events([student_id])
+    broker.publish(key, events)
+
+
+#  POLLING BACKEND
+
+def _poll_once(key, state):
+    completion = completion_event(key)
+    if completion['data'] == state.get('completion'):
+        return []
+    state['completion'] = completion['data']
+    complete = complete_students(key)
+    new = complete - state.get('complete', complete)
+    state['complete'] = complete
+    return [completion] + (student_events(new) if new else [])
+
+
+async def _poll(key):
+    state = {}
+    await sync_to_async(_poll_once)(key, state)  # baseline; streams already sent their snapshot
+    while broker.watched(key):
+        await asyncio.sleep(settings.EVENTS_POLL_SECONDS)
+        events = await sync_to_async(_poll_once)(key, state)
+        if events:
+            broker.publish(key, events)
+
+
+_pollers = {}  # class key -> task
+
+
+def start_poller(key):
+    """One poller per watched class; a poller still winding down is reused"""
+    task = _pollers.get(key)
+    if task is not None and not task.done():
+        return
+    task = _pollers[key] = asyncio.get_running_loop().create_task(_poll(key))
+    task.add_done_callback(lambda done: _pollers.pop(key, None) if _pollers.get(key) is done else None)
@@ -0,0 +1,155 @@
+# feedback_app/lexicon.py
+
+"""
+Dictionary-based sentiment scorer.
+
+A lean re-implementation of the pattern analyzer behind TextBlob's
+`sentiment.polarity`. It uses the same adjective lexicon (textblob's
+en-sentiment.xml, polarity and intensity averaged over word senses, adjectives
+also scored as their -ly adverbs), the same
+intensifier rule ("very good" = good x intensity of "very"), the same
+negation rule ("not good" = -0.5 x good, and a negated intensifier divides
+instead of multiplying: "not very good" = -0.5 x good / intensity of "very")
+and the same mean over the assessed words. It skips TextBlob's tokenizer,
+sentence splitting and per-call object model, so short comments score several
+times faster. The XML is read
+directly, without importing TextBlob or NLTK.
+"""
+
+import importlib.util
+import os
+import re
+from xml.etree import ElementTree
+
+NEGATIONS = frozenset(('no', 'not', "n't", 'never'))
+EXCLAMATION_BOOST = 1.25
+NEGATION_FACTOR = -0.5
+
+# Pattern's emoticon moods
+EMOTICON_MOODS = (
+    (1.0, ('<3', '♥', '8-D', ':-D', ':D', '=-D', '=D', '>:D', 'X-D', 'x-D')),
+    (0.75, (':-P', ':-b', ':-p', ':P', ':^)', ':b', ':c)', ':o)', ':p', '>:P')),
+    (0.5, ('8)', '8-)', ':)', ':-)', ':3', ':>', ':]', ':}', '=)', '=]', '>:)')),
+    (0.25, ('*)', '*-)', ';)', ';-)', ';-]', ';D', ';]', ';^)', '>;]')),
+    (0.05, (':-O', ':-o', ':O', ':o', '>:o', 'o.O', 'o_O', '°O°', '°o°')),
+    (-0.25, (':-.', ':-/', ':-S', ':-s', ':/', ':S', ':\\', ':s', '>.>', '>:/', '>:\\')),
+    (-0.75, (':(', ':-(', ':-<', ':-[', ':-c', ':[', ':c', ':{', '=(', '=/', '>:[')),
+    (-1.0, (":'''(", ":'(", ";'(")),
+)
+# Matched lowercased; where two faces collide the first mood listed wins
+EMOTICONS = {face.lower(): polarity for polarity, faces in reversed(EMOTICON_MOODS) for face in faces}
+
+# Split like pattern's tokenizer: "don't" -> "do", "n't"; "it's" -> "it", "'s";
+# hyphenated words and emoticons stay whole. Other punctuation never affects the score.
+_TOKEN = re.compile(
+    '|'.join(re.escape(face) for face in sorted(EMOTICONS, key=len, reverse=True))
+    + r"|[a-z]+(?=n't)|n't|'[a-z]+|[a-z]+(?:-[a-z]+)*|!"
+)
+
+
+def default_path():
+    """en-sentiment.xml shipped with textblob (located without importing it)"""
+    spec = importlib.util.find_spec('textblob')
+    if spec is None or not spec.submodule_search_locations:
+        raise ImportError('textblob is not installed')
+    return os.path.join(spec.submodule_search_locations[0], 'en', 'en-sentiment.xml')
+
+
+def _mean(values):
+    return sum(values) / len(values)
+
+
+def _adverb(adjective):
+    """'terrible' -> 'terribly', 'happy' -> 'happily', 'clear' -> 'clearly'"""
+    if adjective.endswith('y'):
+        adjective = adjective[:-1] + 'i'
+    if adjective.endswith('le'):
+        adjective = adjective[:-2]
+    return adjective + 'ly'
+
+
+def load_lexicon(path=None):
+    """{word: (polarity, intensity, is_modifier)}, built the way pattern builds its Sentiment dict"""
+    senses = {}  # word -> pos -> [(polarity, intensity)], in file order
+    for _, element in ElementTree.iterparse(path or default_path()):
+        if element.tag != 'word':
+            continue
+        form = element.get('form')
+        if form:
+            senses.setdefault(form, {}).setdefault(element.get('pos'), []).append(
+                (float(element.get('polarity', 0.0)), float(element.get('intensity', 1.0)))
+            )
+        element.clear()
+
+    lexicon, adjectives = {}, []
+    for word, by_pos in senses.items():
+        per_pos = {
+            pos: (_mean([p for p, _ in values]), _mean([i for _, i in values]))
+            for pos, values in by_pos.items()
+        }
+        lexicon[word] = (
+            _mean([p for p, _ in per_pos.values()]),
+            _mean([i for _, i in per_pos.values()]),
+            'RB' in per_pos,  # adverbs modify the next known word
+        )
+        if 'JJ' in per_pos:
+            adjectives.append((word, per_pos['JJ']))
+
+    # Every adjective also scores as its -ly adverb ("terrible" -> "terribly"),
+    # replacing whatever the file says about that adverb
+    for word, (polarity, intensity) in adjectives:
+        lexicon[_adverb(word)] = (polarity, intensity, True)
+    return lexicon
+
+
+class LexiconScorer:
+    """Polarity in [-1, 1] of a text from a word lexicon"""
+
+    def __init__(self, lexicon):
+        self.lexicon = lexicon
+
+    def polarity(self, text):
+        lexicon = self.lexicon
+        assessments = []  # [polarity, intensity, negated]
+        modifier = None   # preceding known adverb ("very good")
+        negation = False  # preceding negation ("not good", "not a good")
+
+        for token in _TOKEN.findall(text.lower()):
+            entry = lexicon.get(token)
+            if entry is not None:
+                polarity, intensity, is_modifier = entry
+                if modifier is None:
+                    assessments.append([polarity, intensity, False])
+                else:
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(polarity * last[1], 1.0))
+                    last[1] = intensity
+                if negation:
+                    # "not very good": the negated intensifier weakens instead of boosting
+                    assessments[-1][1] = 1.0 / assessments[-1][1]
+                    assessments[-1][2] = True
+                modifier = token if is_modifier else None
+                negation = token in NEGATIONS
+                continue
+
+            if token in NEGATIONS:
+                negation = True
+            elif negation and len(token.strip("'")) > 1:
+                negation = False
+            if negation and modifier is not None and modifier.endswith('ly'):
+                # "really not good"
+                assessments[-1][2] = True
+                negation = False
+            elif modifier is not None and len(token) > 2:
+                modifier = None
+            if token == '!' and assessments:
+                assessments[-1][0] = max(-1.0, min(assessments[-1][0] * EXCLAMATION_BOOST, 1.0))
+            elif token in EMOTICONS:
+                assessments.append([EMOTICONS[token], 1.0, False])
+
+        if not assessments:
+            return 0.0
+        return sum(
+            polarity * NEGATION_FACTOR if negated else polarity
+            for polarity, _, negated in assessments
+        ) / len(assessments)
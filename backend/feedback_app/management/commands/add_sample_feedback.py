@@ -5,6 +5,7 @@ from django.db import transaction
 from feedback_app.models import (
     Student, Teacher, Subject, Feedback
 )
+from feedback_app.sample_text import COMMENTS, SUGGESTIONS
 from textblob import TextBlob
 import random
 import re
@@ -45,59 +46,6 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.ERROR('No teachers found. Run setup_database first.'))
                     return
                 
-                # Sample feedback comments and suggestions
-                positive_comments = [
-                    "Excellent teaching methodology. The professor explains concepts very clearly and makes the subject interesting.",
-                    "Great teacher! Very helpful and always available for doubts. Makes learning enjoyable.",
-                    "Outstanding teaching skills. The way concepts are explained is brilliant and easy to understand.",
-                    "Very good teaching approach. Interactive sessions and practical examples help a lot.",
-                    "Fantastic professor! Deep knowledge of the subject and explains everything thoroughly.",
-                    "Really appreciate the teaching style. Makes complex topics simple and engaging.",
-                    "Amazing teacher who truly cares about student learning. Always encouraging and supportive.",
-                    "Excellent course delivery. Well-organized lectures and helpful study materials provided."
-                ]
-                
-                neutral_comments = [
-                    "The teaching is okay. Could be more interactive but concepts are covered adequately.",
-                    "Average teaching pace. Sometimes too fast, sometimes too slow.",
-                    "Course content is good but delivery could be improved slightly.",
-                    "Satisfactory teaching method. Gets the job done but room for improvement.",
-                    "Decent teaching overall. Some topics need more detailed explanation.",
-                    "The classes are fine. Content is covered but could be more engaging."
-                ]
-                
-                negative_comments = [
-                    "Teaching could be improved. Concepts are not explained clearly enough.",
-                    "Difficult to understand lectures. Need more examples and practical sessions.",
-                    "Teaching speed is too fast. Hard to keep up with the pace of lectures.",
-                    "Not very interactive. More student engagement would help learning.",
-                    "Course material is not well organized. Difficult to follow along."
-                ]
-                
-                positive_suggestions = [
-                    "Keep up the excellent work! Maybe add more real-world examples.",
-                    "Continue the great teaching. Perhaps include more practical assignments.",
-                    "Maintain the current teaching style. Very effective and engaging.",
-                    "Great job! Could add more interactive quizzes for better learning.",
-                    "Please continue teaching this way. Maybe include more case studies."
-                ]
-                
-                neutral_suggestions = [
-                    "Could provide more study materials and reference books.",
-                    "More practice problems would be helpful for exam preparation.",
-                    "Additional tutorial sessions might help with difficult topics.",
-                    "Providing lecture notes in advance would be beneficial.",
-                    "More examples during lectures would improve understanding."
-                ]
-                
-                negative_suggestions = [
-                    "Please slow down the teaching pace and explain concepts more thoroughly.",
-                    "Need more interactive sessions and practical demonstrations.",
-                    "Should provide better study materials and organized notes.",
-                    "More focus on fundamentals needed before moving to advanced topics.",
-                    "Please make lectures more engaging and interactive."
-                ]
-                
                 feedback_count = 0
                 
                 # Create feedback for each student
@@ -130,16 +78,16 @@ class Command(BaseCommand):
                             
                             # Select comments based on sentiment
                             if sentiment_type == 'positive':
-                                comment = random.choice(positive_comments)
-                                suggestion = random.choice(positive_suggestions)
+                                comment = random.choice(COMMENTS['positive'])
+                                suggestion = random.choice(SUGGESTIONS['positive'])
                                 rating_base = random.randint(4, 5)
                             elif sentiment_type == 'neutral':
-                                comment = random.choice(neutral_comments)
-                                suggestion = random.choice(neutral_suggestions)
+                                comment = random.choice(COMMENTS['neutral'])
+                                suggestion = random.choice(SUGGESTIONS['neutral'])
                                 rating_base = 3
                             else:
-                                comment = random.choice(negative_comments)
-                                suggestion = random.choice(negative_suggestions)
+                                comment = random.choice(COMMENTS['negative'])
+                                suggestion = random.choice(SUGGESTIONS['negative'])
                                 rating_base = random.randint(1, 2)
                             
                             # Generate ratings with slight variation
@@ -0,0 +1,60 @@
+# feedback_app/management/commands/benchmark_async.py
+
+import importlib.util
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback_app.benchmarks import ASYNC_VARIANTS, measure_async
+
+
+class Command(BaseCommand):
+    help = 'Compare throughput and p99 of the sync views and their async variants under concurrent load on uvicorn'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', default='', help='Comma separated sync url names to compare')
+        parser.add_argument('--concurrency', default='1,16,64', help='Comma separated numbers of concurrent clients')
+        parser.add_argument('--requests', type=int, default=1000, help='Timed requests per view and concurrency level')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--password', default='pass1234')
+        parser.add_argument('--output', help='Write the results as JSON')
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec('uvicorn') is None:
+            raise CommandError('uvicorn is not installed (pip install uvicorn)')
+
+        names = [name.strip() for name in options['only'].split(',') if name.strip()] or None
+        unknown = set(names or []) - set(ASYNC_VARIANTS)
+        if unknown:
+            raise CommandError(f"No async variant for: {', '.join(sorted(unknown))}; expected: {', '.join(ASYNC_VARIANTS)}")
+        try:
+            concurrency = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        except ValueError:
+            raise CommandError('--concurrency takes comma separated integers')
+
+        self.stdout.write(
+            f"{'endpoint':<24} {'clients':>7} {'sync rps':>9} {'async rps':>9} "
+            f"{'sync p99':>9} {'async p99':>9} {'errors':>7}"
+        )
+
+        def progress(name, level, row):
+            sync, async_ = row['sync'], row['async']
+            self.stdout.write(
+                f"{name:<24} {level:>7} {sync['throughput_rps']:>9.1f} {async_['throughput_rps']:>9.1f} "
+                f"{sync['p99_ms'] or 0:>9.2f} {async_['p99_ms'] or 0:>9.2f} {sync['errors'] + async_['errors']:>7}"
+            )
+
+        try:
+            results = measure_async(
+                names, concurrency=concurrency, requests=options['requests'], port=options['port'],
+                password=options['password'], progress=progress
+            )
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        self.stdout.write(self.style.SUCCESS('Async benchmark complete!'))
@@ -0,0 +1,57 @@
+# feedback_app/management/commands/benchmark_endpoints.py
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback_app.benchmarks import ENDPOINTS, compare, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every API endpoint (latency percentiles, queries, rows, peak memory) against the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', default='', help='Comma separated url names to run')
+        parser.add_argument('--password', default='pass1234', help='Password of the benchmark student (login endpoint)')
+        parser.add_argument('--output', default='benchmark_results.json')
+        parser.add_argument('--baseline', help='Earlier results to compare against')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative growth, e.g. 0.2 for 20%%')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['only'].split(',') if name.strip()] or None
+        unknown = set(names or []) - set(ENDPOINTS)
+        if unknown:
+            raise CommandError(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+
+        self.stdout.write(f"{'endpoint':<34} {'status':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'rows':>8} {'peak KB':>9}")
+
+        def progress(name, result):
+            self.stdout.write(
+                f"{name:<34} {result['status']:>6} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['queries']:>8} {result['rows']:>8} {result['peak_kb']:>9.1f}"
+            )
+
+        try:
+            results = run_benchmarks(
+                names, iterations=options['iterations'], warmup=options['warmup'],
+                password=options['password'], progress=progress
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        Path(options['output']).write_text(json.dumps(results, indent=2))
+        self.stdout.write(f"Results written to {options['output']}")
+
+        if options['baseline']:
+            baseline = json.loads(Path(options['baseline']).read_text())
+            regressions = compare(baseline, results, threshold=options['threshold'])
+            if regressions:
+                for regression in regressions:
+                    self.stdout.write(self.style.ERROR(f'  {regression}'))
+                raise CommandError(f'{len(regressions)} regression(s) against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}"))
+
+        self.stdout.write(self.style.SUCCESS('Benchmark complete!'))
@@ -0,0 +1,61 @@
+# feedback_app/management/commands/benchmark_sentiment.py
+
+import json
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback_app.benchmarks import SENTIMENT_LABELS, measure_sentiment, sentiment_corpus
+from feedback_app.sentiment import BACKENDS
+
+
+class Command(BaseCommand):
+    help = 'Measure analyze_sentiment throughput (1 and N processes), latency percentiles and accuracy on labelled samples'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=','.join(BACKENDS), help='Comma separated sentiment backends')
+        parser.add_argument('--processes', type=int, default=min(os.cpu_count() or 1, 4), help='Pool size for the parallel run')
+        parser.add_argument('--limit', type=int, help='Most recent feedback rows to take text from')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed passes over the corpus')
+        parser.add_argument('--output', help='Write the results as JSON')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['backends'].split(',') if name.strip()]
+        unknown = set(names) - set(BACKENDS)
+        if unknown or not names:
+            raise CommandError(f"Unknown backend(s) {', '.join(sorted(unknown))}; expected: {', '.join(BACKENDS)}")
+
+        texts, labels = sentiment_corpus(options['limit'])
+        labelled = sum(label is not None for label in labels)
+        self.stdout.write(f'{len(texts)} texts ({len(texts) - labelled} stored, {labelled} labelled samples)')
+
+        processes = options['processes']
+        self.stdout.write(
+            f"{'backend':<10} {'skipped':>8} {'1 proc/s':>10} {f'{processes} proc/s':>10} "
+            f"{'p50 us':>8} {'p99 us':>8} {'accuracy':>9}"
+        )
+        results = []
+        for name in names:
+            result = measure_sentiment(texts, labels, backend=name, processes=processes, repeat=options['repeat'])
+            results.append(result)
+            pool = f"{result['pool_texts_per_s']:>10.0f}" if result['pool_texts_per_s'] else f"{'-':>10}"
+            accuracy = f"{result['accuracy'] * 100:>8.1f}%" if result['accuracy'] is not None else f"{'-':>9}"
+            self.stdout.write(
+                f"{name:<10} {result['skipped']:>8} {result['single_texts_per_s']:>10.0f} {pool} "
+                f"{result['p50_us']:>8.1f} {result['p99_us']:>8.1f} {accuracy}"
+            )
+
+        for result in results:
+            columns = SENTIMENT_LABELS + (None,)
+            corner = f"{result['backend']}: label / got"
+            self.stdout.write(f'\n  {corner:<26}' + ''.join(f'{str(label):>10}' for label in columns))
+            for expected in SENTIMENT_LABELS:
+                row = result['confusion'][expected]
+                self.stdout.write(f'  {expected:<26}' + ''.join(f'{row[label]:>10}' for label in columns))
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        self.stdout.write(self.style.SUCCESS('Sentiment benchmark complete!'))
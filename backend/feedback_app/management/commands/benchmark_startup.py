@@ -0,0 +1,53 @@
+# feedback_app/management/commands/benchmark_startup.py
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from feedback_app.benchmarks import measure_startup
+
+MODES = (
+    ('lazy', False, False),
+    ('preload', True, False),
+    ('warm', False, True),
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure worker boot time, resident memory and first sentiment call (lazy, preloaded, warmed up)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh processes per mode (median is reported)')
+        parser.add_argument('--memory-mb', type=int, default=1024, help='Memory budget used to estimate workers per box')
+        parser.add_argument('--output', help='Write the results as JSON')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'mode':<8} {'boot ms':>9} {'RSS MB':>8} {'workers':>8} {'1st call':>9} {'2nd call':>9}  heavy modules at boot"
+        )
+
+        results = {}
+        for mode, preload, warmup in MODES:
+            result = results[mode] = measure_startup(preload=preload, warmup=warmup, repeat=options['repeat'])
+            rss_mb = result['rss_kb'] / 1024
+            workers = int(options['memory_mb'] // rss_mb) if rss_mb else 0
+            self.stdout.write(
+                f"{mode:<8} {result['total_ms']:>9.1f} {rss_mb:>8.1f} {workers:>8} "
+                f"{result['first_sentiment_ms']:>9.1f} {result['second_sentiment_ms']:>9.1f}  "
+                f"{', '.join(result['heavy_modules']) or '-'}"
+            )
+
+        lazy, warm = results['lazy'], results['warm']
+        self.stdout.write(
+            f"Lazy imports save {warm['total_ms'] - lazy['total_ms']:.1f} ms and "
+            f"{(warm['rss_kb'] - lazy['rss_kb']) / 1024:.1f} MB per worker at boot; "
+            f"warm-up cuts the first sentiment call from {lazy['first_sentiment_ms']:.1f} ms "
+            f"to {warm['first_sentiment_ms']:.1f} ms"
+        )
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(results, indent=2))
+            self.stdout.write(f"Results written to {options['output']}")
+
+        self.stdout.write(self.style.SUCCESS('Startup benchmark complete!'))
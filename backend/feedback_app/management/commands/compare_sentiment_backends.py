@@ -0,0 +1,85 @@
+# feedback_app/management/commands/compare_sentiment_backends.py
+
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from feedback_app.models import Feedback
+from feedback_app.sentiment import BACKENDS, analyze_sentiment, get_backend
+
+LABELS = ('positive', 'neutral', 'negative')
+
+
+def stored_texts(limit=None):
+    """Distinct non-empty comments and suggestions with how often each was submitted"""
+    counts = Counter()
+    for field in ('comments', 'suggestions'):
+        rows = Feedback.objects.exclude(**{field: ''}).values_list(field).annotate(n=Count('id')).order_by()
+        for text, n in rows:
+            if text.strip():
+                counts[text] += n
+    texts = counts.most_common(limit)
+    return [text for text, _ in texts], [n for _, n in texts]
+
+
+class Command(BaseCommand):
+    help = 'Compare sentiment backends on stored feedback: label agreement, polarity drift and throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backends', default=','.join(BACKENDS), help='Comma separated; the first is the reference')
+        parser.add_argument('--limit', type=int, help='Most frequent distinct texts to score')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed passes over the texts per backend')
+
+    def handle(self, *args, **options):
+        names = [name.strip() for name in options['backends'].split(',') if name.strip()]
+        unknown = set(names) - set(BACKENDS)
+        if unknown or len(names) < 2:
+            raise CommandError(f"Give at least two of: {', '.join(BACKENDS)}")
+
+        texts, weights = stored_texts(options['limit'])
+        if not texts:
+            raise CommandError('No stored comments or suggestions to compare on')
+        total = sum(weights)
+        self.stdout.write(f'{len(texts)} distinct texts ({total} stored comments and suggestions)')
+
+        labels, scores = {}, {}
+        self.stdout.write(f"{'backend':<10} {'texts/s':>10} {'us/text':>9}")
+        for name in names:
+            backend = get_backend(name)
+            backend.load()
+            backend.polarity(texts[0])
+
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                scores[name] = [backend.polarity(text) for text in texts]
+            elapsed = (time.perf_counter() - started) / options['repeat']
+            labels[name] = [analyze_sentiment(text, backend=name)[0] for text in texts]
+
+            self.stdout.write(f"{name:<10} {len(texts) / elapsed:>10.0f} {elapsed / len(texts) * 1e6:>9.1f}")
+
+        reference = names[0]
+        for name in names[1:]:
+            agree = sum(w for a, b, w in zip(labels[reference], labels[name], weights) if a == b)
+            drift = sum(abs(a - b) * w for a, b, w in zip(scores[reference], scores[name], weights)) / total
+            self.stdout.write(
+                f"\n{name} vs {reference}: {agree / total * 100:.2f}% labels agree, "
+                f"mean |polarity difference| {drift:.4f}"
+            )
+
+            confusion = Counter()
+            for a, b, w in zip(labels[reference], labels[name], weights):
+                confusion[a, b] += w
+            corner = f'{reference} / {name}'
+            self.stdout.write(f'  {corner:<22}' + ''.join(f'{label:>10}' for label in LABELS))
+            for a in LABELS:
+                self.stdout.write(f'  {a:<22}' + ''.join(f'{confusion[a, b]:>10}' for b in LABELS))
+
+            disagreements = [
+                (w, text, la, lb) for text, la, lb, w in zip(texts, labels[reference], labels[name], weights) if la != lb
+            ]
+            for w, text, la, lb in sorted(disagreements, reverse=True)[:5]:
+                self.stdout.write(f'  {w:>6}x {la} -> {lb}: {text[:80]}')
+
+        self.stdout.write(self.style.SUCCESS('Comparison complete!'))
@@ -0,0 +1,388 @@
+# feedback_app/management/commands/generate_campus.py
+
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from feedback_app import ranking, rollups, trends
+from feedback_app.models import (
+    CustomUser, Branch, Year, Semester, Division, Subject, Teacher,
+    TeacherSubject, Student, Feedback, FeedbackObligation, SubmissionCounter
+)
+from feedback_app.rates import WIDTHS, RateRing
+from feedback_app.sample_text import COMMENTS, SUGGESTIONS
+from feedback_app.sentiment import analyze_sentiment, analyzer_version
+
+YEAR_OF_SEMESTER = {1: 'FY', 2: 'FY', 3: 'SY', 4: 'SY', 5: 'TY', 6: 'TY', 7: 'Final', 8: 'Final'}
+SENTIMENTS = ['positive', 'neutral', 'negative']
+
+
+def parse_semesters(value):
+    """'1,3,5' or '1-8' -> sorted list of semester numbers"""
+    numbers = set()
+    for part in value.split(','):
+        if '-' in part:
+            low, high = part.split('-')
+            numbers.update(range(int(low), int(high) + 1))
+        elif part.strip():
+            numbers.add(int(part))
+    if not numbers or not numbers <= set(YEAR_OF_SEMESTER):
+        raise CommandError(f'Invalid semesters: {value}')
+    return sorted(numbers)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a deterministic synthetic campus for benchmarking. '
+        'Roughly 1M feedback rows: --branches 25 --divisions 6 --students-per-division 120 '
+        '--subjects-per-semester 7 --semesters 1-8'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--branches', type=int, default=4)
+        parser.add_argument('--divisions', type=int, default=3, help='Divisions per class (max 26)')
+        parser.add_argument('--students-per-division', type=int, default=60)
+        parser.add_argument('--subjects-per-semester', type=int, default=5)
+        parser.add_argument('--subjects-per-teacher', type=int, default=2)
+        parser.add_argument('--semesters', default='1,3,5,7', help="Running semesters, e.g. '1,3,5,7' or '1-8'")
+        parser.add_argument('--feedback-rate', type=float, default=0.85, help='Share of obligations with feedback')
+        parser.add_argument('--spread-days', type=float, default=14, help='Feedback is timestamped over the last N days')
+        parser.add_argument('--prefix', default='G', help='Prefix for generated branch codes, usernames and PRNs')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--reset', action='store_true', help='Delete previously generated data for the prefix')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        self.rng = random.Random(options['seed'])
+        self.prefix = options['prefix']
+        self.batch_size = options['batch_size']
+        semesters = parse_semesters(options['semesters'])
+
+        if not 1 <= options['divisions'] <= 26:
+            raise CommandError('--divisions must be between 1 and 26')
+
+        if Branch.objects.filter(code__startswith=f'{self.prefix}-').exists():
+            if not options['reset']:
+                raise CommandError(f"Generated data with prefix '{self.prefix}' exists. Use --reset to replace it.")
+            self.reset()
+
+        # Also after a failed run: the reset above has committed
+        try:
+            feedback_count, obligation_count, students, teacher_bias = self.generate(options, semesters)
+        finally:
+            self.refresh_derived()
+
+        self.stdout.write(
+            f"Branches: {len(self.branches)}, subjects: {len(self.subjects)}, teachers: {len(teacher_bias)}, "
+            f"students: {len(students)}, obligations: {obligation_count}, feedback: {feedback_count}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully generated campus in {time.perf_counter() - started:.1f}s!'
+        ))
+
+    def generate(self, options, semesters):
+        # One hash for every generated account; hashing per user dominates otherwise
+        self.password = make_password('pass1234')
+        self.templates = {
+            (kind, text): analyze_sentiment(text)
+            for texts in (COMMENTS, SUGGESTIONS)
+            for kind in SENTIMENTS
+            for text in texts[kind]
+        }
+        self.sentiment_version = analyzer_version()
+
+        with transaction.atomic():
+            classes = self.create_structure(options, semesters)
+            teacher_bias = self.create_teachers(options)
+            students = self.create_students(classes, options['students_per_division'])
+            feedback_count, obligation_count = self.create_feedback(
+                students, teacher_bias, options['feedback_rate'], options['spread_days']
+            )
+        return feedback_count, obligation_count, students, teacher_bias
+
+    def reset(self):
+        self.stdout.write(f"Deleting generated data for prefix '{self.prefix}'...")
+        with transaction.atomic():
+            branches = Branch.objects.filter(code__startswith=f'{self.prefix}-')
+            subjects = Subject.objects.filter(branch__in=branches)
+            # Plain SQL deletes: QuerySet.delete() would send the per-row signals,
+            # which resync obligations of every subject while it is being removed
+            self.delete_rows(Feedback, 'subject_id', subjects)
+            self.delete_rows(TeacherSubject, 'subject_id', subjects)
+            FeedbackObligation.objects.filter(branch__in=branches).delete()
+            branches.delete()
+            CustomUser.objects.filter(username__startswith=f'{self.prefix}-').delete()
+
+    def refresh_derived(self):
+        """
+        Rebuild the rollups and drop this process's caches. Backdated feedback
+        lands behind the rollup watermark and the raw deletes leave no
+        StaleRollupCell, so an incremental refresh would miss both.
+        """
+        started = time.perf_counter()
+        cells = rollups.refresh(full=True)
+        ranking.invalidate()
+        trends.invalidate()
+        self.stdout.write(f"Rebuilt rollups ({cells} subject cells) in {time.perf_counter() - started:.1f}s")
+
+    def delete_rows(self, model, column, parents):
+        """DELETE FROM model WHERE column IN (ids of `parents`), without signals or cascades"""
+        subquery, params = parents.values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {model._meta.db_table} WHERE {column} IN ({subquery})', params)
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    #  STRUCTURE
+
+    def create_structure(self, options, semesters):
+        """Branches, divisions and subjects; returns the list of (branch, semester, division) classes"""
+        years = {name: Year.objects.get_or_create(name=name)[0] for name in set(YEAR_OF_SEMESTER.values())}
+        semester_objs = {
+            number: Semester.objects.get_or_create(number=number, year=years[YEAR_OF_SEMESTER[number]])[0]
+            for number in semesters
+        }
+        divisions = [
+            Division.objects.get_or_create(name=chr(ord('A') + i))[0]
+            for i in range(options['divisions'])
+        ]
+
+        self.bulk_create(Branch, [
+            Branch(code=f'{self.prefix}-{i:03d}', name=f'Generated Branch {i}')
+            for i in range(1, options['branches'] + 1)
+        ])
+        self.branches = list(Branch.objects.filter(code__startswith=f'{self.prefix}-').order_by('code'))
+
+        self.bulk_create(Subject, [
+            Subject(
+                code=f'{branch.code}-{number}{j:02d}',
+                name=f'{branch.name} Subject {number}.{j}',
+                semester=semester_objs[number],
+                branch=branch
+            )
+            for branch in self.branches
+            for number in semesters
+            for j in range(1, options['subjects_per_semester'] + 1)
+        ])
+        self.subjects = list(Subject.objects.filter(branch__in=self.branches).order_by('code'))
+
+        return [
+            (branch, semester_objs[number], division)
+            for branch in self.branches
+            for number in semesters
+            for division in divisions
+        ]
+
+    def create_teachers(self, options):
+        """Teachers per branch covering its subjects; returns {teacher_id: quality bias}"""
+        per_teacher = options['subjects_per_teacher']
+        users, plans = [], []
+        for branch in self.branches:
+            branch_subjects = [s for s in self.subjects if s.branch_id == branch.id]
+            for start in range(0, len(branch_subjects), per_teacher):
+                employee_id = f'{self.prefix}-T{len(plans) + 1:05d}'
+                users.append(CustomUser(
+                    username=employee_id, password=self.password, user_type='teacher',
+                    first_name='Teacher', last_name=str(len(plans) + 1), prn_number=employee_id,
+                    email=f'{employee_id.lower()}@campus.test'
+                ))
+                plans.append((employee_id, branch, branch_subjects[start:start + per_teacher]))
+
+        self.bulk_create(CustomUser, users)
+        user_ids = dict(CustomUser.objects.filter(username__in=[p[0] for p in plans]).values_list('username', 'id'))
+
+        self.bulk_create(Teacher, [
+            Teacher(user_id=user_ids[employee_id], employee_id=employee_id, department=branch)
+            for employee_id, branch, _ in plans
+        ])
+        teacher_ids = dict(Teacher.objects.filter(employee_id__in=user_ids).values_list('employee_id', 'id'))
+
+        self.bulk_create(TeacherSubject, [
+            TeacherSubject(teacher_id=teacher_ids[employee_id], subject=subject)
+            for employee_id, _, subjects in plans
+            for subject in subjects
+        ])
+        self.bulk_create(Teacher.subjects.through, [
+            Teacher.subjects.through(teacher_id=teacher_ids[employee_id], subject_id=subject.id)
+            for employee_id, _, subjects in plans
+            for subject in subjects
+        ])
+
+        self.teachers_of = {}
+        for employee_id, _, subjects in plans:
+            for subject in subjects:
+                self.teachers_of.setdefault(subject.id, []).append(teacher_ids[employee_id])
+
+        # Most teachers are liked, a few are not
+        return {teacher_ids[employee_id]: self.rng.betavariate(5, 2) for employee_id, _, _ in plans}
+
+    def create_students(self, classes, per_division):
+        """Students for every class, plus one class teacher per class while teachers last"""
+        available = {
+            branch.id: list(Teacher.objects.filter(department=branch).order_by('employee_id'))
+            for branch in self.branches
+        }
+        class_teachers = []
+        users, plans = [], []
+
+        for branch, semester, division in classes:
+            teachers = available[branch.id]
+            teacher = teachers.pop(0) if teachers else None
+            if teacher:
+                teacher.is_class_teacher = True
+                teacher.assigned_class_year_id = semester.year_id
+                teacher.assigned_class_branch = branch
+                teacher.assigned_class_semester = semester
+                teacher.assigned_class_division = division
+                class_teachers.append(teacher)
+
+            for _ in range(per_division):
+                prn = f'{self.prefix}-{len(plans) + 1:07d}'
+                users.append(CustomUser(
+                    username=prn, password=self.password, user_type='student',
+                    first_name='Student', last_name=str(len(plans) + 1), prn_number=prn,
+                    email=f'{prn.lower()}@campus.test'
+                ))
+                plans.append((prn, branch, semester, division, teacher))
+
+        Teacher.objects.bulk_update(class_teachers, [
+            'is_class_teacher', 'assigned_class_year', 'assigned_class_branch',
+            'assigned_class_semester', 'assigned_class_division'
+        ], batch_size=self.batch_size)
+
+        for start in range(0, len(plans), self.batch_size):
+            chunk = plans[start:start + self.batch_size]
+            self.bulk_create(CustomUser, users[start:start + self.batch_size])
+            user_ids = dict(CustomUser.objects.filter(username__in=[p[0] for p in chunk]).values_list('username', 'id'))
+            self.bulk_create(Student, [
+                Student(
+                    user_id=user_ids[prn], prn_number=prn, year_id=semester.year_id, branch=branch,
+                    semester=semester, division=division, class_teacher=teacher
+                )
+                for prn, branch, semester, division, teacher in chunk
+            ])
+
+        return list(Student.objects.filter(branch__in=self.branches).order_by('prn_number').values_list(
+            'id', 'branch_id', 'semester_id', 'division_id'
+        ))
+
+    #  FEEDBACK
+
+    def make_feedback(self, student_id, teacher_id, subject_id, semester_id, bias):
+        rng = self.rng
+        sentiment = rng.choices(SENTIMENTS, weights=[bias, (1 - bias) * 0.6, (1 - bias) * 0.4])[0]
+        if sentiment == 'positive':
+            rating_base = rng.randint(4, 5)
+        elif sentiment == 'neutral':
+            rating_base = 3
+        else:
+            rating_base = rng.randint(1, 2)
+
+        def rating():
+            return max(1, min(5, rating_base + rng.randint(-1, 1)))
+
+        comment = rng.choice(COMMENTS[sentiment])
+        suggestion = rng.choice(SUGGESTIONS[sentiment])
+        comment_sentiment, comment_score = self.templates[(sentiment, comment)]
+        suggestion_sentiment, suggestion_score = self.templates[(sentiment, suggestion)]
+
+        return Feedback(
+            student_id=student_id,
+            teacher_id=teacher_id,
+            subject_id=subject_id,
+            semester_id=semester_id,
+            teaching_effectiveness=rating(),
+            course_content=rating(),
+            interaction_quality=rating(),
+            assignment_feedback=rating(),
+            overall_satisfaction=rating_base,
+            comments=comment,
+            comment_sentiment=comment_sentiment,
+            comment_sentiment_score=comment_score,
+            suggestions=suggestion,
+            suggestion_sentiment=suggestion_sentiment,
+            suggestion_sentiment_score=suggestion_score,
+            sentiment_version=self.sentiment_version,
+            is_anonymous=rng.random() < 0.5
+        )
+
+    def create_feedback(self, students, teacher_bias, feedback_rate, spread_days):
+        """
+        Feedback and the matching obligations, written in batches without
+        signals. Submissions are spread over the last `spread_days` days and
+        counted into SubmissionCounter, as live submissions would be.
+        """
+        subjects_of = {}
+        for subject in self.subjects:
+            subjects_of.setdefault((subject.branch_id, subject.semester_id), []).append(subject.id)
+
+        now = timezone.now()
+        spread = timedelta(days=spread_days).total_seconds()
+        rings = {
+            resolution: RateRing(width, int(spread // width) + 2) for resolution, width in WIDTHS.items()
+        }
+        feedback, submitted_at, obligations = [], [], []
+        feedback_count = obligation_count = 0
+
+        for student_id, branch_id, semester_id, division_id in students:
+            for subject_id in subjects_of.get((branch_id, semester_id), []):
+                for teacher_id in self.teachers_of.get(subject_id, []):
+                    given = self.rng.random() < feedback_rate
+                    when = None
+                    if given:
+                        when = now - timedelta(seconds=self.rng.random() * spread)
+                        feedback.append(self.make_feedback(
+                            student_id, teacher_id, subject_id, semester_id, teacher_bias[teacher_id]
+                        ))
+                        submitted_at.append(when)
+                        for ring in rings.values():
+                            ring.add((branch_id, semester_id, division_id), when)
+                    obligations.append(FeedbackObligation(
+                        student_id=student_id, teacher_id=teacher_id, subject_id=subject_id,
+                        semester_id=semester_id, branch_id=branch_id, division_id=division_id,
+                        is_fulfilled=given, fulfilled_at=when
+                    ))
+
+            if len(obligations) >= self.batch_size:
+                feedback_count += len(feedback)
+                obligation_count += len(obligations)
+                self.flush(feedback, submitted_at, obligations)
+                feedback, submitted_at, obligations = [], [], []
+
+        feedback_count += len(feedback)
+        obligation_count += len(obligations)
+        self.flush(feedback, submitted_at, obligations)
+        self.create_counters(rings, now)
+        return feedback_count, obligation_count
+
+    def flush(self, feedback, submitted_at, obligations):
+        self.bulk_create(Feedback, feedback)
+        # bulk_create stamps every row with the insert time (auto_now_add), so
+        # the spread-out submission times are written afterwards
+        for row, when in zip(feedback, submitted_at):
+            row.created_at = row.updated_at = when
+        Feedback.objects.bulk_update(feedback, ['created_at', 'updated_at'], batch_size=1000)
+        self.bulk_create(FeedbackObligation, obligations)
+        if obligations:
+            self.stdout.write(f'  ... {len(feedback)} feedback, {len(obligations)} obligations')
+
+    def create_counters(self, rings, now):
+        """Minute counters within SUBMISSION_RATE_MINUTE_RETENTION, hour counters for everything"""
+        keep_minutes_from = now - timedelta(hours=settings.SUBMISSION_RATE_MINUTE_RETENTION)
+        self.bulk_create(SubmissionCounter, [
+            SubmissionCounter(
+                resolution=resolution, bucket_start=start, count=n,
+                branch_id=cell[0], semester_id=cell[1], division_id=cell[2]
+            )
+            for resolution, ring in rings.items()
+            for start, cell, n in ring.drain()
+            if resolution == SubmissionCounter.HOUR or start >= keep_minutes_from
+        ])
@@ -0,0 +1,66 @@
+# feedback_app/management/commands/profiles.py
+
+import io
+import pstats
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback_app.profiling import HEADER, QUERY_PARAM, issue_token, list_captures, top_stacks
+
+
+class Command(BaseCommand):
+    help = 'List and summarize captured request profiles, or issue a profiling token'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', nargs='?', default='list', choices=['list', 'show', 'token'])
+        parser.add_argument('name', nargs='?', help="Capture file name for 'show' (default: newest)")
+        parser.add_argument('--limit', type=int, default=25, help='Rows to print for show')
+        parser.add_argument('--sort', default='cumulative', help='pstats sort key for .prof captures')
+
+    def handle(self, *args, **options):
+        getattr(self, f"handle_{options['action']}")(options)
+
+    def handle_token(self, options):
+        token = issue_token()
+        hours = settings.PROFILE_TOKEN_MAX_AGE / 3600
+        self.stdout.write(token)
+        self.stdout.write(f'Send it as the {HEADER} header or ?{QUERY_PARAM}=<token>. Valid for {hours:g}h.')
+
+    def handle_list(self, options):
+        captures = list_captures()
+        if not captures:
+            self.stdout.write(f'No profiles in {settings.PROFILE_DIR}')
+            return
+
+        self.stdout.write(f"{'captured':<20} {'size':>9}  name")
+        for path in captures:
+            stat = path.stat()
+            captured = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+            self.stdout.write(f'{captured:<20} {stat.st_size / 1024:>7.1f}KB  {path.name}')
+
+    def handle_show(self, options):
+        if options['name']:
+            path = Path(settings.PROFILE_DIR) / options['name']
+            if not path.exists():
+                raise CommandError(f"No profile named {options['name']}")
+        else:
+            captures = list_captures()
+            if not captures:
+                raise CommandError(f'No profiles in {settings.PROFILE_DIR}')
+            path = captures[0]
+
+        self.stdout.write(self.style.SUCCESS(path.name))
+
+        if path.suffix == '.collapsed':
+            self.stdout.write(f"{'self ms':>10}  frame")
+            for microseconds, frame in top_stacks(path, limit=options['limit']):
+                self.stdout.write(f'{microseconds / 1000:>10.2f}  {frame}')
+            return
+
+        out = io.StringIO()
+        stats = pstats.Stats(str(path), stream=out)
+        stats.strip_dirs().sort_stats(options['sort']).print_stats(options['limit'])
+        self.stdout.write(out.getvalue())
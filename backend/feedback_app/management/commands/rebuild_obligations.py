@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from feedback_app.obligations import rebuild_all, completion_stats, scoped
+
+class Command(BaseCommand):
+    help = 'Regenerate the expected-feedback obligation table from enrollments and assignments'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding feedback obligations...')
+
+        rebuild_all()
+
+        stats = completion_stats(scoped())
+        self.stdout.write(
+            f"Expected: {stats['expected']}, received: {stats['fulfilled']}, "
+            f"completion: {stats['completion_rate']}%"
+        )
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt feedback obligations!'))
@@ -0,0 +1,26 @@
+# feedback_app/management/commands/refresh_rollups.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from feedback_app.models import FeedbackRollup
+from feedback_app.rollups import refresh, watermark
+
+
+class Command(BaseCommand):
+    help = 'Bring the HOD feedback rollups up to date (incremental from the last watermark, or --full)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Rebuild every rollup from scratch')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        cells = refresh(full=options['full'])
+        elapsed = (time.perf_counter() - started) * 1000
+
+        self.stdout.write(
+            f"Recomputed {cells} subject cells in {elapsed:.1f} ms; "
+            f"{FeedbackRollup.objects.count()} rollup rows, data through {watermark() or '-'}"
+        )
+        self.stdout.write(self.style.SUCCESS('Rollups refreshed!'))
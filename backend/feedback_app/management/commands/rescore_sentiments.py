@@ -0,0 +1,53 @@
+# feedback_app/management/commands/rescore_sentiments.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from feedback_app.rescoring import compare_shadow, rescore, stale
+from feedback_app.sentiment import BACKENDS, analyzer_version
+
+LABELS = ('positive', 'neutral', 'negative', None)
+
+
+class Command(BaseCommand):
+    help = 'Re-score feedback whose sentiment came from another analyzer version, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', choices=sorted(BACKENDS), help='Analyzer backend (default SENTIMENT_BACKEND)')
+        parser.add_argument('--shadow', action='store_true', help='Write to the shadow columns for an A/B comparison')
+        parser.add_argument('--compare', action='store_true', help='Only report live vs shadow agreement')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--limit', type=int, help='Stop after this many rows (resume later)')
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+        parser.add_argument('--all', action='store_true', help='Re-score every row, not only stale ones')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(options)
+
+        version = analyzer_version(options['backend'])
+        target = 'shadow' if options['shadow'] else 'live'
+        pending = stale(version, options['shadow']).count()
+        self.stdout.write(f'Analyzer {version}: {pending} feedback entries have stale {target} sentiment')
+
+        def progress(done, version):
+            self.stdout.write(f'Re-scored {done}...')
+
+        done, version = rescore(
+            backend=options['backend'], shadow=options['shadow'], batch_size=options['batch_size'],
+            limit=options['limit'], pause=options['pause'], force=options['all'], progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS(f'Re-scored {done} feedback entries ({target}) with {version}'))
+
+    def compare(self, options):
+        version = analyzer_version(options['backend']) if options['backend'] else None
+        result = compare_shadow(version)
+        if not result['texts']:
+            raise CommandError('No shadow-scored feedback; run with --shadow first')
+
+        self.stdout.write(f"Live versions: {result['live_versions']}")
+        self.stdout.write(f"{result['texts']} texts, {result['agreement'] * 100:.2f}% labels agree")
+        self.stdout.write(f"  {'live / shadow':<14}" + ''.join(f'{str(label):>10}' for label in LABELS))
+        for live in LABELS:
+            self.stdout.write(
+                f'  {str(live):<14}' + ''.join(f"{result['confusion'][live, shadow]:>10}" for shadow in LABELS)
+            )
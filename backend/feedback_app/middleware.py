@@ -0,0 +1,304 @@
+# feedback_app/middleware.py
+
+"""
+Request metrics.
+
+MetricsMiddleware times every request and, through a database execute
+wrapper, the SQL it runs. Counters and fixed-bucket histograms are kept per
+view (the URL name, so label cardinality stays bounded) in module state
+shared by the threads of a process. Recording a request is a handful of
+integer increments into preallocated lists. The totals are exposed in
+Prometheus text format at /api/metrics/.
+
+TracingMiddleware adds a Server-Timing header built from feedback_app.tracing
+spans and samples slow requests into a trace log. ProfilingMiddleware profiles
+single requests carrying a signed token (see feedback_app.profiling).
+
+All three are sync and async capable, so under ASGI the async views run on
+the event loop instead of being pushed back onto a thread. The async ORM
+runs queries in the request's thread-sensitive executor thread rather than
+the loop thread, so for async requests the execute wrappers are installed
+on that thread's connection.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+from . import profiling, tracing
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram:
+    """Fixed-bucket histogram; `counts[i]` holds observations <= buckets[i], the last slot +Inf"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class ViewMetrics:
+    """Everything recorded for one view"""
+
+    def __init__(self):
+        self.requests = {}  # (method, status) -> count
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.db_duration = Histogram(DURATION_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+
+
+_views = {}
+_lock = threading.Lock()
+
+
+def record(view, method, status, duration, db_duration, queries, size):
+    with _lock:
+        metrics = _views.get(view)
+        if metrics is None:
+            metrics = _views[view] = ViewMetrics()
+        key = (method, status)
+        metrics.requests[key] = metrics.requests.get(key, 0) + 1
+        metrics.duration.observe(duration)
+        metrics.db_duration.observe(db_duration)
+        metrics.queries.observe(queries)
+        metrics.response_size.observe(size)
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+class QueryTimer:
+    """Database execute wrapper counting and timing the queries of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class async_execute_wrapper:
+    """
+    connection.execute_wrapper() for async requests: installed on the
+    connection of the thread their sync_to_async calls (and so their async
+    ORM queries) run in
+    """
+
+    def __init__(self, wrapper):
+        self.wrapper = wrapper
+
+    def _install(self):
+        connection.execute_wrappers.append(self.wrapper)
+
+    def _remove(self):
+        connection.execute_wrappers.remove(self.wrapper)
+
+    async def __aenter__(self):
+        await sync_to_async(self._install)()
+        return self.wrapper
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await sync_to_async(self._remove)()
+        return False
+
+
+class AsyncCapable:
+    """Middleware base running `__acall__` when the rest of the chain is async"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.call(request)
+
+
+def response_size(response):
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    if getattr(response, 'streaming', False):
+        return 0
+    return len(response.content)
+
+
+class MetricsMiddleware(AsyncCapable):
+    """Records request time, SQL time, query count and response bytes per view"""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def _record(self, request, response, duration, timer):
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        record(view, request.method, response.status_code, duration, timer.duration, timer.count, response_size(response))
+
+    def call(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, timer)
+        return response
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        async with async_execute_wrapper(timer):
+            response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started, timer)
+        return response
+
+
+class TracingMiddleware(AsyncCapable):
+    """Server-Timing breakdown and sampled slow-request trace log"""
+
+    def __init__(self, get_response):
+        if not settings.TRACING_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def _annotate(self, request, response, trace):
+        response['Server-Timing'] = trace.server_timing()
+        if tracing.should_log(trace):
+            tracing.log_request(trace, request, response)
+        return response
+
+    def call(self, request):
+        trace, token = tracing.start(top_sql=settings.TRACE_TOP_SQL)
+        try:
+            with connection.execute_wrapper(trace.record_sql):
+                response = self.get_response(request)
+        finally:
+            tracing.finish(trace, token)
+        return self._annotate(request, response, trace)
+
+    async def __acall__(self, request):
+        trace, token = tracing.start(top_sql=settings.TRACE_TOP_SQL)
+        try:
+            async with async_execute_wrapper(trace.record_sql):
+                response = await self.get_response(request)
+        finally:
+            tracing.finish(trace, token)
+        return self._annotate(request, response, trace)
+
+
+def _view_name(request):
+    match = request.resolver_match
+    return match.view_name if match else 'unmatched'
+
+
+class ProfilingMiddleware(AsyncCapable):
+    """Runs a request under a profiler when it carries a valid profile token"""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def call(self, request):
+        if not profiling.requested(request):
+            return self.get_response(request)
+
+        response, path = profiling.profile_call(lambda: self.get_response(request), lambda _: _view_name(request))
+        response['X-Profile'] = path.name
+        return response
+
+    async def __acall__(self, request):
+        if not profiling.requested(request):
+            return await self.get_response(request)
+
+        response, path = await profiling.aprofile_call(lambda: self.get_response(request), lambda _: _view_name(request))
+        response['X-Profile'] = path.name
+        return response
+
+
+#  PROMETHEUS EXPORT
+
+def _format(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name, view, histogram):
+    lines, cumulative = [], 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{view="{view}",le="{_format(bound)}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{view="{view}",le="+Inf"}} {histogram.count}')
+    lines.append(f'{name}_sum{{view="{view}"}} {_format(histogram.sum)}')
+    lines.append(f'{name}_count{{view="{view}"}} {histogram.count}')
+    return lines
+
+
+HISTOGRAMS = (
+    ('feedback_http_request_duration_seconds', 'duration', 'Time spent handling the request'),
+    ('feedback_db_duration_seconds', 'db_duration', 'Time spent in SQL per request'),
+    ('feedback_db_queries', 'queries', 'SQL queries per request'),
+    ('feedback_http_response_size_bytes', 'response_size', 'Response body size'),
+)
+
+
+def render_prometheus():
+    """All metrics in Prometheus text exposition format"""
+    with _lock:
+        snapshot = sorted(
+            (view, dict(metrics.requests), {attr: _copy(getattr(metrics, attr)) for _, attr, _ in HISTOGRAMS})
+            for view, metrics in _views.items()
+        )
+
+    lines = [
+        '# HELP feedback_http_requests_total Requests handled per view, method and status',
+        '# TYPE feedback_http_requests_total counter',
+    ]
+    for view, requests, _ in snapshot:
+        for (method, status), count in sorted(requests.items()):
+            lines.append(f'feedback_http_requests_total{{view="{view}",method="{method}",status="{status}"}} {count}')
+
+    for name, attr, help_text in HISTOGRAMS:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for view, _, histograms in snapshot:
+            lines.extend(_histogram_lines(name, view, histograms[attr]))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _copy(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts = list(histogram.counts)
+    copy.sum = histogram.sum
+    copy.count = histogram.count
+    return copy
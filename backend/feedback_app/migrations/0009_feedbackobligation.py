@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0008_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackObligation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_fulfilled', models.BooleanField(default=False)),
+                ('fulfilled_at', models.DateTimeField(blank=True, null=True)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedback_obligations', to='feedback_app.branch')),
+                ('division', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='feedback_obligations', to='feedback_app.division')),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='feedback_app.semester')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedback_obligations', to='feedback_app.student')),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedback_obligations', to='feedback_app.subject')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedback_obligations', to='feedback_app.teacher')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', 'is_fulfilled'], name='feedback_ap_student_75f167_idx'), models.Index(fields=['branch', 'semester', 'division', 'is_fulfilled'], name='feedback_ap_branch__a2eba5_idx'), models.Index(fields=['teacher', 'subject', 'is_fulfilled'], name='feedback_ap_teacher_43abd9_idx')],
+                'unique_together': {('student', 'teacher', 'subject', 'semester')},
+            },
+        ),
+    ]
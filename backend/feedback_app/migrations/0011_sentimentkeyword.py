@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0010_reportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SentimentKeyword',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(help_text='Matched case-insensitively on word boundaries', max_length=100, unique=True)),
+                ('weight', models.FloatField(default=1.0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['word'],
+            },
+        ),
+    ]
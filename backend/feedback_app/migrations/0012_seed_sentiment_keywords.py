@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:08
+
+from django.db import migrations
+
+# The hard-coded list analyze_sentiment used before the lexicon table
+KEYWORDS = [
+    'not', 'no', 'bad', 'poor', 'worst', 'terrible', 'awful',
+    'useless', 'waste', 'boring', 'confusing', 'difficult',
+    'never', 'late', 'absent', 'rude', 'unprofessional'
+]
+
+
+def seed_keywords(apps, schema_editor):
+    SentimentKeyword = apps.get_model('feedback_app', 'SentimentKeyword')
+    SentimentKeyword.objects.bulk_create(
+        [SentimentKeyword(word=word, weight=1.0) for word in KEYWORDS],
+        ignore_conflicts=True
+    )
+
+
+def remove_keywords(apps, schema_editor):
+    SentimentKeyword = apps.get_model('feedback_app', 'SentimentKeyword')
+    SentimentKeyword.objects.filter(word__in=KEYWORDS).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0011_sentimentkeyword'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_keywords, remove_keywords),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0012_seed_sentiment_keywords'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='feedback',
+            name='sentiment_version',
+            field=models.CharField(blank=True, default='', help_text='Analyzer that produced the sentiment above', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='shadow_comment_sentiment',
+            field=models.CharField(blank=True, choices=[('positive', 'Positive'), ('negative', 'Negative'), ('neutral', 'Neutral')], max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='shadow_comment_sentiment_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='shadow_sentiment_version',
+            field=models.CharField(blank=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='shadow_suggestion_sentiment',
+            field=models.CharField(blank=True, choices=[('positive', 'Positive'), ('negative', 'Negative'), ('neutral', 'Neutral')], max_length=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='feedback',
+            name='shadow_suggestion_sentiment_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0013_feedback_sentiment_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('level', models.CharField(choices=[('institution', 'Institution'), ('branch', 'Branch'), ('year', 'Year'), ('semester', 'Semester'), ('division', 'Division'), ('teacher', 'Teacher'), ('subject', 'Subject')], max_length=12)),
+                ('responses', models.IntegerField(default=0)),
+                ('sum_teaching_effectiveness', models.IntegerField(default=0)),
+                ('sum_course_content', models.IntegerField(default=0)),
+                ('sum_interaction_quality', models.IntegerField(default=0)),
+                ('sum_assignment_feedback', models.IntegerField(default=0)),
+                ('sum_overall_satisfaction', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('comments_positive', models.IntegerField(default=0)),
+                ('comments_neutral', models.IntegerField(default=0)),
+                ('comments_negative', models.IntegerField(default=0)),
+                ('suggestions_positive', models.IntegerField(default=0)),
+                ('suggestions_neutral', models.IntegerField(default=0)),
+                ('suggestions_negative', models.IntegerField(default=0)),
+                ('source_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='feedback',
+            index=models.Index(fields=['updated_at'], name='feedback_ap_updated_c4a286_idx'),
+        ),
+        migrations.AddField(
+            model_name='feedbackrollup',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feedback_app.branch'),
+        ),
+        migrations.AddField(
+            model_name='feedbackrollup',
+            name='division',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feedback_app.division'),
+        ),
+        migrations.AddField(
+            model_name='feedbackrollup',
+            name='semester',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feedback_app.semester'),
+        ),
+        migrations.AddField(
+            model_name='feedbackrollup',
+            name='subject',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feedback_app.subject'),
+        ),
+        migrations.AddField(
+            model_name='feedbackrollup',
+            name='teacher',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feedback_app.teacher'),
+        ),
+        migrations.AddField(
+            model_name='feedbackrollup',
+            name='year',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='feedback_app.year'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackrollup',
+            index=models.Index(fields=['level', 'branch', 'year', 'semester', 'division'], name='feedback_ap_level_95d46d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackrollup',
+            index=models.Index(fields=['level', 'teacher'], name='feedback_ap_level_5e4dd2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedbackrollup',
+            index=models.Index(fields=['level', 'source_updated_at'], name='feedback_ap_level_5ad943_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0014_feedbackrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semester',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, help_text='Set once the feedback for this semester is final', null=True),
+        ),
+    ]
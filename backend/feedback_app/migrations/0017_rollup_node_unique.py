@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.functions.comparison
+
+
+def clear_rollups(apps, schema_editor):
+    # Rollups are derived data and may hold duplicate nodes; the next refresh
+    # finds no watermark and rebuilds them all
+    apps.get_model('feedback_app', 'FeedbackRollup').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0016_submissioncounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleRollupCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marked_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RunPython(clear_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='feedbackrollup',
+            constraint=models.UniqueConstraint(models.F('level'), django.db.models.functions.comparison.Coalesce('branch_id', models.Value(0)), django.db.models.functions.comparison.Coalesce('year_id', models.Value(0)), django.db.models.functions.comparison.Coalesce('semester_id', models.Value(0)), django.db.models.functions.comparison.Coalesce('division_id', models.Value(0)), django.db.models.functions.comparison.Coalesce('teacher_id', models.Value(0)), django.db.models.functions.comparison.Coalesce('subject_id', models.Value(0)), name='unique_rollup_node'),
+        ),
+        migrations.AddField(
+            model_name='stalerollupcell',
+            name='semester',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='feedback_app.semester'),
+        ),
+        migrations.AddField(
+            model_name='stalerollupcell',
+            name='subject',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='feedback_app.subject'),
+        ),
+        migrations.AddField(
+            model_name='stalerollupcell',
+            name='teacher',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='feedback_app.teacher'),
+        ),
+    ]
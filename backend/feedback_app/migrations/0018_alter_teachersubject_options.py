@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 13:29
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feedback_app', '0017_rollup_node_unique'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='teachersubject',
+            options={'ordering': ['-assigned_date'], 'verbose_name': 'Teacher-Subject Assignment', 'verbose_name_plural': 'Teacher-Subject Assignments'},
+        ),
+    ]
@@ -1,8 +1,11 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 
 #  USER MODEL
 class CustomUser(AbstractUser):
@@ -59,6 +62,7 @@ class Semester(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(8)]
     )
     year = models.ForeignKey(Year, on_delete=models.CASCADE, related_name='semesters')
+    closed_at = models.DateTimeField(null=True, blank=True, help_text="Set once the feedback for this semester is final")
     
     class Meta:
         unique_together = ['number', 'year']
@@ -182,6 +186,14 @@ class Feedback(models.Model):
     
     suggestion_sentiment = models.CharField(max_length=10, choices=SENTIMENT_CHOICES, null=True, blank=True)
     suggestion_sentiment_score = models.FloatField(null=True, blank=True)
+    sentiment_version = models.CharField(max_length=40, blank=True, default='', help_text="Analyzer that produced the sentiment above")
+    
+    # A/B scoring by another analyzer version (rescore_sentiments --shadow); never shown to users
+    shadow_comment_sentiment = models.CharField(max_length=10, choices=SENTIMENT_CHOICES, null=True, blank=True)
+    shadow_comment_sentiment_score = models.FloatField(null=True, blank=True)
+    shadow_suggestion_sentiment = models.CharField(max_length=10, choices=SENTIMENT_CHOICES, null=True, blank=True)
+    shadow_suggestion_sentiment_score = models.FloatField(null=True, blank=True)
+    shadow_sentiment_version = models.CharField(max_length=40, blank=True, default='')
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -190,6 +202,9 @@ class Feedback(models.Model):
     class Meta:
         unique_together = ['student', 'teacher', 'subject', 'semester']
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         return f"Feedback by {self.student.prn_number} for {self.teacher.user.get_full_name()} - {self.subject.code}"
@@ -221,6 +236,216 @@ class FeedbackSummary(models.Model):
     def __str__(self):
         return f"Summary: {self.teacher.user.get_full_name()} - {self.subject.code} ({self.semester})"
 
+#  FEEDBACK OBLIGATION MODEL
+class FeedbackObligation(models.Model):
+    """Materialized (student, teacher, subject) feedback a student is expected to give"""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='feedback_obligations')
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='feedback_obligations')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='feedback_obligations')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+    # Denormalized class columns so class/branch/institution rollups stay on one indexed table
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='feedback_obligations')
+    division = models.ForeignKey(Division, on_delete=models.SET_NULL, null=True, blank=True, related_name='feedback_obligations')
+    
+    is_fulfilled = models.BooleanField(default=False)
+    fulfilled_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ['student', 'teacher', 'subject', 'semester']
+        indexes = [
+            models.Index(fields=['student', 'is_fulfilled']),
+            models.Index(fields=['branch', 'semester', 'division', 'is_fulfilled']),
+            models.Index(fields=['teacher', 'subject', 'is_fulfilled']),
+        ]
+    
+    def __str__(self):
+        status = 'done' if self.is_fulfilled else 'pending'
+        return f"{self.student.prn_number} -> {self.teacher.employee_id} ({self.subject.code}) [{status}]"
+
+#  IDEMPOTENCY KEY MODEL
+class IdempotencyKey(models.Model):
+    """Stored response for a client-supplied Idempotency-Key, replayed on retries"""
+    key = models.CharField(max_length=255)
+    username = models.CharField(max_length=150)
+    endpoint = models.CharField(max_length=100)
+    response_status = models.IntegerField()
+    response_body = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ['key', 'username', 'endpoint']
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key} ({self.username})"
+
+#  REPORT JOB MODEL
+class ReportJob(models.Model):
+    """Background report generation job and its cached artifact"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    kind = models.CharField(max_length=30)
+    scope = models.CharField(max_length=50, help_text="Report scope, e.g. class teacher id or 'all'")
+    data_version = models.CharField(max_length=40, help_text="Fingerprint of the data the report was built from")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    file_path = models.CharField(max_length=500, blank=True)
+    size_bytes = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        unique_together = ['kind', 'scope', 'data_version']
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.kind} [{self.scope}] {self.status}"
+
+#  SENTIMENT KEYWORD MODEL
+class SentimentKeyword(models.Model):
+    """Word or phrase that marks a comment as negative, weighted against SENTIMENT_KEYWORD_THRESHOLD"""
+    word = models.CharField(max_length=100, unique=True, help_text="Matched case-insensitively on word boundaries")
+    weight = models.FloatField(default=1.0)
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['word']
+    
+    def save(self, *args, **kwargs):
+        self.word = ' '.join(self.word.lower().split())
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.word} ({self.weight})"
+
+#  FEEDBACK ROLLUP MODEL
+class FeedbackRollup(models.Model):
+    """
+    Additive feedback aggregates for one node of the institution > branch > year >
+    semester > division > teacher > subject hierarchy (maintained by feedback_app.rollups)
+    """
+    INSTITUTION = 'institution'
+    BRANCH = 'branch'
+    YEAR = 'year'
+    SEMESTER = 'semester'
+    DIVISION = 'division'
+    TEACHER = 'teacher'
+    SUBJECT = 'subject'
+    LEVEL_CHOICES = [
+        (INSTITUTION, 'Institution'),
+        (BRANCH, 'Branch'),
+        (YEAR, 'Year'),
+        (SEMESTER, 'Semester'),
+        (DIVISION, 'Division'),
+        (TEACHER, 'Teacher'),
+        (SUBJECT, 'Subject'),
+    ]
+    
+    level = models.CharField(max_length=12, choices=LEVEL_CHOICES)
+    # Keys down to the level; deeper ones are NULL (division is also NULL for students without one)
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    year = models.ForeignKey(Year, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    division = models.ForeignKey(Division, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    
+    responses = models.IntegerField(default=0)
+    # Sums rather than averages so parents are sums of their children
+    sum_teaching_effectiveness = models.IntegerField(default=0)
+    sum_course_content = models.IntegerField(default=0)
+    sum_interaction_quality = models.IntegerField(default=0)
+    sum_assignment_feedback = models.IntegerField(default=0)
+    sum_overall_satisfaction = models.IntegerField(default=0)
+    # Histogram of overall_satisfaction
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    
+    comments_positive = models.IntegerField(default=0)
+    comments_neutral = models.IntegerField(default=0)
+    comments_negative = models.IntegerField(default=0)
+    suggestions_positive = models.IntegerField(default=0)
+    suggestions_neutral = models.IntegerField(default=0)
+    suggestions_negative = models.IntegerField(default=0)
+    
+    # Latest Feedback.updated_at included; the subject-level maximum is the refresh watermark
+    source_updated_at = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['level', 'branch', 'year', 'semester', 'division']),
+            models.Index(fields=['level', 'teacher']),
+            models.Index(fields=['level', 'source_updated_at']),
+        ]
+        constraints = [
+            # One row per node; keys below the level (and a missing division) are NULL, which
+            # a plain unique constraint would treat as distinct
+            models.UniqueConstraint(
+                'level', *[Coalesce(key, Value(0)) for key in (
+                    'branch_id', 'year_id', 'semester_id', 'division_id', 'teacher_id', 'subject_id'
+                )],
+                name='unique_rollup_node',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.level} rollup ({self.responses} responses)"
+
+class StaleRollupCell(models.Model):
+    """
+    Subject cells whose feedback was deleted since the last rollup refresh. Deletes
+    leave no updated_at behind, so the next refresh recomputes these cells explicitly.
+    """
+    # No database constraints: the marks outlive the rows they point at
+    semester = models.ForeignKey(Semester, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    teacher = models.ForeignKey(Teacher, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    subject = models.ForeignKey(Subject, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    marked_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Stale rollup cell (semester {self.semester_id}, teacher {self.teacher_id}, subject {self.subject_id})"
+
+#  SUBMISSION COUNTER MODEL
+class SubmissionCounter(models.Model):
+    """Feedback submitted per class in one minute or hour bucket (appended per flush, compacted, summed on read)"""
+    MINUTE = 'minute'
+    HOUR = 'hour'
+    RESOLUTION_CHOICES = [
+        (MINUTE, 'Minute'),
+        (HOUR, 'Hour'),
+    ]
+    
+    resolution = models.CharField(max_length=6, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name='+')
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE, related_name='+')
+    division = models.ForeignKey(Division, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['resolution', 'bucket_start']),
+        ]
+    
+    def __str__(self):
+        return f"{self.resolution} {self.bucket_start:%Y-%m-%d %H:%M}: {self.count}"
+
 #  SIGNAL — AUTO CLASS TEACHER ASSIGNMENT
 
 @receiver(pre_save, sender=Student)
@@ -241,3 +466,83 @@ def auto_assign_class_teacher(sender, instance, **kwargs):
             instance.class_teacher = teacher
         except Teacher.DoesNotExist:
             pass  # No teacher found for this combination
+
+
+#  SIGNALS — FEEDBACK OBLIGATION SYNC
+
+@receiver(post_save, sender=Student)
+def sync_student_obligations(sender, instance, **kwargs):
+    """Regenerate a student's expected feedback when enrollment changes"""
+    from .obligations import sync_student
+    sync_student(instance)
+
+@receiver(post_save, sender=Subject)
+def sync_subject_obligations(sender, instance, **kwargs):
+    """Regenerate expected feedback when a subject moves class or division"""
+    from .obligations import sync_subject
+    sync_subject(instance)
+
+@receiver(post_save, sender=TeacherSubject)
+@receiver(post_delete, sender=TeacherSubject)
+def sync_assignment_obligations(sender, instance, **kwargs):
+    """Regenerate expected feedback when a teacher-subject assignment changes"""
+    from .obligations import sync_subject
+    try:
+        subject = Subject.objects.get(id=instance.subject_id)
+    except Subject.DoesNotExist:
+        return  # Subject itself is being deleted; obligations cascade
+    sync_subject(subject)
+
+@receiver(post_save, sender=Feedback)
+def fulfill_obligation(sender, instance, created, **kwargs):
+    """Mark the matching obligation as fulfilled on feedback insert"""
+    if created:
+        from .obligations import mark_fulfilled
+        mark_fulfilled(instance)
+
+@receiver(post_save, sender=Feedback)
+def count_submission(sender, instance, created, **kwargs):
+    """Add a feedback insert to this process's submission-rate buffer once it commits"""
+    if created:
+        from .rates import record
+        student = instance.student
+        cell = (student.branch_id, instance.semester_id, student.division_id)
+        transaction.on_commit(lambda: record(cell, instance.created_at))
+
+@receiver(post_save, sender=Feedback)
+def announce_submission(sender, instance, created, **kwargs):
+    """Push completion updates to the class's live dashboards once the insert commits"""
+    if created:
+        from .events import class_key, feedback_committed
+        student = instance.student
+        key = class_key(student.branch_id, instance.semester_id, student.division_id)
+        transaction.on_commit(lambda: feedback_committed(key, instance.student_id))
+
+@receiver(post_delete, sender=Feedback)
+def unfulfill_obligation(sender, instance, **kwargs):
+    """Reopen the matching obligation when its feedback is deleted"""
+    from .obligations import mark_unfulfilled
+    mark_unfulfilled(instance)
+
+@receiver(post_delete, sender=Feedback)
+def drop_teacher_ranking(sender, instance, **kwargs):
+    """Deletes leave the ranking's feedback version unchanged; drop this process's cache"""
+    from .ranking import invalidate
+    transaction.on_commit(invalidate)
+
+@receiver(post_delete, sender=Feedback)
+def mark_rollup_stale(sender, instance, **kwargs):
+    """Have the next rollup refresh recompute the deleted feedback's cell"""
+    StaleRollupCell.objects.create(
+        semester_id=instance.semester_id, teacher_id=instance.teacher_id, subject_id=instance.subject_id
+    )
+
+
+#  SIGNALS — SENTIMENT KEYWORD LEXICON
+
+@receiver(post_save, sender=SentimentKeyword)
+@receiver(post_delete, sender=SentimentKeyword)
+def rebuild_keyword_matcher(sender, instance, **kwargs):
+    """Drop this process's compiled keyword matcher; other workers notice the new version"""
+    from .sentiment import invalidate_keywords
+    transaction.on_commit(invalidate_keywords)
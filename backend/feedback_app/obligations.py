@@ -0,0 +1,210 @@
+# feedback_app/obligations.py
+
+"""
+Materialized feedback obligations.
+
+A student is expected to give feedback for every (teacher, subject) pair
+assigned through TeacherSubject for the subjects of their class (branch and
+semester, plus subjects specific to their division). The FeedbackObligation
+table is regenerated whenever enrollments or assignments change and flagged
+on feedback insert, so completion tracking becomes aggregate queries over a
+single indexed table instead of per-request rebuilds.
+
+Regeneration only touches obligations of each student's current semester
+(CURRENT). Rows of earlier semesters are completion history: they are kept,
+and every completion count excludes them.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Student, Subject, TeacherSubject, Feedback, FeedbackObligation
+
+# Obligations of the student's current semester (the rest is history)
+CURRENT = Q(semester_id=F('student__semester_id'))
+
+
+def class_subjects(branch_id, semester_id, division_id):
+    """Subjects taught to a class: common subjects plus division-specific ones"""
+    return Subject.objects.filter(
+        branch_id=branch_id,
+        semester_id=semester_id
+    ).filter(
+        Q(division_id=division_id) | Q(division__isnull=True)
+    )
+
+
+def class_students(teacher):
+    """Students of a class teacher: explicitly assigned, or unassigned but matching the class"""
+    scope = Q(class_teacher=teacher)
+
+    # Students without a class_teacher assignment fall back to year/branch/semester/division
+    if teacher.assigned_class_year_id:
+        scope |= Q(
+            class_teacher__isnull=True,
+            year_id=teacher.assigned_class_year_id,
+            branch_id=teacher.assigned_class_branch_id,
+            semester_id=teacher.assigned_class_semester_id,
+            division_id=teacher.assigned_class_division_id
+        )
+
+    return Student.objects.filter(scope).select_related('user', 'year', 'branch', 'semester', 'division')
+
+
+def _apply(scope, expected, students):
+    """
+    Make the obligations matching `scope` equal to the `expected` set of
+    (student_id, teacher_id, subject_id, semester_id) keys.
+    """
+    existing = {
+        (ob['student_id'], ob['teacher_id'], ob['subject_id'], ob['semester_id']): ob['id']
+        for ob in FeedbackObligation.objects.filter(scope).values(
+            'id', 'student_id', 'teacher_id', 'subject_id', 'semester_id'
+        )
+    }
+
+    stale_ids = [ob_id for key, ob_id in existing.items() if key not in expected]
+    if stale_ids:
+        FeedbackObligation.objects.filter(id__in=stale_ids).delete()
+
+    missing = expected - existing.keys()
+    if not missing:
+        return
+
+    student_ids = {key[0] for key in missing}
+    given = {
+        (fb['student_id'], fb['teacher_id'], fb['subject_id'], fb['semester_id']): fb['created_at']
+        for fb in Feedback.objects.filter(student_id__in=student_ids).values(
+            'student_id', 'teacher_id', 'subject_id', 'semester_id', 'created_at'
+        )
+    }
+    class_of = {s.id: (s.branch_id, s.division_id) for s in students}
+
+    FeedbackObligation.objects.bulk_create([
+        FeedbackObligation(
+            student_id=student_id,
+            teacher_id=teacher_id,
+            subject_id=subject_id,
+            semester_id=semester_id,
+            branch_id=class_of[student_id][0],
+            division_id=class_of[student_id][1],
+            is_fulfilled=(student_id, teacher_id, subject_id, semester_id) in given,
+            fulfilled_at=given.get((student_id, teacher_id, subject_id, semester_id))
+        )
+        for student_id, teacher_id, subject_id, semester_id in missing
+    ], ignore_conflicts=True)
+
+
+@transaction.atomic
+def sync_student(student):
+    """
+    Regenerate the obligations of one student's current semester from their
+    class. Obligations of earlier semesters are completion history and are
+    left untouched.
+    """
+    expected = set()
+    if student.branch_id and student.semester_id:
+        assignments = TeacherSubject.objects.filter(
+            subject__in=class_subjects(student.branch_id, student.semester_id, student.division_id)
+        ).values_list('teacher_id', 'subject_id')
+        expected = {
+            (student.id, teacher_id, subject_id, student.semester_id)
+            for teacher_id, subject_id in assignments
+        }
+
+    current = Q(student=student, semester_id=student.semester_id)
+
+    # Keep denormalized class columns in step with enrollment changes
+    FeedbackObligation.objects.filter(current).exclude(
+        branch_id=student.branch_id, division_id=student.division_id
+    ).update(branch_id=student.branch_id, division_id=student.division_id)
+
+    _apply(current, expected, [student])
+
+
+@transaction.atomic
+def sync_subject(subject):
+    """
+    Regenerate the current-semester obligations of one subject from its
+    current assignments. Promoted students' obligations for it are history and
+    are left untouched.
+    """
+    students = Student.objects.filter(branch_id=subject.branch_id, semester_id=subject.semester_id)
+    if subject.division_id:
+        students = students.filter(division_id=subject.division_id)
+    students = list(students.only('id', 'branch_id', 'semester_id', 'division_id'))
+
+    teacher_ids = list(TeacherSubject.objects.filter(subject=subject).values_list('teacher_id', flat=True))
+    expected = {
+        (student.id, teacher_id, subject.id, student.semester_id)
+        for student in students
+        for teacher_id in teacher_ids
+    }
+
+    _apply(Q(subject=subject) & CURRENT, expected, students)
+
+
+def rebuild_all():
+    """Regenerate every current-semester obligation (backfill after bulk imports)"""
+    for subject in Subject.objects.all().iterator():
+        sync_subject(subject)
+    FeedbackObligation.objects.exclude(subject__in=Subject.objects.all()).delete()
+
+
+def mark_fulfilled(feedback):
+    """Flag the obligation matching a newly inserted feedback"""
+    FeedbackObligation.objects.filter(
+        student_id=feedback.student_id,
+        teacher_id=feedback.teacher_id,
+        subject_id=feedback.subject_id,
+        semester_id=feedback.semester_id
+    ).update(is_fulfilled=True, fulfilled_at=feedback.created_at)
+
+
+def mark_unfulfilled(feedback):
+    """Reopen the obligation matching a deleted feedback"""
+    FeedbackObligation.objects.filter(
+        student_id=feedback.student_id,
+        teacher_id=feedback.teacher_id,
+        subject_id=feedback.subject_id,
+        semester_id=feedback.semester_id
+    ).update(is_fulfilled=False, fulfilled_at=None)
+
+
+#  AGGREGATES
+
+def scoped(branch_id=None, semester_id=None, division_id=None):
+    """Current obligations for a class, branch or (with no arguments) the whole institution"""
+    obligations = FeedbackObligation.objects.filter(CURRENT)
+    if branch_id:
+        obligations = obligations.filter(branch_id=branch_id)
+    if semester_id:
+        obligations = obligations.filter(semester_id=semester_id)
+    if division_id:
+        obligations = obligations.filter(division_id=division_id)
+    return obligations
+
+
+def completion_stats(obligations):
+    """Expected/received counts, fully complete students and percentage in one query"""
+    stats = obligations.aggregate(
+        expected=Count('id'),
+        fulfilled=Count('id', filter=Q(is_fulfilled=True)),
+        students=Count('student', distinct=True),
+        students_started=Count('student', distinct=True, filter=Q(is_fulfilled=True)),
+        students_pending=Count('student', distinct=True, filter=Q(is_fulfilled=False)),
+    )
+    stats['pending'] = stats['expected'] - stats['fulfilled']
+    stats['students_complete'] = stats['students'] - stats['students_pending']
+    stats['completion_rate'] = round(
+        stats['fulfilled'] / stats['expected'] * 100, 2
+    ) if stats['expected'] else 0
+    return stats
+
+
+def completion_by(obligations, *fields):
+    """Completion counts grouped by the given obligation fields"""
+    return obligations.values(*fields).annotate(
+        expected=Count('id'),
+        fulfilled=Count('id', filter=Q(is_fulfilled=True)),
+    ).order_by(*fields)
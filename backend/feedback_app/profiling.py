@@ -0,0 +1,167 @@
+# feedback_app/profiling.py
+
+"""
+On-demand profiling of single requests.
+
+An admin issues a signed, time-limited token (`manage.py profiles token`)
+and sends it in the X-Profile-Token header or the `_profile` query
+parameter. ProfilingMiddleware then runs that one request under
+pyinstrument when installed (sampling, written as collapsed stacks for
+flame graphs) or cProfile (written as a .prof file for pstats/snakeviz).
+Captures are named after the view and timestamp in PROFILE_DIR.
+"""
+
+import cProfile
+import os
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'feedback_app.profiling'
+HEADER = 'X-Profile-Token'
+QUERY_PARAM = '_profile'
+EXTENSIONS = ('.prof', '.collapsed')
+
+
+def issue_token(issued_to='admin'):
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(issued_to)
+
+
+def token_is_valid(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:  # includes SignatureExpired
+        return False
+    return True
+
+
+def requested(request):
+    token = request.headers.get(HEADER) or request.GET.get(QUERY_PARAM)
+    return bool(token) and token_is_valid(token)
+
+
+def backend():
+    """'pyinstrument' if selected/installed, otherwise 'cprofile'"""
+    choice = settings.PROFILER
+    if choice in ('auto', 'pyinstrument'):
+        try:
+            import pyinstrument  # noqa: F401
+            return 'pyinstrument'
+        except ImportError:
+            pass
+    return 'cprofile'
+
+
+def _capture_path(view_name, extension):
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    safe_view = ''.join(c if c.isalnum() or c in '-_' else '_' for c in view_name)
+    return directory / f'{safe_view}_{stamp}{extension}'
+
+
+#  COLLAPSED STACKS
+
+def _collapse(frame, prefix, lines):
+    label = f'{frame.function} ({frame.file_path_short}:{frame.line_no})'
+    path = f'{prefix};{label}' if prefix else label
+    # pyinstrument's synthetic "[self]"/"[await]" leaves fold into their parent
+    children = [child for child in frame.children if not child.is_synthetic]
+    self_time = frame.time - sum(child.time for child in children)
+    if self_time > 0:
+        lines.append(f'{path} {max(1, round(self_time * 1_000_000))}')
+    for child in children:
+        _collapse(child, path, lines)
+
+
+def collapsed_stacks(root_frame):
+    """pyinstrument frame tree as `frame;frame;frame microseconds` lines"""
+    lines = []
+    if root_frame is not None:
+        _collapse(root_frame, '', lines)
+    return '\n'.join(lines) + '\n'
+
+
+#  CAPTURE
+
+def _start():
+    """(backend, running profiler)"""
+    if backend() == 'pyinstrument':
+        from pyinstrument import Profiler
+
+        profiler = Profiler(interval=settings.PROFILE_INTERVAL)
+        profiler.start()
+        return 'pyinstrument', profiler
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return 'cprofile', profiler
+
+
+def _stop(kind, profiler):
+    if kind == 'pyinstrument':
+        profiler.stop()
+    else:
+        profiler.disable()
+
+
+def _save(kind, profiler, view_name):
+    if kind == 'pyinstrument':
+        path = _capture_path(view_name, '.collapsed')
+        path.write_text(collapsed_stacks(profiler.last_session.root_frame()))
+    else:
+        path = _capture_path(view_name, '.prof')
+        profiler.dump_stats(str(path))
+    return path
+
+
+def profile_call(func, view_name_of):
+    """
+    Run `func()` under the configured profiler and write the capture.
+    `view_name_of(result)` names the file once the result is known.
+    Returns (result, capture path).
+    """
+    kind, profiler = _start()
+    try:
+        result = func()
+    finally:
+        _stop(kind, profiler)
+    return result, _save(kind, profiler, view_name_of(result))
+
+
+async def aprofile_call(func, view_name_of):
+    """
+    profile_call for an async request: awaits `func()` with the profiler
+    running on the event loop thread. ORM work an async view hands to
+    sync_to_async runs in another thread and shows up only as awaiting.
+    """
+    kind, profiler = _start()
+    try:
+        result = await func()
+    finally:
+        _stop(kind, profiler)
+    return result, _save(kind, profiler, view_name_of(result))
+
+
+#  CAPTURES
+
+def list_captures():
+    """Captured profiles, newest first"""
+    directory = Path(settings.PROFILE_DIR)
+    if not directory.is_dir():
+        return []
+    captures = [path for path in directory.iterdir() if path.suffix in EXTENSIONS]
+    return sorted(captures, key=os.path.getmtime, reverse=True)
+
+
+def top_stacks(path, limit=20):
+    """Heaviest leaf frames of a collapsed-stack capture: [(microseconds, frame)]"""
+    totals = {}
+    for line in Path(path).read_text().splitlines():
+        stack, _, count = line.rpartition(' ')
+        if stack:
+            leaf = stack.rsplit(';', 1)[-1]
+            totals[leaf] = totals.get(leaf, 0) + int(count)
+    return sorted(((count, frame) for frame, count in totals.items()), reverse=True)[:limit]
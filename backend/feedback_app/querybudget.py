@@ -0,0 +1,107 @@
+# feedback_app/querybudget.py
+
+"""
+Query budgets and N+1 detection.
+
+`@query_budget(n)` on a view (or a report builder) counts the SQL statements of each call and
+groups them by their sqlstats fingerprint. Running more than `n` statements,
+or the same statement shape QUERY_BUDGET_REPEAT_THRESHOLD times or more (a
+query inside a loop), is a violation. Violations are logged as warnings in
+production and raised as QueryBudgetExceeded when QUERY_BUDGET_STRICT is on,
+as it is in the test suite. `assert_query_budget` applies the same check to
+a block of test code.
+"""
+
+import functools
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+from .sqlstats import caller, fingerprint, normalize
+
+logger = logging.getLogger('feedback_app.querybudget')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget:
+    """Execute wrapper and context manager checking one block against a budget"""
+
+    def __init__(self, max_queries=None, name='block', repeat_threshold=None, strict=None):
+        self.max_queries = max_queries
+        self.name = name
+        self.repeat_threshold = repeat_threshold or settings.QUERY_BUDGET_REPEAT_THRESHOLD
+        self.strict = settings.QUERY_BUDGET_STRICT if strict is None else strict
+        self.count = 0
+        self.shapes = {}  # fingerprint -> [count, sql, caller of the first repeat]
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        key = fingerprint(sql)
+        shape = self.shapes.get(key)
+        if shape is None:
+            self.shapes[key] = [1, sql, None]
+        else:
+            shape[0] += 1
+            if shape[2] is None:
+                # Only repeated statements pay for the stack walk
+                shape[2] = caller()
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._wrapper.__exit__(exc_type, exc_value, tb)
+        if exc_type is None:
+            self.check()
+        return False
+
+    def repeated(self):
+        """(count, normalized sql, caller) for statement shapes run in a loop"""
+        return sorted(
+            ((count, normalize(sql), where) for count, sql, where in self.shapes.values()
+             if count >= self.repeat_threshold),
+            key=lambda item: item[0], reverse=True
+        )
+
+    def violations(self):
+        problems = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            problems.append(f'{self.name}: {self.count} queries, budget is {self.max_queries}')
+        for count, sql, where in self.repeated():
+            problems.append(f'{self.name}: N+1 at {where or "unknown"}, same query {count} times: {sql[:300]}')
+        return problems
+
+    def check(self):
+        problems = self.violations()
+        if not problems:
+            return
+        if self.strict:
+            raise QueryBudgetExceeded('\n'.join(problems))
+        for problem in problems:
+            logger.warning(problem)
+
+
+def query_budget(max_queries, repeat_threshold=None):
+    """Decorator enforcing a query budget per call of a view (or report builder)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapped(*args, **kwargs):
+            if not settings.QUERY_BUDGET_ENABLED:
+                return func(*args, **kwargs)
+            with QueryBudget(max_queries, name=func.__name__, repeat_threshold=repeat_threshold):
+                return func(*args, **kwargs)
+        wrapped.query_budget = max_queries
+        return wrapped
+    return decorator
+
+
+def assert_query_budget(max_queries=None, repeat_threshold=None):
+    """Test helper: `with assert_query_budget(5): ...` fails on overruns and N+1 loops"""
+    return QueryBudget(max_queries, name='assert_query_budget', repeat_threshold=repeat_threshold, strict=True)
@@ -0,0 +1,162 @@
+# feedback_app/ranking.py
+
+"""
+Teacher ranking by overall_satisfaction with Bayesian averages.
+
+A raw mean lets a teacher with three 5-star responses outrank one with three
+hundred responses averaging 4.8. Each teacher's mean is shrunk toward the
+mean of everybody in scope instead:
+
+    score = (C * prior_mean + sum of ratings) / (C + responses)
+
+C is RANKING_PRIOR_WEIGHT, or the median response count when unset. A teacher
+needs about C responses before their own ratings outweigh the prior.
+
+Per-teacher rating counts come from one grouped query. Scores, ranks and
+percentiles (institution-wide and within the teacher's department) are
+computed with NumPy over the whole table at once. A ranking is cached per
+process and per semester scope and only recomputed after feedback changes.
+The cache key is the newest Feedback id and updated_at, read with two index
+lookups in one query, so a cache hit costs the same however much feedback
+there is. Deletes move neither, so a post_delete signal invalidates this
+process's cache instead. NumPy is imported on first use.
+"""
+
+import threading
+
+from django.conf import settings
+from django.db.models import Count, Subquery
+
+from .models import Feedback
+
+_np = None
+_cache = {}  # semester_id -> Ranking
+_cache_lock = threading.Lock()
+
+
+def _numpy():
+    global _np
+    if _np is None:
+        import numpy
+        _np = numpy
+    return _np
+
+
+def _percentiles(np, scores):
+    """Share of `scores` strictly below each score, 0-100"""
+    ordered = np.sort(scores)
+    return np.searchsorted(ordered, scores, side='left') * 100.0 / len(scores)
+
+
+def _ranks(np, scores):
+    """1 for the highest score; ties share the better rank"""
+    higher = len(scores) - np.searchsorted(np.sort(scores), scores, side='right')
+    return higher + 1
+
+
+class Ranking:
+    """Ranked teachers of one scope as parallel NumPy arrays, best first"""
+
+    def __init__(self, version, teacher_ids, branch_ids, counts, prior_weight=None):
+        np = _numpy()
+        self.version = version
+        counts = np.asarray(counts, dtype=np.float64).reshape(-1, 5)  # teachers x ratings 1..5
+        responses = counts.sum(axis=1)
+        sums = counts @ np.arange(1, 6)
+
+        total = responses.sum()
+        self.prior_mean = float(sums.sum() / total) if total else 0.0
+        if prior_weight is None:
+            prior_weight = float(np.median(responses)) if len(responses) else 0.0
+        self.prior_weight = prior_weight
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(responses > 0, sums / responses, 0.0)
+            score = (prior_weight * self.prior_mean + sums) / (prior_weight + responses)
+
+        order = np.lexsort((-responses, -score))  # by score, then by evidence
+        self.teacher_ids = np.asarray(teacher_ids, dtype=np.int64)[order]
+        self.branch_ids = np.asarray([-1 if b is None else b for b in branch_ids], dtype=np.int64)[order]
+        self.responses = responses[order].astype(np.int64)
+        self.mean = mean[order]
+        self.score = score[order]
+        self.distribution = counts[order].astype(np.int64)
+
+        self.rank = _ranks(np, self.score) if len(order) else np.zeros(0, dtype=np.int64)
+        self.percentile = _percentiles(np, self.score) if len(order) else np.zeros(0)
+        self.branch_rank = np.zeros(len(order), dtype=np.int64)
+        self.branch_percentile = np.zeros(len(order))
+        for branch in np.unique(self.branch_ids):
+            mask = self.branch_ids == branch
+            self.branch_rank[mask] = _ranks(np, self.score[mask])
+            self.branch_percentile[mask] = _percentiles(np, self.score[mask])
+
+    def __len__(self):
+        return len(self.teacher_ids)
+
+    def select(self, branch_id=None, min_responses=0):
+        """Positions (best first) of the teachers matching the filters"""
+        np = _numpy()
+        mask = self.responses >= min_responses
+        if branch_id is not None:
+            mask &= self.branch_ids == branch_id
+        return np.flatnonzero(mask)
+
+    def rows(self, positions):
+        return [{
+            'teacher_id': int(self.teacher_ids[i]),
+            'department_id': None if self.branch_ids[i] == -1 else int(self.branch_ids[i]),
+            'responses': int(self.responses[i]),
+            'mean': round(float(self.mean[i]), 3),
+            'bayesian_score': round(float(self.score[i]), 3),
+            'rank': int(self.rank[i]),
+            'percentile': round(float(self.percentile[i]), 1),
+            'department_rank': int(self.branch_rank[i]),
+            'department_percentile': round(float(self.branch_percentile[i]), 1),
+            'rating_distribution': {str(r + 1): int(n) for r, n in enumerate(self.distribution[i])},
+        } for i in positions]
+
+
+def build_ranking(semester_id=None, version=None):
+    """Rank every teacher with feedback (in one semester when given) from one grouped query"""
+    feedback = Feedback.objects.all()
+    if semester_id is not None:
+        feedback = feedback.filter(semester_id=semester_id)
+    grouped = feedback.values_list('teacher_id', 'teacher__department_id', 'overall_satisfaction').annotate(
+        n=Count('id')
+    ).order_by()
+
+    index, teacher_ids, branch_ids, counts = {}, [], [], []
+    for teacher_id, branch_id, rating, n in grouped:
+        row = index.get(teacher_id)
+        if row is None:
+            row = index[teacher_id] = len(teacher_ids)
+            teacher_ids.append(teacher_id)
+            branch_ids.append(branch_id)
+            counts.append([0] * 5)
+        counts[row][rating - 1] += n
+
+    return Ranking(version, teacher_ids, branch_ids, counts, settings.RANKING_PRIOR_WEIGHT)
+
+
+def feedback_version():
+    """(newest id, newest updated_at) of Feedback: inserts and updates move it"""
+    latest_update = Feedback.objects.order_by('-updated_at').values('updated_at')[:1]
+    return Feedback.objects.order_by('-id').values_list('id', Subquery(latest_update)).first()
+
+
+def get_ranking(semester_id=None):
+    """Cached ranking for the scope, rebuilt when the feedback version changes"""
+    version = (feedback_version(), settings.RANKING_PRIOR_WEIGHT)
+    ranking = _cache.get(semester_id)
+    if ranking is not None and ranking.version == version:
+        return ranking
+    ranking = build_ranking(semester_id, version)
+    with _cache_lock:
+        _cache[semester_id] = ranking
+    return ranking
+
+
+def invalidate():
+    with _cache_lock:
+        _cache.clear()
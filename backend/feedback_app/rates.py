@@ -0,0 +1,214 @@
+# feedback_app/rates.py
+
+"""
+Submission-rate counters for live feedback drives.
+
+Every committed feedback insert adds one to this process's per-minute and
+per-hour ring buffers for its class (branch, semester, division). Buckets
+follow the wall clock of TIME_ZONE, so an hour bucket is a local hour even
+where the zone is not a whole number of hours off UTC. The next submission or
+rate read after SUBMISSION_RATE_FLUSH_SECONDS flushes the rings into
+SubmissionCounter with a single bulk INSERT. Flushes only append rows and
+reads sum them, so workers never contend for a counter row. Rate curves and
+the projected completion time are read from that small table plus the
+obligation counts; Feedback.created_at is never scanned.
+
+There is no background flush. A worker that goes quiet keeps its last counts
+in memory until its next submission or rate read, and they are lost if it
+dies first. That is acceptable for a progress indicator.
+
+About once an hour a flush also tidies the table. It compacts the buckets
+closed in the last COMPACT_HOURS hours to one row per (bucket, class), so
+hour rows grow with the hours and classes that saw submissions rather than
+with every flush of every worker. It also prunes minute rows older than
+SUBMISSION_RATE_MINUTE_RETENTION hours.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import SubmissionCounter
+from .obligations import completion_stats, scoped
+
+WIDTHS = {SubmissionCounter.MINUTE: 60, SubmissionCounter.HOUR: 3600}
+COMPACT_HOURS = 2  # buckets this recent are compacted; the hourly prune keeps up with them
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def bucket_of(when, width):
+    """Number of the `width`-second bucket holding `when`, counted in local wall-clock time"""
+    local = timezone.localtime(when).replace(tzinfo=None)
+    return int((local - _EPOCH).total_seconds()) // width
+
+
+def bucket_start(bucket, width):
+    """Aware start of bucket number `bucket`"""
+    return timezone.make_aware(_EPOCH + timedelta(seconds=bucket * width))
+
+
+class RateRing:
+    """Per-cell counts for the latest `slots` buckets of `width` seconds"""
+
+    def __init__(self, width, slots):
+        self.width = width
+        self.slots = slots
+        self.buckets = [None] * slots  # bucket number held by each slot
+        self.counts = [{} for _ in range(slots)]
+
+    def add(self, cell, when, n=1):
+        bucket = bucket_of(when, self.width)
+        slot = bucket % self.slots
+        if self.buckets[slot] != bucket:
+            # Overwrites a bucket older than the ring; flushing keeps far ahead of that
+            self.buckets[slot] = bucket
+            self.counts[slot] = {}
+        self.counts[slot][cell] = self.counts[slot].get(cell, 0) + n
+
+    def drain(self):
+        """[(bucket start, cell, count)] of everything held, emptying the ring"""
+        held = []
+        for slot, bucket in enumerate(self.buckets):
+            if bucket is None:
+                continue
+            start = bucket_start(bucket, self.width)
+            held.extend((start, cell, n) for cell, n in self.counts[slot].items())
+            self.buckets[slot] = None
+            self.counts[slot] = {}
+        return held
+
+
+_rings = {
+    SubmissionCounter.MINUTE: RateRing(WIDTHS[SubmissionCounter.MINUTE], 120),
+    SubmissionCounter.HOUR: RateRing(WIDTHS[SubmissionCounter.HOUR], 48),
+}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+_last_prune = None  # the first flush of a process prunes
+
+
+def record(cell, when):
+    """Count one submission for `cell` = (branch_id, semester_id, division_id)"""
+    with _lock:
+        for ring in _rings.values():
+            ring.add(cell, when)
+        due = time.monotonic() - _last_flush >= settings.SUBMISSION_RATE_FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def flush():
+    """Write this process's buffered counts; returns the number of counter rows inserted"""
+    global _last_flush, _last_prune
+    with _lock:
+        pending = [
+            SubmissionCounter(
+                resolution=resolution, bucket_start=start, count=n,
+                branch_id=cell[0], semester_id=cell[1], division_id=cell[2]
+            )
+            for resolution, ring in _rings.items() for start, cell, n in ring.drain()
+        ]
+        _last_flush = now = time.monotonic()
+        prune = _last_prune is None or now - _last_prune >= 3600
+        if prune:
+            _last_prune = now
+
+    if pending:
+        SubmissionCounter.objects.bulk_create(pending)
+    if prune:
+        compact(timezone.now())
+        SubmissionCounter.objects.filter(
+            resolution=SubmissionCounter.MINUTE,
+            bucket_start__lt=timezone.now() - timedelta(hours=settings.SUBMISSION_RATE_MINUTE_RETENTION)
+        ).delete()
+    return len(pending)
+
+
+def compact(now):
+    """
+    Merge the rows of each bucket closed by `now` (and started in the last
+    COMPACT_HOURS hours) into one row per class; returns the number of rows removed
+    """
+    kept, totals, merged, extra = {}, {}, set(), []
+    with transaction.atomic():
+        for resolution, width in WIDTHS.items():
+            # Locked, so concurrent compactions see each other's merged counts instead of double counting
+            rows = SubmissionCounter.objects.select_for_update().filter(
+                resolution=resolution,
+                bucket_start__gte=now - timedelta(hours=COMPACT_HOURS),
+                bucket_start__lt=bucket_start(bucket_of(now, width), width),
+            ).order_by('id').values_list('id', 'bucket_start', 'branch_id', 'semester_id', 'division_id', 'count')
+            for row_id, *key, n in rows:
+                key = (resolution, *key)
+                if key in kept:
+                    merged.add(key)
+                    extra.append(row_id)
+                else:
+                    kept[key] = row_id
+                totals[key] = totals.get(key, 0) + n
+
+        if extra:
+            SubmissionCounter.objects.bulk_update(
+                [SubmissionCounter(id=kept[key], count=totals[key]) for key in merged], ['count'], batch_size=500
+            )
+            for i in range(0, len(extra), 500):
+                SubmissionCounter.objects.filter(id__in=extra[i:i + 500]).delete()
+    return len(extra)
+
+
+def curve(resolution, points, branch_id=None, semester_id=None, division_id=None, now=None):
+    """The latest `points` buckets (oldest first, the current one last) as [{'at', 'count'}]"""
+    width = WIDTHS[resolution]
+    last = bucket_of(now or timezone.now(), width)
+    first = last - points + 1
+
+    counters = SubmissionCounter.objects.filter(resolution=resolution, bucket_start__gte=bucket_start(first, width))
+    if branch_id:
+        counters = counters.filter(branch_id=branch_id)
+    if semester_id:
+        counters = counters.filter(semester_id=semester_id)
+    if division_id:
+        counters = counters.filter(division_id=division_id)
+    counts = {
+        bucket_of(start, width): n
+        for start, n in counters.values_list('bucket_start').annotate(n=Sum('count')).order_by()
+    }
+
+    return [{
+        'at': bucket_start(bucket, width).isoformat(),
+        'count': counts.get(bucket, 0),
+    } for bucket in range(first, last + 1)]
+
+
+def submission_rates(branch_id=None, semester_id=None, division_id=None, minutes=60, hours=24):
+    """Minute and hour curves, the current rate and the projected completion time for a scope"""
+    flush()  # include this process's own latest submissions
+    now = timezone.now()
+    per_minute = curve(SubmissionCounter.MINUTE, minutes, branch_id, semester_id, division_id, now)
+    per_hour = curve(SubmissionCounter.HOUR, hours, branch_id, semester_id, division_id, now)
+    completion = completion_stats(scoped(branch_id, semester_id, division_id))
+
+    # Rate over the minute window, ignoring the bucket still filling up
+    window = per_minute[:-1] or per_minute
+    rate_per_minute = sum(point['count'] for point in window) / len(window)
+    remaining = completion['pending']
+    if remaining == 0:
+        projected = now
+    elif rate_per_minute > 0:
+        projected = now + timedelta(minutes=remaining / rate_per_minute)
+    else:
+        projected = None
+
+    return {
+        'per_minute': per_minute,
+        'per_hour': per_hour,
+        'rate_per_hour': round(rate_per_minute * 60, 1),
+        'completion': completion,
+        'projected_completion_at': projected.isoformat() if projected else None,
+    }
@@ -0,0 +1,115 @@
+# feedback_app/rescoring.py
+
+"""
+Selective, incremental sentiment re-scoring.
+
+Rows whose `sentiment_version` differs from the current analyzer version are
+walked in primary-key order, a batch at a time. Each batch is written with
+one bulk UPDATE in its own short transaction, so readers keep seeing the old
+result until that batch commits and nothing holds locks across the run. A
+stopped run simply resumes with the rows that are still stale. Texts repeat
+heavily, so results are memoized for the run.
+
+In shadow mode the results go to the shadow_* columns instead. That lets a
+candidate analyzer be compared with the live one (`compare_shadow`) without
+touching what the dashboards show.
+
+Live scores of closed semesters are final (trends cache them), so live
+re-scoring leaves those rows alone.
+"""
+
+import time
+from collections import Counter
+from functools import lru_cache
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Feedback
+from .sentiment import analyze_sentiment, analyzer_version
+
+LIVE_FIELDS = ('comment_sentiment', 'comment_sentiment_score', 'suggestion_sentiment',
+               'suggestion_sentiment_score', 'sentiment_version', 'updated_at')
+SHADOW_FIELDS = ('shadow_comment_sentiment', 'shadow_comment_sentiment_score', 'shadow_suggestion_sentiment',
+                 'shadow_suggestion_sentiment_score', 'shadow_sentiment_version')
+
+
+def scorable(shadow=False):
+    """Feedback that may be re-scored: all of it in shadow mode, open semesters only for the live columns"""
+    return Feedback.objects.all() if shadow else Feedback.objects.filter(semester__closed_at__isnull=True)
+
+
+def stale(version, shadow=False):
+    """Feedback not yet scored by `version` (in the live or the shadow columns)"""
+    field = 'shadow_sentiment_version' if shadow else 'sentiment_version'
+    return scorable(shadow).exclude(**{field: version})
+
+
+def rescore(backend=None, shadow=False, batch_size=500, limit=None, pause=0.0, force=False, progress=None):
+    """
+    Re-score stale feedback with `backend` (SENTIMENT_BACKEND by default).
+    `force` re-scores every row; `pause` sleeps between batches to leave the
+    database to live traffic. `progress(done, version)` is called per batch.
+    Returns (rows re-scored, version).
+    """
+    version = analyzer_version(backend)
+    score = lru_cache(maxsize=50000)(lambda text: analyze_sentiment(text, backend=backend))
+    rows = scorable(shadow) if force else stale(version, shadow)
+    prefix = 'shadow_' if shadow else ''
+    fields = SHADOW_FIELDS if shadow else LIVE_FIELDS
+
+    done, last_id = 0, 0
+    while limit is None or done < limit:
+        size = batch_size if limit is None else min(batch_size, limit - done)
+        batch = list(
+            rows.filter(id__gt=last_id).order_by('id').only('id', 'comments', 'suggestions')[:size]
+        )
+        if not batch:
+            break
+
+        now = timezone.now()
+        for feedback in batch:
+            comment, comment_score = score(feedback.comments)
+            suggestion, suggestion_score = score(feedback.suggestions)
+            setattr(feedback, f'{prefix}comment_sentiment', comment)
+            setattr(feedback, f'{prefix}comment_sentiment_score', comment_score)
+            setattr(feedback, f'{prefix}suggestion_sentiment', suggestion)
+            setattr(feedback, f'{prefix}suggestion_sentiment_score', suggestion_score)
+            setattr(feedback, f'{prefix}sentiment_version', version)
+            if not shadow:
+                feedback.updated_at = now  # cached report versions follow the new labels
+
+        with transaction.atomic():
+            Feedback.objects.bulk_update(batch, fields)
+
+        done += len(batch)
+        last_id = batch[-1].id
+        if progress:
+            progress(done, version)
+        if pause:
+            time.sleep(pause)
+
+    return done, version
+
+
+def compare_shadow(version=None):
+    """Label agreement between the live and shadow columns for rows shadow-scored by `version`"""
+    rows = Feedback.objects.exclude(shadow_sentiment_version='')
+    if version:
+        rows = rows.filter(shadow_sentiment_version=version)
+
+    confusion = Counter()
+    for kind in ('comment', 'suggestion'):
+        pairs = rows.values_list(f'{kind}_sentiment', f'shadow_{kind}_sentiment').annotate(n=Count('id')).order_by()
+        for live, shadow, count in pairs:
+            confusion[live, shadow] += count
+
+    total = sum(confusion.values())
+    agree = sum(count for (live, shadow), count in confusion.items() if live == shadow)
+    return {
+        'texts': total,
+        'agreement': agree / total if total else None,
+        'confusion': confusion,
+        'live_versions': dict(rows.values_list('sentiment_version').annotate(n=Count('id')).order_by()),
+    }
@@ -0,0 +1,276 @@
+# feedback_app/rollups.py
+
+"""
+Hierarchical feedback rollups for department-level analytics.
+
+FeedbackRollup holds one row per node of institution > branch > year >
+semester > division > teacher > subject. Each row has the response count,
+rating sums, an overall_satisfaction histogram and sentiment counts. All of
+them are additive, so every parent is the sum of its subject-level rows and
+any slice of the hierarchy is one indexed read, however many years of
+feedback sit behind it.
+
+Refreshes are incremental. The watermark is the newest Feedback.updated_at
+already rolled up. A refresh finds the (branch, year, semester, division,
+teacher, subject) cells touched since then, recomputes those cells from
+Feedback and then rebuilds only their ancestors. Cells are recomputed rather
+than incremented, so the ROLLUP_REFRESH_OVERLAP window can re-read recent
+rows safely; it catches transactions that committed after a refresh with
+older timestamps. Re-scored sentiment bumps updated_at and is picked up the
+same way. Deleted feedback leaves no updated_at behind, so a post_delete signal
+records its (semester, teacher, subject) as a StaleRollupCell and the next
+refresh recomputes those cells too.
+
+Each node has exactly one row (a unique constraint over the level and its
+keys). Refreshes lock the institution row to run one at a time; the very first
+one has no row to lock, and a concurrent first refresh fails the constraint
+and is dropped in favour of the one that committed.
+"""
+
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Q, Sum
+
+from .models import Feedback, FeedbackRollup, StaleRollupCell
+
+LEVELS = (
+    FeedbackRollup.INSTITUTION, FeedbackRollup.BRANCH, FeedbackRollup.YEAR, FeedbackRollup.SEMESTER,
+    FeedbackRollup.DIVISION, FeedbackRollup.TEACHER, FeedbackRollup.SUBJECT,
+)
+KEYS = ('branch', 'year', 'semester', 'division', 'teacher', 'subject')
+# Where each key comes from on Feedback (the class of the subject, the year of the semester)
+FEEDBACK_KEYS = ('subject__branch_id', 'semester__year_id', 'semester_id', 'student__division_id', 'teacher_id', 'subject_id')
+
+RATING_FIELDS = (
+    'teaching_effectiveness', 'course_content', 'interaction_quality', 'assignment_feedback', 'overall_satisfaction',
+)
+SENTIMENTS = ('positive', 'neutral', 'negative')
+COUNTERS = (
+    ('responses',)
+    + tuple(f'sum_{field}' for field in RATING_FIELDS)
+    + tuple(f'rating_{rating}' for rating in range(1, 6))
+    + tuple(f'{kind}s_{label}' for kind in ('comment', 'suggestion') for label in SENTIMENTS)
+)
+
+# Names joined in for each key when slicing
+KEY_LABELS = {
+    'branch': ('branch__name', 'branch__code'),
+    'year': ('year__name',),
+    'semester': ('semester__number',),
+    'division': ('division__name',),
+    'teacher': ('teacher__employee_id', 'teacher__user__first_name', 'teacher__user__last_name'),
+    'subject': ('subject__code', 'subject__name'),
+}
+
+_last_refresh = 0.0
+_refresh_lock = threading.Lock()
+
+
+def level_keys(level):
+    """Keys that identify a node of `level`: () for the institution, all six for a subject"""
+    return KEYS[:LEVELS.index(level)]
+
+
+def _feedback_measures():
+    measures = {'responses': Count('id')}
+    measures.update({f'sum_{field}': Sum(field) for field in RATING_FIELDS})
+    measures.update({f'rating_{rating}': Count('id', filter=Q(overall_satisfaction=rating)) for rating in range(1, 6)})
+    for kind in ('comment', 'suggestion'):
+        for label in SENTIMENTS:
+            measures[f'{kind}s_{label}'] = Count('id', filter=Q(**{f'{kind}_sentiment': label}))
+    measures['source_updated_at'] = Max('updated_at')
+    return measures
+
+
+def _rollup_measures():
+    measures = {name: Sum(name) for name in COUNTERS}
+    measures['source_updated_at'] = Max('source_updated_at')
+    return measures
+
+
+def _key(row, keys):
+    return tuple(row[f'{key}_id'] for key in keys)
+
+
+def watermark():
+    """Newest Feedback.updated_at included in the rollups; None before the first refresh"""
+    return FeedbackRollup.objects.filter(level=FeedbackRollup.SUBJECT).aggregate(
+        latest=Max('source_updated_at')
+    )['latest']
+
+
+def _subject_rows(feedback, cells=None):
+    """Subject-level aggregates straight from Feedback, limited to `cells` when given"""
+    rows = []
+    for row in feedback.values(*FEEDBACK_KEYS).annotate(**_feedback_measures()).order_by():
+        keys = {f'{key}_id': row.pop(path) for key, path in zip(KEYS, FEEDBACK_KEYS)}
+        if cells is None or _key(keys, KEYS) in cells:
+            rows.append({**keys, **row})
+    return rows
+
+
+def _parent_rows(level, prefixes):
+    """Aggregates of one level summed from the subject rows, limited to `prefixes` when given"""
+    keys = level_keys(level)
+    source = FeedbackRollup.objects.filter(level=FeedbackRollup.SUBJECT)
+    if not keys:
+        totals = source.aggregate(**_rollup_measures())
+        return [totals] if totals['responses'] else []
+    if prefixes is not None:
+        source = source.filter(branch_id__in={prefix[0] for prefix in prefixes})
+    rows = source.values(*[f'{key}_id' for key in keys]).annotate(**_rollup_measures()).order_by()
+    return [row for row in rows if prefixes is None or _key(row, keys) in prefixes]
+
+
+def _stale_ids(level, prefixes):
+    """Ids of the existing rows of `level` that are about to be replaced"""
+    keys = level_keys(level)
+    existing = FeedbackRollup.objects.filter(level=level)
+    if prefixes is None or not keys:
+        return list(existing.values_list('id', flat=True))
+    existing = existing.filter(branch_id__in={prefix[0] for prefix in prefixes})
+    return [
+        row['id'] for row in existing.values('id', *[f'{key}_id' for key in keys])
+        if _key(row, keys) in prefixes
+    ]
+
+
+def _stale_cells(marks):
+    """Rolled-up subject cells of the (semester, teacher, subject) triples in `marks`"""
+    triples = {mark[1:] for mark in marks}
+    if not triples:
+        return set()
+    rows = FeedbackRollup.objects.filter(
+        level=FeedbackRollup.SUBJECT, subject_id__in={triple[-1] for triple in triples}
+    ).values_list(*[f'{key}_id' for key in KEYS])
+    # (branch, year, semester, division, teacher, subject) -> (semester, teacher, subject)
+    return {cell for cell in rows if (cell[2], cell[4], cell[5]) in triples}
+
+
+def _replace(levels, prefixes_of, rows_of):
+    stale = [row_id for level in levels for row_id in _stale_ids(level, prefixes_of(level))]
+    if stale:
+        FeedbackRollup.objects.filter(id__in=stale).delete()
+    FeedbackRollup.objects.bulk_create([
+        FeedbackRollup(level=level, **row) for level in levels for row in rows_of[level]
+    ], batch_size=500)
+
+
+def refresh(full=False):
+    """
+    Bring the rollups up to date with Feedback and return the number of
+    subject cells recomputed. Runs in one transaction, so readers see the old
+    rollups until it commits; returns 0 if a concurrent refresh committed the
+    same rows first.
+    """
+    try:
+        return _refresh(full)
+    except IntegrityError:
+        return 0
+
+
+def _refresh(full):
+    with transaction.atomic():
+        # Serializes concurrent refreshes where the database has row locks
+        list(FeedbackRollup.objects.select_for_update().filter(level=FeedbackRollup.INSTITUTION).values_list('id'))
+
+        # Only the marks read here are cleared; deletes committing meanwhile wait for the next refresh
+        marks = list(StaleRollupCell.objects.values_list('id', 'semester_id', 'teacher_id', 'subject_id'))
+
+        since = None if full else watermark()
+        if since is None:
+            cells = None
+            subject_rows = _subject_rows(Feedback.objects.all())
+        else:
+            changed = Feedback.objects.filter(
+                updated_at__gte=since - timedelta(seconds=settings.ROLLUP_REFRESH_OVERLAP)
+            )
+            cells = set(changed.values_list(*FEEDBACK_KEYS).distinct().order_by()) | _stale_cells(marks)
+            if not cells:
+                StaleRollupCell.objects.filter(id__in=[mark[0] for mark in marks]).delete()
+                return 0
+            subject_rows = _subject_rows(
+                Feedback.objects.filter(subject_id__in={cell[-1] for cell in cells}), cells
+            )
+
+        def prefixes_of(level):
+            if cells is None:
+                return None
+            depth = len(level_keys(level))
+            return {cell[:depth] for cell in cells}
+
+        # Subject rows first: every other level is summed from them
+        _replace([FeedbackRollup.SUBJECT], prefixes_of, {FeedbackRollup.SUBJECT: subject_rows})
+        parents = LEVELS[:-1]
+        _replace(parents, prefixes_of, {level: _parent_rows(level, prefixes_of(level)) for level in parents})
+        if marks:
+            StaleRollupCell.objects.filter(id__in=[mark[0] for mark in marks]).delete()
+
+    return len(subject_rows) if cells is None else len(cells)
+
+
+def refresh_if_due():
+    """Incremental refresh at most every ROLLUP_REFRESH_INTERVAL seconds per process"""
+    global _last_refresh
+    with _refresh_lock:
+        if time.monotonic() - _last_refresh < settings.ROLLUP_REFRESH_INTERVAL:
+            return None
+        _last_refresh = time.monotonic()
+    return refresh()
+
+
+def _summarize(row):
+    responses = row['responses'] or 0
+    return {
+        'responses': responses,
+        'averages': {
+            field: round(row[f'sum_{field}'] / responses, 2) if responses else None
+            for field in RATING_FIELDS
+        },
+        'rating_distribution': {str(rating): row[f'rating_{rating}'] for rating in range(1, 6)},
+        'sentiment': {
+            f'{kind}s': {label: row[f'{kind}s_{label}'] for label in SENTIMENTS}
+            for kind in ('comment', 'suggestion')
+        },
+    }
+
+
+def slice_rollups(level, **filters):
+    """
+    Rows of one level (optionally narrowed by ancestor ids such as branch=3)
+    and their totals, read in one query
+    """
+    keys = level_keys(level)
+    unknown = set(filters) - set(keys)
+    if unknown:
+        raise ValueError(f"Cannot filter {level} rollups by {', '.join(sorted(unknown))}")
+
+    labels = [label for key in keys for label in KEY_LABELS[key]]
+    rows = FeedbackRollup.objects.filter(
+        level=level, **{f'{key}_id': value for key, value in filters.items()}
+    ).values(*[f'{key}_id' for key in keys], *labels, *COUNTERS, 'source_updated_at').order_by(*labels)
+
+    results, totals = [], dict.fromkeys(COUNTERS, 0)
+    latest = None
+    for row in rows:
+        for name in COUNTERS:
+            totals[name] += row[name]
+        if row['source_updated_at'] and (latest is None or row['source_updated_at'] > latest):
+            latest = row['source_updated_at']
+        results.append({
+            **{f'{key}_id': row[f'{key}_id'] for key in keys},
+            **{label: row[label] for label in labels},
+            **_summarize(row),
+        })
+
+    return {
+        'level': level,
+        'filters': filters,
+        'total': _summarize(totals),
+        'rows': results,
+        'data_through': latest,
+    }
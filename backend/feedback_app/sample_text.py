@@ -0,0 +1,71 @@
+# feedback_app/sample_text.py
+
+"""
+Canned feedback text used by the sample-data and synthetic-campus commands.
+Each list is labelled with the sentiment it was written to express.
+"""
+
+positive_comments = [
+    "Excellent teaching methodology. The professor explains concepts very clearly and makes the subject interesting.",
+    "Great teacher! Very helpful and always available for doubts. Makes learning enjoyable.",
+    "Outstanding teaching skills. The way concepts are explained is brilliant and easy to understand.",
+    "Very good teaching approach. Interactive sessions and practical examples help a lot.",
+    "Fantastic professor! Deep knowledge of the subject and explains everything thoroughly.",
+    "Really appreciate the teaching style. Makes complex topics simple and engaging.",
+    "Amazing teacher who truly cares about student learning. Always encouraging and supportive.",
+    "Excellent course delivery. Well-organized lectures and helpful study materials provided."
+]
+
+neutral_comments = [
+    "The teaching is okay. Could be more interactive but concepts are covered adequately.",
+    "Average teaching pace. Sometimes too fast, sometimes too slow.",
+    "Course content is good but delivery could be improved slightly.",
+    "Satisfactory teaching method. Gets the job done but room for improvement.",
+    "Decent teaching overall. Some topics need more detailed explanation.",
+    "The classes are fine. Content is covered but could be more engaging."
+]
+
+negative_comments = [
+    "Teaching could be improved. Concepts are not explained clearly enough.",
+    "Difficult to understand lectures. Need more examples and practical sessions.",
+    "Teaching speed is too fast. Hard to keep up with the pace of lectures.",
+    "Not very interactive. More student engagement would help learning.",
+    "Course material is not well organized. Difficult to follow along."
+]
+
+positive_suggestions = [
+    "Keep up the excellent work! Maybe add more real-world examples.",
+    "Continue the great teaching. Perhaps include more practical assignments.",
+    "Maintain the current teaching style. Very effective and engaging.",
+    "Great job! Could add more interactive quizzes for better learning.",
+    "Please continue teaching this way. Maybe include more case studies."
+]
+
+neutral_suggestions = [
+    "Could provide more study materials and reference books.",
+    "More practice problems would be helpful for exam preparation.",
+    "Additional tutorial sessions might help with difficult topics.",
+    "Providing lecture notes in advance would be beneficial.",
+    "More examples during lectures would improve understanding."
+]
+
+negative_suggestions = [
+    "Please slow down the teaching pace and explain concepts more thoroughly.",
+    "Need more interactive sessions and practical demonstrations.",
+    "Should provide better study materials and organized notes.",
+    "More focus on fundamentals needed before moving to advanced topics.",
+    "Please make lectures more engaging and interactive."
+]
+
+
+COMMENTS = {
+    'positive': positive_comments,
+    'neutral': neutral_comments,
+    'negative': negative_comments,
+}
+
+SUGGESTIONS = {
+    'positive': positive_suggestions,
+    'neutral': neutral_suggestions,
+    'negative': negative_suggestions,
+}
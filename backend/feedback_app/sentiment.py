@@ -0,0 +1,263 @@
+# feedback_app/sentiment.py
+
+"""
+Sentiment analysis of feedback comments and suggestions.
+
+Polarity comes from a pluggable backend chosen by SENTIMENT_BACKEND:
+'textblob' (TextBlob's pattern analyzer) or 'lexicon' (feedback_app.lexicon,
+the same lexicon and rules in plain Python, many times faster). Both are
+loaded on first use; `compare_sentiment_backends` measures how far they
+agree on stored feedback.
+
+TextBlob (and NLTK behind it) takes the better part of a second to import,
+so it is loaded on the first analysis rather than when the URLconf imports
+the views. Workers that should not pay that on their first submission can
+load it at boot with PRELOAD_HEAVY_IMPORTS (see `preload`).
+
+Importing is not all of it: TextBlob parses its sentiment lexicon (an XML
+file) and builds its tokenizer on the first analysis, another ~100 ms.
+`warm_up`, run from AppConfig.ready() when SENTIMENT_WARMUP is on, does that
+at boot and then freezes the heap so the garbage collector never writes to
+those objects again. Under `gunicorn --preload` the master warms up once and
+the forked workers share the lexicon pages copy-on-write.
+
+Negative keywords come from the SentimentKeyword table (editable in the
+admin), compiled into one case-insensitive word-boundary regex. The compiled
+matcher is cached per process and rebuilt when the table's version (row
+count and last update) changes: at once in the process that saved the
+change, within SENTIMENT_KEYWORD_TTL seconds in the others.
+
+Placeholder text is never scored: empty strings, the model defaults ("No
+comments", "No suggestions"), fillers like "n/a" or "nil", punctuation and
+anything with fewer than SENTIMENT_MIN_LETTERS letters get (None, 0.0), the
+same as an empty field. Otherwise "No comments" would match the negative
+keyword "no" and count against the teacher on every dashboard.
+
+Every stored result is stamped with `analyzer_version()`: the backend, the
+revision of the labelling rules below and a digest of the keyword weights
+and threshold. `rescore_sentiments` re-scores only rows with another version.
+"""
+
+import gc
+import hashlib
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count, Max
+
+from .tracing import span
+
+_TextBlob = None
+
+# Bump whenever analyze_sentiment would label the same text differently
+RULES_REVISION = 3
+
+# Normalized (lowercase, letters and spaces only) texts that mean "nothing to say"
+PLACEHOLDER_TEXTS = frozenset((
+    'no comments', 'no comment', 'no suggestions', 'no suggestion', 'none', 'nil', 'na', 'n a',
+    'nothing', 'nothing to say', 'nothing much', 'no', 'nope', 'not applicable', 'null', 'empty',
+))
+_NON_LETTERS = re.compile(r'[^a-z]+')
+
+WARMUP_TEXTS = (
+    'Great teaching, very clear explanations.',
+    'The lectures were boring and the teacher was often late.',
+    'Okay.',
+)
+
+# Used until the SentimentKeyword table exists (the initial data migration seeds the same words)
+DEFAULT_KEYWORDS = {
+    'not': 1.0, 'no': 1.0, 'bad': 1.0, 'poor': 1.0, 'worst': 1.0, 'terrible': 1.0, 'awful': 1.0,
+    'useless': 1.0, 'waste': 1.0, 'boring': 1.0, 'confusing': 1.0, 'difficult': 1.0,
+    'never': 1.0, 'late': 1.0, 'absent': 1.0, 'rude': 1.0, 'unprofessional': 1.0,
+}
+
+
+def _textblob():
+    global _TextBlob
+    if _TextBlob is None:
+        from textblob import TextBlob
+        _TextBlob = TextBlob
+    return _TextBlob
+
+
+#  BACKENDS
+
+class TextBlobBackend:
+    name = 'textblob'
+
+    def load(self):
+        _textblob()
+
+    def polarity(self, text):
+        return _textblob()(text).sentiment.polarity
+
+
+class LexiconBackend:
+    name = 'lexicon'
+
+    def __init__(self):
+        self.scorer = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.scorer is None:
+                from .lexicon import LexiconScorer, load_lexicon
+                self.scorer = LexiconScorer(load_lexicon())
+
+    def polarity(self, text):
+        if self.scorer is None:
+            self.load()
+        return self.scorer.polarity(text)
+
+
+BACKENDS = {backend.name: backend for backend in (TextBlobBackend, LexiconBackend)}
+_backends = {}
+
+
+def get_backend(name=None):
+    """Shared backend instance; SENTIMENT_BACKEND unless `name` is given"""
+    name = name or settings.SENTIMENT_BACKEND
+    backend = _backends.get(name)
+    if backend is None:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend '{name}', expected one of: {', '.join(BACKENDS)}")
+        backend = _backends.setdefault(name, BACKENDS[name]())
+    return backend
+
+
+def preload():
+    """Load the configured sentiment engine now instead of on the first analysis"""
+    get_backend().load()
+
+
+def polarity(text, backend=None):
+    return get_backend(backend).polarity(text)
+
+
+#  KEYWORD LEXICON
+
+class KeywordMatcher:
+    """All keywords of one lexicon version as a single alternation regex"""
+
+    def __init__(self, weights, version=None):
+        self.weights = dict(weights)  # lowercased word/phrase -> weight
+        self.version = version
+        self.checked_at = time.monotonic()
+        # Longest first so a phrase wins over the single word it starts with
+        words = sorted(self.weights, key=len, reverse=True)
+        alternatives = [r'\s+'.join(re.escape(part) for part in word.split()) for word in words]
+        self.pattern = re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b', re.IGNORECASE) if words else None
+        self.digest = hashlib.sha1(repr(sorted(self.weights.items())).encode()).hexdigest()
+
+    def matches(self, text):
+        """Distinct keywords found in `text`"""
+        if self.pattern is None:
+            return set()
+        return {' '.join(match.lower().split()) for match in self.pattern.findall(text)}
+
+    def weight(self, text):
+        """Summed weight of the distinct keywords found in `text`"""
+        return sum(self.weights[word] for word in self.matches(text))
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def _lexicon_version():
+    from .models import SentimentKeyword
+    stats = SentimentKeyword.objects.aggregate(count=Count('id'), updated=Max('updated_at'))
+    return (stats['count'], stats['updated'])
+
+
+def _load_matcher(version):
+    from .models import SentimentKeyword
+    weights = SentimentKeyword.objects.filter(is_active=True).values_list('word', 'weight')
+    return KeywordMatcher(weights, version)
+
+
+def keyword_matcher():
+    """Compiled matcher for the current lexicon; the version is checked at most every SENTIMENT_KEYWORD_TTL seconds"""
+    global _matcher
+    matcher = _matcher
+    if matcher is not None and time.monotonic() - matcher.checked_at < settings.SENTIMENT_KEYWORD_TTL:
+        return matcher
+
+    try:
+        version = _lexicon_version()
+        if matcher is not None and matcher.version == version:
+            matcher.checked_at = time.monotonic()
+            return matcher
+        matcher = _load_matcher(version)
+    except DatabaseError:
+        # Table not migrated yet
+        return KeywordMatcher(DEFAULT_KEYWORDS)
+
+    with _matcher_lock:
+        _matcher = matcher
+    return matcher
+
+
+def invalidate_keywords():
+    global _matcher
+    with _matcher_lock:
+        _matcher = None
+
+
+#  ANALYSIS
+
+def is_placeholder(text):
+    """True for empty, default, filler, punctuation-only or very short text"""
+    if not text:
+        return True
+    normalized = _NON_LETTERS.sub(' ', text.lower()).strip()
+    letters = len(normalized) - normalized.count(' ')
+    return letters < settings.SENTIMENT_MIN_LETTERS or normalized in PLACEHOLDER_TEXTS
+
+
+def analyzer_version(backend=None):
+    """'<backend>.<rules revision>.<keywords and settings digest>' of results analyze_sentiment gives now"""
+    digest = hashlib.sha1(
+        f'{keyword_matcher().digest}|{settings.SENTIMENT_KEYWORD_THRESHOLD}|{settings.SENTIMENT_MIN_LETTERS}'.encode()
+    ).hexdigest()[:10]
+    return f'{get_backend(backend).name}.{RULES_REVISION}.{digest}'
+
+
+@span('sentiment')
+def analyze_sentiment(text, backend=None):
+    """Analyze sentiment of text and return sentiment label and score"""
+    if is_placeholder(text):
+        return None, 0.0
+
+    has_negative_keywords = keyword_matcher().weight(text) >= settings.SENTIMENT_KEYWORD_THRESHOLD
+
+    score = polarity(text, backend)
+
+    if has_negative_keywords and score <= 0:
+        return 'negative', score
+    elif score > 0.05:
+        return 'positive', score
+    elif score < -0.05:
+        return 'negative', score
+    else:
+        return 'neutral', score
+
+
+def warm_up(freeze=True):
+    """Load the configured backend (TextBlob: its lexicon and tokenizer too); returns the seconds it took"""
+    started = time.perf_counter()
+    # polarity() rather than analyze_sentiment(): the keyword table must not
+    # be queried while apps are still loading
+    for text in WARMUP_TEXTS:
+        polarity(text)
+    if freeze:
+        # Move everything alive now (lexicon included) to the permanent
+        # generation: later collections skip it and leave its pages shared
+        gc.collect()
+        gc.freeze()
+    return time.perf_counter() - started
@@ -0,0 +1,228 @@
+# feedback_app/sqlstats.py
+
+"""
+SQL fingerprint statistics and slow-query log.
+
+A database execute wrapper, installed on every new connection, times each
+statement and aggregates it under a fingerprint of its normalized text
+(literals and placeholders replaced, IN lists collapsed). Statements slower
+than SLOW_QUERY_MS are logged with their parameter shape and the calling
+line in feedback_app. The query plan is captured once per fingerprint the
+first time it is slow. Stats are per process and dumped on demand at
+/api/admin/sql-stats/.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('feedback_app.sql')
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Instrumentation modules never count as the caller of a query
+SKIP_MODULES = {'sqlstats.py', 'querybudget.py', 'middleware.py', 'tracing.py', 'benchmarks.py'}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_LIST = re.compile(r'(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\1)+')
+_SPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def normalize(sql):
+    """SQL with literals and placeholders as ?, IN and VALUES lists collapsed"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _VALUES_LIST.sub(r'\1, ...', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def param_shape(params, many=False):
+    """Types of the parameters, e.g. '(int, str)' or '200 x (int, str)' for executemany"""
+    if params is None:
+        return '()'
+    if many:
+        params = list(params)
+        return f'{len(params)} x {param_shape(params[0]) if params else "()"}'
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{key}: {type(value).__name__}' for key, value in params.items()) + '}'
+    names = [type(value).__name__ for value in params]
+    if len(names) > 8 and len(set(names)) == 1:
+        return f'({names[0]} x {len(names)})'
+    return '(' + ', '.join(names) + ')'
+
+
+def caller():
+    """'views.py:123 in view_name' for the innermost feedback_app frame outside the instrumentation"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and os.path.basename(filename) not in SKIP_MODULES:
+            return f'{os.path.relpath(filename, APP_DIR)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+#  PLANS
+
+def explain(connection, sql, params):
+    """Query plan rows as text; only SELECTs are explained"""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+    except Exception as e:
+        return [f'EXPLAIN failed: {e}']
+
+
+def full_scans(plan):
+    """Tables scanned without an index according to a SQLite plan"""
+    scans = []
+    for line in plan or []:
+        match = re.search(r'\bSCAN (?:TABLE )?(\w+)', line)
+        if match and 'USING' not in line:
+            scans.append(match.group(1))
+    return scans
+
+
+#  STATS
+
+class FingerprintStats:
+    __slots__ = ('sql', 'count', 'total', 'max', 'slow', 'caller', 'shape', 'plan')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.caller = None  # of the slowest execution
+        self.shape = None
+        self.plan = None
+
+    def as_dict(self, key):
+        return {
+            'fingerprint': key,
+            'sql': self.sql,
+            'count': self.count,
+            'total_ms': round(self.total * 1000, 3),
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0,
+            'max_ms': round(self.max * 1000, 3),
+            'slow': self.slow,
+            'caller': self.caller,
+            'params': self.shape,
+            'plan': self.plan,
+            'full_scans': full_scans(self.plan),
+        }
+
+
+_stats = {}
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def snapshot(order_by='total_ms', limit=None):
+    """Fingerprint stats as dicts, heaviest first"""
+    with _lock:
+        rows = [stats.as_dict(key) for key, stats in _stats.items()]
+    rows.sort(key=lambda row: row[order_by], reverse=True)
+    return rows[:limit] if limit else rows
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+class SQLStatsWrapper:
+    """Execute wrapper aggregating every statement and logging slow ones"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(_local, 'explaining', False):
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        try:
+            result = execute(sql, params, many, context)
+        except Exception:
+            self.record(sql, params, many, time.perf_counter() - started, failed=True)
+            raise
+        self.record(sql, params, many, time.perf_counter() - started)
+        return result
+
+    def record(self, sql, params, many, elapsed, failed=False):
+        key = fingerprint(sql)
+        slow = elapsed * 1000 >= settings.SLOW_QUERY_MS
+
+        with _lock:
+            stats = _stats.get(key)
+            if stats is None:
+                stats = _stats[key] = FingerprintStats(normalize(sql))
+            stats.count += 1
+            stats.total += elapsed
+            if slow:
+                stats.slow += 1
+            slowest = elapsed > stats.max
+            if slowest:
+                stats.max = elapsed
+            # Never EXPLAIN after an error: the transaction may be unusable
+            needs_plan = slow and stats.plan is None and not many and not failed
+
+        if not slow:
+            return
+
+        where = caller()
+        shape = param_shape(params, many)
+        if slowest:
+            stats.caller, stats.shape = where, shape
+
+        if needs_plan:
+            _local.explaining = True
+            try:
+                stats.plan = explain(self.connection, sql, params)
+            finally:
+                _local.explaining = False
+
+        logger.warning('Slow query %s', json.dumps({
+            'fingerprint': key,
+            'ms': round(elapsed * 1000, 3),
+            'sql': stats.sql[:2000],
+            'params': shape,
+            'caller': where,
+            'plan': stats.plan if needs_plan else None,
+        }))
+
+
+@receiver(connection_created)
+def install_sql_stats(sender, connection, **kwargs):
+    if settings.SQL_STATS_ENABLED and not any(
+        isinstance(wrapper, SQLStatsWrapper) for wrapper in connection.execute_wrappers
+    ):
+        # Outermost, so `connection.execute_wrapper()` blocks that are open
+        # while the connection is created still pop their own wrapper
+        connection.execute_wrappers.insert(0, SQLStatsWrapper(connection))
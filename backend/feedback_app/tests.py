@@ -1,3 +1,1024 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import (
+    benchmarks, events, middleware, obligations, profiling, ranking, rates, reports, rescoring, rollups,
+    sentiment, sqlstats, trends, urls
+)
+from .querybudget import QueryBudgetExceeded, assert_query_budget, query_budget
+
+from .models import (
+    CustomUser, Student, Teacher, Subject, Branch, Year,
+    Semester, Feedback, Division, TeacherSubject, IdempotencyKey,
+    FeedbackObligation, FeedbackRollup, ReportJob, SentimentKeyword, StaleRollupCell,
+    SubmissionCounter
+)
+
+
+class CampusFixtureMixin:
+    """Small class: one branch/semester/division, two subjects, three students"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.branch = Branch.objects.create(name='Computer Science', code='CS')
+        cls.year = Year.objects.create(name='SY')
+        cls.semester = Semester.objects.create(number=3, year=cls.year)
+        cls.division = Division.objects.create(name='A')
+
+        cls.subjects = [
+            Subject.objects.create(code=f'CS23{i:02d}', name=f'Subject {i}', semester=cls.semester, branch=cls.branch)
+            for i in range(1, 3)
+        ]
+
+        teacher_user = CustomUser.objects.create_user(
+            username='T001', password='pass1234', user_type='teacher', first_name='Asha', last_name='Rao'
+        )
+        cls.teacher = Teacher.objects.create(
+            user=teacher_user, employee_id='T001', department=cls.branch, is_class_teacher=True,
+            assigned_class_year=cls.year, assigned_class_branch=cls.branch,
+            assigned_class_semester=cls.semester, assigned_class_division=cls.division
+        )
+        for subject in cls.subjects:
+            TeacherSubject.objects.create(teacher=cls.teacher, subject=subject)
+            cls.teacher.subjects.add(subject)
+
+        cls.students = []
+        for i in range(1, 4):
+            user = CustomUser.objects.create_user(
+                username=f'PRN00{i}', password='pass1234', user_type='student',
+                first_name='Student', last_name=str(i), prn_number=f'PRN00{i}'
+            )
+            cls.students.append(Student.objects.create(
+                user=user, prn_number=f'PRN00{i}', year=cls.year, branch=cls.branch,
+                semester=cls.semester, division=cls.division
+            ))
+
+    def setUp(self):
+        # Query budgets fail the test instead of logging
+        strict = override_settings(QUERY_BUDGET_STRICT=True)
+        strict.enable()
+        self.addCleanup(strict.disable)
+
+    def feedback_payload(self, student, subject, **overrides):
+        payload = {
+            'username': student.user.username,
+            'subject_id': subject.id,
+            'teacher_id': self.teacher.id,
+            'teaching_effectiveness': 4,
+            'course_content': 4,
+            'interaction_quality': 4,
+            'assignment_feedback': 4,
+            'overall_satisfaction': 5,
+            'comments': 'Great teaching, very clear explanations.',
+            'suggestions': 'Keep it up.',
+        }
+        payload.update(overrides)
+        return payload
+
+    def submit(self, student, subject, headers=None, **overrides):
+        return self.client.post(
+            '/api/student/submit-feedback/',
+            data=json.dumps(self.feedback_payload(student, subject, **overrides)),
+            content_type='application/json',
+            headers=headers or {}
+        )
+
+
+class SubmitFeedbackTests(CampusFixtureMixin, TestCase):
+
+    def test_duplicate_rejected_by_unique_constraint(self):
+        student, subject = self.students[0], self.subjects[0]
+        self.assertEqual(self.submit(student, subject).status_code, 201)
+
+        response = self.submit(student, subject)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('already submitted', response.json()['error'])
+        self.assertEqual(Feedback.objects.count(), 1)
+
+    def test_other_integrity_errors_are_not_duplicates(self):
+        student, subject = self.students[0], self.subjects[0]
+        with mock.patch.object(Feedback.objects, 'create', side_effect=IntegrityError('NOT NULL constraint failed')):
+            response = self.submit(student, subject)
+        self.assertEqual(response.status_code, 500)
+
+    def test_idempotency_key_is_stored_with_the_feedback_row(self):
+        student, subject = self.students[0], self.subjects[0]
+        with mock.patch('feedback_app.views._store_idempotent_response', side_effect=RuntimeError('crash')):
+            response = self.submit(student, subject, headers={'Idempotency-Key': 'retry-2'})
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(Feedback.objects.exists())
+
+    def test_idempotency_key_replays_stored_response(self):
+        student, subject = self.students[0], self.subjects[0]
+        headers = {'Idempotency-Key': 'retry-1'}
+
+        first = self.submit(student, subject, headers=headers)
+        with self.assertNumQueries(1):
+            replay = self.submit(student, subject, headers=headers)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(replay.status_code, 201)
+        self.assertEqual(replay['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(Feedback.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+
+class ReportsDirMixin:
+    """Build report artifacts inline into a throwaway directory"""
+
+    def setUp(self):
+        super().setUp()
+        reports_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, reports_dir, ignore_errors=True)
+        overrides = override_settings(REPORTS_DIR=reports_dir, REPORT_JOBS_EAGER=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+
+class FeedbackObligationTests(ReportsDirMixin, CampusFixtureMixin, TestCase):
+
+    def test_obligations_follow_assignments_and_feedback(self):
+        self.assertEqual(FeedbackObligation.objects.count(), 6)
+
+        self.submit(self.students[0], self.subjects[0])
+        obligation = FeedbackObligation.objects.get(student=self.students[0], subject=self.subjects[0])
+        self.assertTrue(obligation.is_fulfilled)
+
+        TeacherSubject.objects.filter(subject=self.subjects[1]).delete()
+        self.assertEqual(FeedbackObligation.objects.count(), 3)
+
+    def test_promotion_keeps_past_semester_obligations(self):
+        student = self.students[0]
+        self.submit(student, self.subjects[0])
+        next_semester = Semester.objects.create(number=4, year=self.year)
+        other_division = Division.objects.create(name='B')
+
+        student.semester, student.division = next_semester, other_division
+        student.save()
+
+        history = FeedbackObligation.objects.filter(student=student, semester=self.semester)
+        self.assertEqual(history.count(), 2)
+        self.assertEqual(set(history.values_list('division_id', flat=True)), {self.division.id})
+        self.assertTrue(history.get(subject=self.subjects[0]).is_fulfilled)
+
+        # Still T001's student; last semester's feedback is not current completion
+        tracking = self.client.get('/api/class-teacher/student-tracking/', {'username': 'T001'}).json()
+        by_prn = {s['prn']: s for s in tracking['students']}
+        self.assertEqual(by_prn['PRN001']['subjects_completed'], [])
+
+    def test_past_semester_obligations_are_not_counted(self):
+        student = self.students[0]
+        self.submit(student, self.subjects[0])
+        next_semester = Semester.objects.create(number=4, year=self.year)
+        subject = Subject.objects.create(code='CS2401', name='Subject 4', semester=next_semester, branch=self.branch)
+        TeacherSubject.objects.create(teacher=self.teacher, subject=subject)
+        student.semester = next_semester
+        student.save()
+
+        # Last semester's open obligation neither counts as pending nor blocks completion
+        completion = self.client.get('/api/admin/completion-statistics/', {'branch_id': self.branch.id}).json()
+        self.assertEqual(completion['completion']['expected'], 5)
+        self.assertEqual(completion['completion']['fulfilled'], 0)
+        with mock.patch.object(events.broker, 'watched', return_value=True), \
+                mock.patch.object(events.broker, 'publish') as publish, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.submit(student, subject)
+        published = [event['event'] for event in publish.call_args.args[1]]
+        self.assertEqual(published, ['completion', 'student-completed'])
+
+        # Reports count the current semester only, and history changes leave their version alone
+        version = reports.class_report_version(self.teacher)
+        FeedbackObligation.objects.filter(student=student, semester=self.semester).update(is_fulfilled=True)
+        self.assertEqual(reports.class_report_version(self.teacher), version)
+
+    def test_subject_resync_keeps_past_semester_obligations(self):
+        student = self.students[0]
+        self.submit(student, self.subjects[0])
+        student.semester = Semester.objects.create(number=4, year=self.year)
+        student.save()
+        history = FeedbackObligation.objects.filter(student=student, semester=self.semester)
+
+        self.subjects[0].save()
+        self.assertEqual(history.count(), 2)
+        obligations.rebuild_all()
+        self.assertEqual(history.count(), 2)
+        self.assertTrue(history.get(subject=self.subjects[0]).is_fulfilled)
+        # Students still in the semester keep their current obligations
+        self.assertEqual(FeedbackObligation.objects.filter(student=self.students[1]).count(), 2)
+
+    def test_class_views_use_obligations(self):
+        self.submit(self.students[0], self.subjects[0])
+        self.submit(self.students[0], self.subjects[1])
+        self.submit(self.students[1], self.subjects[0])
+
+        dashboard = self.client.get('/api/class-teacher/dashboard/', {'username': 'T001'}).json()
+        self.assertEqual(dashboard['statistics']['submitted_feedback'], 2)
+        self.assertEqual(dashboard['statistics']['received_feedback'], 3)
+        self.assertEqual(dashboard['statistics']['expected_feedback'], 6)
+        self.assertEqual([s['prn'] for s in dashboard['pending_students']], ['PRN003'])
+
+        tracking = self.client.get('/api/class-teacher/student-tracking/', {'username': 'T001'}).json()
+        by_prn = {s['prn']: s for s in tracking['students']}
+        self.assertEqual(by_prn['PRN001']['status'], 'Complete')
+        self.assertEqual(by_prn['PRN002']['completion_percentage'], 50.0)
+        self.assertEqual(tracking['summary']['completed_students'], 1)
+
+        report = self.client.get('/api/class-teacher/download-report/', {'username': 'T001'})
+        self.assertEqual(report.status_code, 200)
+
+        completion = self.client.get('/api/admin/completion-statistics/', {'branch_id': self.branch.id}).json()
+        self.assertEqual(completion['completion']['completion_rate'], 50.0)
+
+
+class CompletionMatrixTests(CampusFixtureMixin, TestCase):
+
+    def tracking(self):
+        return self.client.get('/api/class-teacher/student-tracking/', {'username': 'T001'}).json()
+
+    def test_matrix_is_built_per_request(self):
+        self.tracking()
+        self.submit(self.students[0], self.subjects[0])
+
+        # Teacher lookup and one obligation join, whatever the class size
+        with self.assertNumQueries(2):
+            tracking = self.tracking()
+        by_prn = {s['prn']: s for s in tracking['students']}
+        self.assertEqual(by_prn['PRN001']['subjects_completed'], ['CS2301 (T001)'])
+        self.assertEqual(by_prn['PRN001']['subjects_pending'], ['CS2302 (T001)'])
+
+    def test_dashboard_and_tracking_agree(self):
+        self.tracking()
+        self.client.get('/api/class-teacher/dashboard/', {'username': 'T001'})
+        self.submit(self.students[0], self.subjects[0])
+        self.submit(self.students[0], self.subjects[1])
+
+        dashboard = self.client.get('/api/class-teacher/dashboard/', {'username': 'T001'}).json()
+        tracking = self.tracking()
+        self.assertEqual(
+            [s['prn'] for s in dashboard['pending_students']],
+            [s['prn'] for s in tracking['students'] if s['feedback_submitted'] == 0]
+        )
+        self.assertEqual(dashboard['subject_gaps'], tracking['subject_gaps'])
+        self.assertEqual(dashboard['statistics']['total_subjects'], tracking['summary']['total_subjects'])
+        self.assertEqual(
+            dashboard['statistics']['received_feedback'],
+            sum(s['feedback_submitted'] for s in tracking['students'])
+        )
+
+class ClassDashboardQueryTests(CampusFixtureMixin, TestCase):
+
+    def dashboard(self, **params):
+        return self.client.get('/api/class-teacher/dashboard/', {'username': 'T001', **params}).json()
+
+    def test_query_count_does_not_depend_on_class_size(self):
+        self.dashboard()
+        with self.assertNumQueries(4):
+            self.dashboard()
+
+        for i in range(4, 30):
+            user = CustomUser.objects.create_user(username=f'PRN{i:03d}', password='pass1234', user_type='student')
+            Student.objects.create(
+                user=user, prn_number=f'PRN{i:03d}', year=self.year, branch=self.branch,
+                semester=self.semester, division=self.division
+            )
+
+        self.dashboard()
+        with self.assertNumQueries(4):
+            self.dashboard()
+
+    def test_pending_students_sorted_and_paginated(self):
+        self.submit(self.students[1], self.subjects[0])
+
+        first = self.dashboard(page_size=1)
+        second = self.dashboard(page_size=1, page=2)
+
+        self.assertEqual(first['statistics']['submitted_feedback'], 1)
+        self.assertEqual([s['prn'] for s in first['pending_students']], ['PRN001'])
+        self.assertEqual([s['prn'] for s in second['pending_students']], ['PRN003'])
+        self.assertEqual(first['pending_pagination']['total_pages'], 2)
+
+    def test_counts_and_gaps_agree_with_the_student_split(self):
+        self.submit(self.students[0], self.subjects[0])
+
+        dashboard = self.dashboard()
+        self.assertEqual(dashboard['statistics']['submitted_feedback'], 1)
+        self.assertEqual(dashboard['statistics']['received_feedback'], 1)
+        self.assertEqual(dashboard['statistics']['expected_feedback'], 6)
+        self.assertEqual(dashboard['statistics']['total_subjects'], 2)
+        self.assertEqual([gap['pending'] for gap in dashboard['subject_gaps']], [3, 2])
+
+
+class ReportJobTests(ReportsDirMixin, CampusFixtureMixin, TestCase):
+
+    def download(self):
+        return self.client.get('/api/class-teacher/download-report/', {'username': 'T001'})
+
+    def test_artifact_reused_until_data_changes(self):
+        first = self.download()
+        second = self.download()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['X-Report-Job'], second['X-Report-Job'])
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+        self.submit(self.students[0], self.subjects[0])
+        third = self.download()
+        self.assertNotEqual(third['X-Report-Job'], first['X-Report-Job'])
+        # The superseded artifact is pruned once the new one is built
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+        status = self.client.get(f"/api/reports/jobs/{third['X-Report-Job']}/").json()
+        self.assertEqual(status['job']['status'], ReportJob.DONE)
+
+    @override_settings(REPORT_JOBS_EAGER=False)
+    def test_pending_job_returns_accepted(self):
+        response = self.download()
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['job']
+        self.assertEqual(job['status'], ReportJob.PENDING)
+
+        download = self.client.get(f"/api/reports/jobs/{job['id']}/download/")
+        self.assertEqual(download.status_code, 409)
+
+
+    @override_settings(REPORT_JOBS_EAGER=False)
+    def test_concurrent_request_reuses_the_winning_job(self):
+        winner = reports.request_report(reports.ALL_FEEDBACK_REPORT, 'all', 'v1')
+        # The other request looked before the winner's row existed
+        with mock.patch.object(reports, '_find_job', return_value=None):
+            loser = reports.request_report(reports.ALL_FEEDBACK_REPORT, 'all', 'v1')
+        self.assertEqual(loser.id, winner.id)
+        self.assertEqual(ReportJob.objects.count(), 1)
+
+class GenerateCampusTests(TestCase):
+
+    def generate(self, **options):
+        call_command(
+            'generate_campus', branches=1, divisions=2, students_per_division=3,
+            subjects_per_semester=2, semesters='3', stdout=io.StringIO(), **options
+        )
+        return list(Feedback.objects.order_by('student__prn_number', 'subject__code').values_list(
+            'student__prn_number', 'subject__code', 'overall_satisfaction', 'comments'
+        ))
+
+    def test_same_seed_same_campus(self):
+        first = self.generate(seed=7)
+        self.assertEqual(first, self.generate(seed=7, reset=True))
+        self.assertNotEqual(first, self.generate(seed=8, reset=True))
+        # Backdated and raw-deleted feedback is reflected in the rollups
+        institution = FeedbackRollup.objects.get(level=FeedbackRollup.INSTITUTION)
+        self.assertEqual(institution.responses, Feedback.objects.count())
+
+        # Obligations are written alongside the feedback, not by signals
+        self.assertEqual(FeedbackObligation.objects.count(), 2 * 3 * 2)
+        self.assertEqual(FeedbackObligation.objects.filter(is_fulfilled=True).count(), Feedback.objects.count())
+
+
+    def test_submissions_are_spread_and_counted(self):
+        self.generate(seed=7, spread_days=3)
+        created = Feedback.objects.values_list('created_at', flat=True)
+        self.assertGreater(len(set(created)), Feedback.objects.count() // 2)
+        self.assertGreater(max(created) - min(created), timedelta(hours=12))
+        self.assertLessEqual(max(created) - min(created), timedelta(days=3))
+        self.assertEqual(
+            sum(SubmissionCounter.objects.filter(resolution=SubmissionCounter.HOUR).values_list('count', flat=True)),
+            Feedback.objects.count()
+        )
+
+
+class EndpointBenchmarkTests(CampusFixtureMixin, TestCase):
+
+    def test_every_url_has_a_benchmark(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names - set(benchmarks.ENDPOINTS), set())
+        self.assertEqual(set(benchmarks.ENDPOINTS) - names, set())
+
+    @override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_run_and_compare(self):
+        results = benchmarks.run_benchmarks(iterations=1, warmup=0)
+        errors = {name: r['status'] for name, r in results['endpoints'].items() if r['status'] >= 500}
+        self.assertEqual(errors, {})
+
+        # Benchmark writes are rolled back
+        self.assertEqual(Feedback.objects.count(), 0)
+        self.assertEqual(Student.objects.count(), 3)
+
+        dashboard = results['endpoints']['class_teacher_dashboard']
+        self.assertGreater(dashboard['queries'], 0)
+        self.assertGreater(dashboard['rows'], 0)
+        self.assertEqual(benchmarks.compare(results, results), [])
+
+        worse = json.loads(json.dumps(results))
+        worse['endpoints']['class_teacher_dashboard']['queries'] += 1
+        self.assertEqual(len(benchmarks.compare(results, worse)), 1)
+
+
+class MetricsMiddlewareTests(CampusFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        middleware.reset()
+
+    def test_views_are_recorded_in_prometheus_format(self):
+        self.client.get('/api/branches/')
+        self.client.get('/api/branches/')
+        self.client.get('/api/class-teacher/dashboard/', {'username': 'nobody'})
+
+        body = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('feedback_http_requests_total{view="get_branches",method="GET",status="200"} 2', body)
+        self.assertIn('feedback_http_requests_total{view="class_teacher_dashboard",method="GET",status="404"} 1', body)
+        self.assertIn('feedback_db_queries_bucket{view="get_branches",le="1"} 2', body)
+        self.assertIn('feedback_http_request_duration_seconds_count{view="get_branches"} 2', body)
+
+    def test_histogram_buckets_are_fixed(self):
+        histogram = middleware.Histogram(middleware.QUERY_BUCKETS)
+        for value in (0, 1, 3, 10_000):
+            histogram.observe(value)
+        self.assertEqual(len(histogram.counts), len(middleware.QUERY_BUCKETS) + 1)
+        self.assertEqual((histogram.counts[0], histogram.counts[1], histogram.counts[3], histogram.counts[-1]), (1, 1, 1, 1))
+
+
+class TracingTests(CampusFixtureMixin, TestCase):
+
+    def test_server_timing_breaks_down_request(self):
+        response = self.submit(self.students[0], self.subjects[0])
+        timing = response['Server-Timing']
+        for name in ('db;dur=', 'sentiment;dur=', 'serialize;dur=', 'total;dur='):
+            self.assertIn(name, timing)
+
+    def test_slow_requests_are_logged_with_spans_and_sql(self):
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir, ignore_errors=True)
+        log_path = f'{log_dir}/trace.jsonl'
+
+        with override_settings(TRACE_LOG_PATH=log_path, TRACE_SLOW_MS=0, TRACE_TOP_SQL=2):
+            self.client.get('/api/class-teacher/dashboard/', {'username': 'T001'})
+
+        with open(log_path) as log_file:
+            entry = json.loads(log_file.readline())
+        self.assertEqual(entry['view'], 'class_teacher_dashboard')
+        self.assertEqual(len(entry['top_sql']), 2)
+        self.assertEqual(entry['spans'][0]['name'], 'serialize')
+        self.assertGreater(entry['db']['queries'], 2)
+
+
+class ProfilingTests(CampusFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, ignore_errors=True)
+        overrides = override_settings(PROFILE_DIR=self.profile_dir, PROFILER='cprofile')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def dashboard(self, **headers):
+        return self.client.get('/api/class-teacher/dashboard/', {'username': 'T001'}, headers=headers)
+
+    def test_signed_token_captures_profile(self):
+        self.assertNotIn('X-Profile', self.dashboard(**{'X-Profile-Token': 'forged:token'}))
+
+        response = self.dashboard(**{'X-Profile-Token': profiling.issue_token()})
+        self.assertTrue(response['X-Profile'].startswith('class_teacher_dashboard_'))
+        self.assertEqual([p.name for p in profiling.list_captures()], [response['X-Profile']])
+
+        out = io.StringIO()
+        call_command('profiles', 'show', '--limit', '5', stdout=out)
+        self.assertIn('function calls', out.getvalue())
+
+
+class SQLStatsTests(CampusFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        sqlstats.reset()
+
+    def test_normalize_collapses_literals_and_lists(self):
+        self.assertEqual(
+            sqlstats.normalize("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  AND n > 10"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? AND n > ?'
+        )
+        self.assertEqual(sqlstats.fingerprint('SELECT 1 WHERE a = %s'), sqlstats.fingerprint('SELECT 2 WHERE a = %s'))
+        self.assertEqual(sqlstats.param_shape([1, 'a', None]), '(int, str, NoneType)')
+
+    @override_settings(SLOW_QUERY_MS=0)
+    def test_slow_queries_logged_with_plan_and_caller(self):
+        with self.assertLogs('feedback_app.sql', 'WARNING') as logs:
+            self.client.get('/api/search/', {'q': 'PRN', 'type': 'student'})
+
+        search = next(row for row in sqlstats.snapshot() if 'LIKE' in row['sql'])
+        self.assertTrue(search['caller'].startswith('views.py:'))
+        self.assertTrue(search['caller'].endswith('in search_users'))
+        self.assertIn('feedback_app_student', search['full_scans'])
+        self.assertTrue(any('Slow query' in line for line in logs.output))
+
+        dump = self.client.get('/api/admin/sql-stats/', {'order_by': 'count', 'reset': 'true'}).json()
+        self.assertTrue(dump['statements'])
+
+
+class QueryBudgetTests(CampusFixtureMixin, TestCase):
+
+    def test_repeated_query_reported_as_n_plus_one_with_caller(self):
+        with self.assertRaises(QueryBudgetExceeded) as caught:
+            with assert_query_budget(repeat_threshold=3):
+                for student in Student.objects.all():
+                    student.user.username
+
+        message = str(caught.exception)
+        self.assertIn('N+1 at tests.py:', message)
+        self.assertIn('same query 3 times', message)
+        self.assertIn('feedback_app_customuser', message)
+
+        with self.assertRaises(QueryBudgetExceeded):
+            with assert_query_budget(1):
+                list(Student.objects.all())
+                list(Teacher.objects.all())
+
+    def test_student_subjects_query_count_independent_of_subjects(self):
+        def count_queries():
+            with assert_query_budget() as budget:
+                response = self.client.get('/api/student/subjects/', {'username': 'PRN001'})
+            self.assertEqual(response.status_code, 200)
+            return budget.count, len(response.json()['subjects'])
+
+        before, listed = count_queries()
+        for i in range(3, 9):
+            subject = Subject.objects.create(
+                code=f'CS23{i:02d}', name=f'Subject {i}', semester=self.semester, branch=self.branch
+            )
+            TeacherSubject.objects.create(teacher=self.teacher, subject=subject)
+        self.submit(self.students[0], self.subjects[0])
+
+        after, listed_after = count_queries()
+        self.assertEqual(listed_after, listed + 6)
+        self.assertEqual(after, before)
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_budget_logs_warning_when_not_strict(self):
+        @query_budget(1)
+        def usernames():
+            return [student.user.username for student in Student.objects.all()]
+
+        with self.assertLogs('feedback_app.querybudget', 'WARNING') as logs:
+            self.assertEqual(len(usernames()), 3)
+        self.assertIn('usernames: 4 queries, budget is 1', logs.output[0])
+
+
+class SentimentKeywordTests(TestCase):
+
+    def setUp(self):
+        sentiment.invalidate_keywords()
+        self.addCleanup(sentiment.invalidate_keywords)
+
+    def test_keywords_match_whole_words_only(self):
+        matcher = sentiment.keyword_matcher()
+        self.assertEqual(len(matcher.weights), 17)
+        self.assertEqual(matcher.matches('I know how to translate this'), set())
+        self.assertEqual(matcher.matches('Not clear, and often LATE.'), {'not', 'late'})
+
+    def test_weight_edits_rebuild_the_matcher(self):
+        self.assertEqual(sentiment.analyze_sentiment('He was absent twice')[0], 'negative')
+
+        keyword = SentimentKeyword.objects.get(word='absent')
+        keyword.weight = 0.5
+        with self.captureOnCommitCallbacks(execute=True):
+            keyword.save()
+        self.assertEqual(sentiment.keyword_matcher().weight('He was absent twice'), 0.5)
+        self.assertEqual(sentiment.analyze_sentiment('He was absent twice')[0], 'neutral')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SentimentKeyword.objects.create(word='Too  Fast', weight=2.0)
+        self.assertEqual(sentiment.keyword_matcher().matches('Lectures go too fast'), {'too fast'})
+
+    def test_placeholder_text_is_not_scored(self):
+        for text in ('', '   ', 'No comments', 'no suggestions.', 'N/A', '...', '-', 'ok', 'Nil!'):
+            self.assertEqual(sentiment.analyze_sentiment(text), (None, 0.0), msg=text)
+        self.assertEqual(sentiment.analyze_sentiment('No examples at all')[0], 'negative')
+        self.assertEqual(sentiment.analyze_sentiment('Bad')[0], 'negative')
+
+    @override_settings(SENTIMENT_KEYWORD_TTL=0)
+    def test_version_change_from_another_process_is_picked_up(self):
+        before = sentiment.keyword_matcher()
+        # bulk_create sends no signals, like a save in another worker
+        SentimentKeyword.objects.bulk_create([SentimentKeyword(word='monotonous')])
+        after = sentiment.keyword_matcher()
+        self.assertIsNot(after, before)
+        self.assertIn('monotonous', after.weights)
+        self.assertIs(sentiment.keyword_matcher(), after)
+
+
+class SentimentBackendTests(CampusFixtureMixin, TestCase):
+
+    def test_lexicon_backend_matches_textblob_polarity(self):
+        from .sample_text import COMMENTS, SUGGESTIONS
+        texts = [text for samples in (COMMENTS, SUGGESTIONS) for group in samples.values() for text in group]
+        texts += [
+            'Not a good teacher!', 'really not good', 'very very good', "I don't like the pace",
+            'not bad at all', 'Terribly slow. Hardly any examples :(', 'no real-world examples',
+            'The teacher is not very good.', 'not really very helpful',
+        ]
+        textblob, lexicon = sentiment.get_backend('textblob'), sentiment.get_backend('lexicon')
+        for text in texts:
+            self.assertAlmostEqual(lexicon.polarity(text), textblob.polarity(text), places=9, msg=text)
+
+        with self.assertRaises(ValueError):
+            sentiment.get_backend('vader')
+
+    def test_compare_command_reports_agreement(self):
+        self.submit(self.students[0], self.subjects[0])
+        self.submit(self.students[1], self.subjects[1], comments='Boring and confusing lectures.')
+
+        out = io.StringIO()
+        call_command('compare_sentiment_backends', '--repeat', '1', stdout=out)
+        self.assertIn('3 distinct texts (4 stored comments and suggestions)', out.getvalue())
+        self.assertIn('lexicon vs textblob: 100.00% labels agree', out.getvalue())
+
+    def test_benchmark_reports_speed_and_accuracy(self):
+        self.submit(self.students[0], self.subjects[0], comments='No comments')
+        texts, labels = benchmarks.sentiment_corpus()
+        self.assertEqual(texts[:2], ['No comments', 'Keep it up.'])
+        self.assertEqual(labels[:2], [None, None])
+
+        result = benchmarks.measure_sentiment(texts, labels, backend='lexicon', processes=2, repeat=1)
+        self.assertEqual(result['skipped'], 1)
+        self.assertGreater(result['pool_texts_per_s'], 0)
+        self.assertLessEqual(result['p50_us'], result['p99_us'])
+        self.assertEqual(sum(sum(row.values()) for row in result['confusion'].values()), len(texts) - 2)
+
+
+@override_settings(ROLLUP_REFRESH_INTERVAL=0, ROLLUP_REFRESH_OVERLAP=0)
+class RollupTests(CampusFixtureMixin, TestCase):
+
+    def analytics(self, **params):
+        return self.client.get('/api/hod/analytics/', params).json()
+
+    def test_incremental_refresh_matches_a_full_rebuild(self):
+        self.submit(self.students[0], self.subjects[0])
+        self.submit(self.students[1], self.subjects[0], overall_satisfaction=2, comments='Boring and confusing lectures.')
+        data = self.analytics(level='branch')
+        self.assertEqual(len(data['rows']), 1)
+        self.assertEqual(data['total']['responses'], 2)
+        self.assertEqual(data['total']['averages']['overall_satisfaction'], 3.5)
+        self.assertEqual(data['total']['rating_distribution'], {'1': 0, '2': 1, '3': 0, '4': 0, '5': 1})
+        self.assertEqual(data['total']['sentiment']['comments'], {'positive': 1, 'neutral': 0, 'negative': 1})
+
+        self.submit(self.students[2], self.subjects[1])
+        self.assertEqual(self.analytics(level='institution')['total']['responses'], 3)
+        subjects = self.analytics(level='subject', teacher_id=self.teacher.id)['rows']
+        self.assertEqual([row['subject__code'] for row in subjects], ['CS2301', 'CS2302'])
+        self.assertEqual([row['responses'] for row in subjects], [2, 1])
+
+        incremental = sorted(FeedbackRollup.objects.values_list('level', 'responses', 'sum_overall_satisfaction'))
+        rollups.refresh(full=True)
+        self.assertEqual(sorted(FeedbackRollup.objects.values_list('level', 'responses', 'sum_overall_satisfaction')), incremental)
+        self.assertEqual(rollups.refresh(), 1)  # only the newest cell is re-read at the watermark
+
+    def test_deleted_feedback_is_rolled_up_incrementally(self):
+        self.submit(self.students[0], self.subjects[0])
+        self.submit(self.students[1], self.subjects[0], overall_satisfaction=2)
+        self.submit(self.students[2], self.subjects[1])
+        rollups.refresh()
+
+        Feedback.objects.filter(student=self.students[1]).delete()
+        Feedback.objects.filter(subject=self.subjects[1]).delete()
+        self.assertEqual(rollups.refresh(), 2)
+        subjects = self.analytics(level='subject', teacher_id=self.teacher.id)['rows']
+        self.assertEqual([(row['subject__code'], row['responses']) for row in subjects], [('CS2301', 1)])
+        self.assertEqual(self.analytics(level='institution')['total']['rating_distribution']['2'], 0)
+        self.assertFalse(StaleRollupCell.objects.exists())
+
+        incremental = sorted(FeedbackRollup.objects.values_list('level', 'responses', 'sum_overall_satisfaction'))
+        rollups.refresh(full=True)
+        self.assertEqual(sorted(FeedbackRollup.objects.values_list('level', 'responses', 'sum_overall_satisfaction')), incremental)
+
+    def test_each_node_has_one_row(self):
+        self.submit(self.students[0], self.subjects[0])
+        rollups.refresh()
+        node = FeedbackRollup.objects.get(level=FeedbackRollup.DIVISION)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            FeedbackRollup.objects.create(
+                level=node.level, branch_id=node.branch_id, year_id=node.year_id,
+                semester_id=node.semester_id, division_id=node.division_id
+            )
+        # A refresh that loses that race to a concurrent one is dropped, not raised
+        with mock.patch.object(rollups, '_refresh', side_effect=IntegrityError):
+            self.assertEqual(rollups.refresh(), 0)
+
+    def test_filters_must_belong_to_the_level(self):
+        response = self.client.get('/api/hod/analytics/', {'level': 'branch', 'teacher_id': self.teacher.id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/hod/analytics/', {'level': 'campus'}).status_code, 400)
+
+
+class RankingTests(CampusFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        ranking.invalidate()
+        self.addCleanup(ranking.invalidate)
+
+    def test_few_responses_are_shrunk_toward_the_prior(self):
+        counts = [
+            [0, 0, 0, 0, 3],      # three perfect scores
+            [0, 0, 6, 48, 246],   # 300 responses averaging 4.8
+            [10, 10, 10, 10, 10],
+        ]
+        table = ranking.Ranking(None, [1, 2, 3], [7, 7, None], counts, prior_weight=20)
+        self.assertEqual(list(table.teacher_ids), [2, 1, 3])
+        self.assertEqual(list(table.rank), [1, 2, 3])
+        self.assertEqual(list(table.percentile.round(1)), [66.7, 33.3, 0.0])
+        self.assertEqual(list(table.branch_rank), [1, 2, 1])
+        self.assertEqual(table.rows(table.select(branch_id=7, min_responses=10))[0]['teacher_id'], 2)
+
+    def test_leaderboard_is_cached_until_feedback_changes(self):
+        self.submit(self.students[0], self.subjects[0])
+        first = self.client.get('/api/admin/teacher-rankings/').json()
+        self.assertEqual(first['rankings'][0]['name'], 'Asha Rao')
+        self.assertEqual(first['rankings'][0]['responses'], 1)
+
+        cached = ranking.get_ranking()
+        with self.assertNumQueries(1):  # the version lookup only
+            self.assertIs(ranking.get_ranking(), cached)
+        self.submit(self.students[1], self.subjects[0])
+        self.assertIsNot(ranking.get_ranking(), cached)
+        self.assertEqual(self.client.get('/api/admin/teacher-rankings/').json()['rankings'][0]['responses'], 2)
+
+        # Deleting older feedback leaves the version alone; the signal drops the cache
+        with self.captureOnCommitCallbacks(execute=True):
+            Feedback.objects.filter(student=self.students[0]).delete()
+        self.assertEqual(self.client.get('/api/admin/teacher-rankings/').json()['rankings'][0]['responses'], 1)
+        self.assertEqual(self.client.get('/api/admin/teacher-rankings/', {'page': 'x'}).status_code, 400)
+
+
+class TrendTests(CampusFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        trends.invalidate()
+        self.addCleanup(trends.invalidate)
+
+    def test_closed_semesters_are_not_recomputed(self):
+        self.submit(self.students[0], self.subjects[0], overall_satisfaction=3)
+        self.submit(self.students[1], self.subjects[0], comments='Boring and confusing lectures.')
+
+        series = self.client.get('/api/trends/', {'teacher_id': self.teacher.id}).json()['series']
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]['responses'], 2)
+        self.assertEqual(series[0]['averages']['overall_satisfaction'], 4.0)
+        self.assertEqual(series[0]['sentiment_mix'], {'positive': 50.0, 'neutral': 0.0, 'negative': 50.0})
+
+        Semester.objects.filter(id=self.semester.id).update(closed_at=timezone.now())
+        self.assertEqual(trends.trend(teacher=self.teacher.id)[0]['responses'], 2)
+        # Closed semesters take no late feedback or re-scoring, and no feedback is read
+        self.assertEqual(self.submit(self.students[2], self.subjects[1]).status_code, 400)
+        Feedback.objects.update(sentiment_version='textblob.0.old')
+        self.assertEqual(rescoring.rescore()[0], 0)
+        with self.assertNumQueries(1):
+            series = trends.trend(teacher=self.teacher.id)
+        self.assertEqual((series[0]['responses'], series[0]['closed']), (2, True))
+
+        Semester.objects.filter(id=self.semester.id).update(closed_at=None)
+        self.assertEqual(self.submit(self.students[2], self.subjects[1]).status_code, 201)
+        self.assertEqual(trends.trend(teacher=self.teacher.id)[0]['responses'], 3)
+        self.assertEqual(self.client.get('/api/trends/').status_code, 400)
+
+    @override_settings(TREND_CACHE_SIZE=2)
+    def test_cache_evicts_the_least_recently_used_point(self):
+        first, second, third = [((('teacher', n),), self.semester.id, None) for n in (1, 2, 3)]
+        trends._remember(first, None)
+        trends._remember(second, None)
+        self.assertIsNone(trends._recall(first))  # a hit makes `first` the most recent
+        trends._remember(third, None)
+        self.assertIs(trends._recall(second), trends._MISSING)
+        self.assertIsNone(trends._recall(first))
+
+
+@override_settings(SUBMISSION_RATE_FLUSH_SECONDS=3600)
+class SubmissionRateTests(CampusFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        rates.flush()  # start from empty rings
+        SubmissionCounter.objects.all().delete()
+
+    def test_rates_come_from_buffered_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.submit(self.students[0], self.subjects[0])
+            self.submit(self.students[1], self.subjects[0])
+        # Buffered in this process until the flush interval passes
+        self.assertFalse(SubmissionCounter.objects.exists())
+
+        data = self.client.get('/api/admin/submission-rates/', {'branch_id': self.branch.id, 'minutes': 5}).json()
+        self.assertEqual(SubmissionCounter.objects.count(), 2)  # one minute and one hour row
+        self.assertEqual(len(data['per_minute']), 5)
+        self.assertEqual(data['per_minute'][-1]['count'], 2)
+        self.assertEqual(data['per_hour'][-1]['count'], 2)
+        self.assertEqual(data['completion']['pending'], 4)
+
+        ring = rates.RateRing(60, 4)
+        start = timezone.now()
+        for minute in range(6):
+            ring.add((1, 1, None), start + timedelta(minutes=minute))
+        self.assertEqual(len(ring.drain()), 4)  # the two oldest minutes were overwritten
+        self.assertEqual(ring.drain(), [])
+
+    @override_settings(TIME_ZONE='Asia/Kolkata')
+    def test_buckets_follow_the_local_clock(self):
+        ring = rates.RateRing(3600, 4)
+        ring.add((1, 1, None), datetime(2026, 10, 19, 5, 20, tzinfo=dt_timezone.utc))  # 10:50 in Kolkata
+        [(start, cell, n)] = ring.drain()
+        self.assertEqual(timezone.localtime(start).replace(tzinfo=None), datetime(2026, 10, 19, 10, 0))
+        self.assertEqual(start, datetime(2026, 10, 19, 4, 30, tzinfo=dt_timezone.utc))
+
+    def test_first_flush_of_a_process_prunes(self):
+        with mock.patch.object(rates, '_last_prune', None), mock.patch.object(rates, 'compact') as compact:
+            rates.flush()
+            rates.flush()
+        self.assertEqual(compact.call_count, 1)
+
+    def test_closed_buckets_are_compacted(self):
+        now = timezone.now()
+        this_hour = rates.bucket_start(rates.bucket_of(now, 3600), 3600)
+        last_hour = this_hour - timedelta(hours=1)
+        cell = {'branch': self.branch, 'semester': self.semester, 'division': self.division}
+        SubmissionCounter.objects.bulk_create([
+            SubmissionCounter(resolution=SubmissionCounter.HOUR, bucket_start=start, count=2, **cell)
+            for start in (last_hour, last_hour, last_hour, this_hour, this_hour)
+        ] + [SubmissionCounter(resolution=SubmissionCounter.HOUR, bucket_start=last_hour, count=1,
+                               branch=self.branch, semester=self.semester, division=None)])
+        before = rates.curve(SubmissionCounter.HOUR, 3, self.branch.id, now=now)
+
+        self.assertEqual(rates.compact(now), 2)
+        self.assertEqual(
+            list(SubmissionCounter.objects.values_list('bucket_start', 'division_id', 'count').order_by(
+                'bucket_start', F('division_id').asc(nulls_first=True), 'id'
+            )),
+            [(last_hour, None, 1), (last_hour, self.division.id, 6),
+             (this_hour, self.division.id, 2), (this_hour, self.division.id, 2)]
+        )
+        self.assertEqual(rates.curve(SubmissionCounter.HOUR, 3, self.branch.id, now=now), before)
+        self.assertEqual(rates.compact(now), 0)
+
+    def test_completion_is_projected_from_the_recent_rate(self):
+        now = timezone.now()
+        SubmissionCounter.objects.bulk_create([
+            SubmissionCounter(resolution=SubmissionCounter.MINUTE, bucket_start=now - timedelta(minutes=minutes),
+                              branch=self.branch, semester=self.semester, division=self.division, count=1)
+            for minutes in range(1, 7)
+        ])
+        data = rates.submission_rates(branch_id=self.branch.id, minutes=7)
+        self.assertEqual(data['rate_per_hour'], 60.0)
+        projected = datetime.fromisoformat(data['projected_completion_at'])
+        # 6 obligations left at one per minute
+        self.assertAlmostEqual((projected - now).total_seconds(), 360, delta=5)
+
+
+class ClassEventTests(CampusFixtureMixin, TestCase):
+
+    def submit_all(self, student):
+        for subject in self.subjects:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.submit(student, subject)
+
+    @override_settings(EVENTS_MAX_STREAM_SECONDS=2, EVENTS_KEEPALIVE_SECONDS=0.2)
+    async def test_stream_pushes_completion_and_finished_students(self):
+        response = await self.async_client.get('/api/class-teacher/events/', {'username': 'T001'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        first = (await anext(stream)).decode()
+        self.assertTrue(first.startswith('retry: '))
+        self.assertIn('"expected": 6, "received": 0', first)
+
+        await sync_to_async(self.submit_all)(self.students[0])
+        received = [(await asyncio.wait_for(anext(stream), 1)).decode() for _ in range(3)]
+        self.assertIn('"received": 1', received[0])
+        self.assertIn('"received": 2', received[1])
+        self.assertTrue(received[2].startswith('event: student-completed'))
+        self.assertIn('"prn": "PRN001"', received[2])
+
+        # Idle: keepalives until the stream's lifetime is up, then it unsubscribes
+        rest = [chunk.decode() async for chunk in stream]
+        self.assertIn(': keepalive\n\n', rest)
+        self.assertFalse(events.broker.watched(events.class_key(self.branch.id, self.semester.id, self.division.id)))
+
+    def test_polling_backend_reports_only_changes(self):
+        key = events.class_key(self.branch.id, self.semester.id, self.division.id)
+        state = {}
+        events._poll_once(key, state)
+        self.assertEqual(events._poll_once(key, state), [])
+
+        self.submit_all(self.students[1])
+        changes = events._poll_once(key, state)
+        self.assertEqual([event['event'] for event in changes], ['completion', 'student-completed'])
+        self.assertEqual(changes[0]['data']['students_complete'], 1)
+        self.assertEqual(self.client.get('/api/class-teacher/events/', {'username': 'PRN001'}).status_code, 404)
+
+
+
+class AsyncViewTests(CampusFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        middleware.reset()
+
+    async def test_async_variants_match_sync_views(self):
+        await sync_to_async(self.submit)(self.students[0], self.subjects[0])
+        for path, params in (
+            ('student/dashboard/', {'username': 'PRN001'}), ('admin/statistics/', None), ('branches/', None),
+            ('years/', None), (f'semesters/{self.year.id}/', None), ('divisions/', None),
+        ):
+            expected = await sync_to_async(self.client.get)(f'/api/{path}', params)
+            response = await self.async_client.get(f'/api/async/{path}', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), expected.json())
+
+        missing = await self.async_client.get('/api/async/student/dashboard/', {'username': 'nobody'})
+        self.assertEqual(missing.status_code, 404)
+
+    def test_async_requests_are_metered_and_traced(self):
+        async def get():
+            return await self.async_client.get('/api/async/student/dashboard/', {'username': 'PRN001'})
+
+        # The three queries run in the ORM's executor thread and are still counted
+        response = async_to_sync(get)()
+        self.assertIn('desc="3 queries"', response['Server-Timing'])
+        body = self.client.get('/api/metrics/').content.decode()
+        self.assertIn('feedback_db_queries_bucket{view="student_dashboard_async",le="2"} 0', body)
+        self.assertIn('feedback_db_queries_bucket{view="student_dashboard_async",le="5"} 1', body)
+
+class RescoringTests(CampusFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        sentiment.invalidate_keywords()
+        self.addCleanup(sentiment.invalidate_keywords)
+        for student in self.students:
+            self.submit(student, self.subjects[0], comments='He was absent twice')
+
+    def test_rows_scored_by_an_older_rules_revision_are_stale(self):
+        version = sentiment.analyzer_version('lexicon')
+        backend, revision, digest = version.split('.')
+        Feedback.objects.update(sentiment_version=f'{backend}.{int(revision) - 1}.{digest}')
+        self.assertEqual(rescoring.stale(version).count(), 3)
+        self.assertEqual(rescoring.rescore(backend='lexicon'), (3, version))
+        self.assertFalse(rescoring.stale(version).exists())
+
+    def test_only_stale_rows_are_rescored(self):
+        version = sentiment.analyzer_version()
+        self.assertEqual(set(Feedback.objects.values_list('sentiment_version', flat=True)), {version})
+        self.assertEqual(rescoring.rescore()[0], 0)
+
+        Feedback.objects.filter(student=self.students[0]).update(sentiment_version='textblob.0.old')
+        keyword = SentimentKeyword.objects.get(word='absent')
+        keyword.weight = 0.5
+        with self.captureOnCommitCallbacks(execute=True):
+            keyword.save()
+
+        new_version = sentiment.analyzer_version()
+        self.assertNotEqual(new_version, version)
+        done, stamped = rescoring.rescore(batch_size=2, limit=2)
+        self.assertEqual((done, stamped), (2, new_version))
+        self.assertEqual(rescoring.rescore()[0], 1)
+        self.assertEqual(set(Feedback.objects.values_list('comment_sentiment', flat=True)), {'neutral'})
+
+    def test_shadow_scoring_leaves_live_columns_alone(self):
+        out = io.StringIO()
+        call_command('rescore_sentiments', '--backend', 'lexicon', '--shadow', stdout=out)
+        self.assertIn('Re-scored 3 feedback entries (shadow)', out.getvalue())
+
+        feedback = Feedback.objects.first()
+        self.assertEqual(feedback.sentiment_version, sentiment.analyzer_version())
+        self.assertEqual(feedback.shadow_sentiment_version, sentiment.analyzer_version('lexicon'))
+        self.assertEqual(feedback.shadow_comment_sentiment, feedback.comment_sentiment)
+
+        result = rescoring.compare_shadow(sentiment.analyzer_version('lexicon'))
+        self.assertEqual((result['texts'], result['agreement']), (6, 1.0))
+
+
+class StartupTests(TestCase):
+
+    def test_heavy_libraries_load_only_when_preloaded(self):
+        lazy = benchmarks.measure_startup(preload=False, repeat=1)
+        self.assertFalse({'textblob', 'openpyxl'} & set(lazy['heavy_modules']))
+
+        preloaded = benchmarks.measure_startup(preload=True, repeat=1)
+        self.assertTrue({'textblob', 'openpyxl'} <= set(preloaded['heavy_modules']))
+        self.assertGreater(preloaded['rss_kb'], 0)
+
+    def test_warm_up_takes_lexicon_loading_off_the_first_call(self):
+        cold = benchmarks.measure_startup(repeat=1)
+        warm = benchmarks.measure_startup(warmup=True, repeat=1)
+        self.assertIn('textblob', warm['heavy_modules'])
+        self.assertLess(warm['first_sentiment_ms'], cold['first_sentiment_ms'])
@@ -0,0 +1,167 @@
+# feedback_app/tracing.py
+
+"""
+Lightweight request tracing.
+
+TracingMiddleware opens a Trace for each request in a context variable and
+times every SQL statement through a database execute wrapper. Code on hot
+paths marks phases with `span('name')`, used as a context manager or
+decorator; outside a traced request it does nothing. SQL time is subtracted
+from the spans it ran under, so the Server-Timing breakdown (db, sentiment,
+render, serialize, ...) does not double count. Slow requests can be sampled
+into a JSON-lines log with their span tree and slowest statements.
+"""
+
+import contextvars
+import heapq
+import itertools
+import json
+import random
+import threading
+import time
+from contextlib import ContextDecorator
+
+from django.conf import settings
+
+_current = contextvars.ContextVar('feedback_trace', default=None)
+_sequence = itertools.count()
+
+
+class Span:
+    __slots__ = ('name', 'start', 'end', 'sql', 'children')
+
+    def __init__(self, name):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.sql = 0.0  # SQL seconds spent while this span was open
+        self.children = []
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def as_dict(self, origin):
+        return {
+            'name': self.name,
+            'start_ms': round((self.start - origin) * 1000, 3),
+            'duration_ms': round(self.duration * 1000, 3),
+            'sql_ms': round(self.sql * 1000, 3),
+            'children': [child.as_dict(origin) for child in self.children],
+        }
+
+
+class Trace:
+    """Span tree, SQL totals and the slowest statements of one request"""
+
+    def __init__(self, top_sql=5):
+        self.root = Span('request')
+        self.stack = [self.root]
+        self.totals = {}  # span name -> seconds excluding SQL
+        self.sql_count = 0
+        self.top_sql = top_sql
+        self.slowest = []  # min-heap of (seconds, sequence, sql)
+
+    def record_sql(self, execute, sql, params, many, context):
+        """Database execute wrapper"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.sql_count += 1
+            for open_span in self.stack:
+                open_span.sql += elapsed
+            if self.top_sql:
+                entry = (elapsed, next(_sequence), sql)
+                if len(self.slowest) < self.top_sql:
+                    heapq.heappush(self.slowest, entry)
+                else:
+                    heapq.heappushpop(self.slowest, entry)
+
+    def server_timing(self):
+        """Server-Timing header value"""
+        parts = [f'db;dur={self.root.sql * 1000:.1f};desc="{self.sql_count} queries"']
+        parts.extend(f'{name};dur={seconds * 1000:.1f}' for name, seconds in self.totals.items())
+        parts.append(f'total;dur={self.root.duration * 1000:.1f}')
+        return ', '.join(parts)
+
+    def as_dict(self):
+        return {
+            'duration_ms': round(self.root.duration * 1000, 3),
+            'db': {'queries': self.sql_count, 'ms': round(self.root.sql * 1000, 3)},
+            'spans': [child.as_dict(self.root.start) for child in self.root.children],
+            'top_sql': [
+                {'ms': round(seconds * 1000, 3), 'sql': sql[:1000]}
+                for seconds, _, sql in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+
+class span(ContextDecorator):
+    """Time a block or function as a named child of the current span"""
+
+    def __init__(self, name):
+        self.name = name
+        self.trace = None
+
+    def _recreate_cm(self):
+        # Decorated functions get a fresh instance per call (threads, recursion)
+        return span(self.name)
+
+    def __enter__(self):
+        self.trace = _current.get()
+        if self.trace is None:
+            return None
+        child = Span(self.name)
+        self.trace.stack[-1].children.append(child)
+        self.trace.stack.append(child)
+        return child
+
+    def __exit__(self, *exc_info):
+        trace = self.trace
+        if trace is None:
+            return False
+        child = trace.stack.pop()
+        child.end = time.perf_counter()
+        trace.totals[child.name] = trace.totals.get(child.name, 0.0) + child.duration - child.sql
+        return False
+
+
+def start(top_sql=5):
+    trace = Trace(top_sql=top_sql)
+    return trace, _current.set(trace)
+
+
+def finish(trace, token):
+    trace.root.end = time.perf_counter()
+    _current.reset(token)
+
+
+#  SLOW REQUEST LOG
+
+_log_lock = threading.Lock()
+
+
+def should_log(trace):
+    if not settings.TRACE_LOG_PATH:
+        return False
+    if trace.root.duration * 1000 < settings.TRACE_SLOW_MS:
+        return False
+    return random.random() < settings.TRACE_SAMPLE_RATE
+
+
+def log_request(trace, request, response):
+    match = request.resolver_match
+    entry = {
+        'timestamp': time.time(),
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else None,
+        'status': response.status_code,
+        **trace.as_dict(),
+    }
+    line = json.dumps(entry, default=str)
+    with _log_lock:
+        with open(settings.TRACE_LOG_PATH, 'a', encoding='utf-8') as log_file:
+            log_file.write(line + '\n')
@@ -0,0 +1,120 @@
+# feedback_app/trends.py
+
+"""
+Semester-over-semester feedback trends for a teacher, a subject or a branch.
+
+Each point of a series is one Feedback.semester: response count, the mean
+of every rating dimension and the comment sentiment mix. All points of a
+scope come from one grouped query.
+
+Feedback for a closed semester (Semester.closed_at set) is final:
+submit_feedback refuses it and sentiment re-scoring skips it. Its point is
+therefore cached per process (least recently used first out) and never
+recomputed. The cache key includes closed_at, so reopening and closing a
+semester again produces a new entry. Once the history is cached, the grouped
+query covers only the open semesters, and a five-year chart costs about as
+much as a single semester.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Avg, Count, Q
+
+from .models import Feedback, Semester
+
+RATING_FIELDS = (
+    'teaching_effectiveness', 'course_content', 'interaction_quality', 'assignment_feedback', 'overall_satisfaction',
+)
+SENTIMENTS = ('positive', 'neutral', 'negative')
+SCOPES = {'teacher': 'teacher_id', 'subject': 'subject_id', 'branch': 'subject__branch_id'}
+
+_closed = OrderedDict()  # (scope, semester_id, closed_at) -> point, or None for no feedback
+_closed_lock = threading.Lock()
+_MISSING = object()
+
+
+def _point(row):
+    responses = row['responses']
+    return {
+        'responses': responses,
+        'averages': {
+            field: round(row[f'avg_{field}'], 2) if row[f'avg_{field}'] is not None else None
+            for field in RATING_FIELDS
+        },
+        'sentiment': {label: row[label] for label in SENTIMENTS},
+        'sentiment_mix': {
+            label: round(row[label] / responses * 100, 1) if responses else 0 for label in SENTIMENTS
+        },
+    }
+
+
+def _recall(key):
+    """Cached point for `key` (None for no feedback), or _MISSING"""
+    with _closed_lock:
+        point = _closed.get(key, _MISSING)
+        if point is not _MISSING:
+            _closed.move_to_end(key)
+        return point
+
+
+def _remember(key, point):
+    with _closed_lock:
+        _closed[key] = point
+        _closed.move_to_end(key)
+        while len(_closed) > settings.TREND_CACHE_SIZE:
+            _closed.popitem(last=False)
+
+
+def semester_points(feedback, semester_ids):
+    """{semester_id: point} for `semester_ids`, from one grouped query"""
+    if not semester_ids:
+        return {}
+    rows = feedback.filter(semester_id__in=semester_ids).values('semester_id').annotate(
+        responses=Count('id'),
+        **{f'avg_{field}': Avg(field) for field in RATING_FIELDS},
+        **{label: Count('id', filter=Q(comment_sentiment=label)) for label in SENTIMENTS},
+    ).order_by()
+    return {row['semester_id']: _point(row) for row in rows}
+
+
+def trend(**filters):
+    """
+    Per-semester series for feedback matching `filters` (teacher, subject
+    and/or branch ids), oldest semester first
+    """
+    unknown = set(filters) - set(SCOPES)
+    if unknown or not filters:
+        raise ValueError(f"Filter trends by one or more of: {', '.join(SCOPES)}")
+    scope = tuple(sorted(filters.items()))
+    feedback = Feedback.objects.filter(**{SCOPES[name]: value for name, value in filters.items()})
+
+    semesters = list(Semester.objects.select_related('year').order_by('number', 'year__name'))
+    points, missing = {}, []
+    for semester in semesters:
+        point = _recall((scope, semester.id, semester.closed_at)) if semester.closed_at is not None else _MISSING
+        if point is _MISSING:
+            missing.append(semester.id)
+        else:
+            points[semester.id] = point
+
+    fresh = semester_points(feedback, missing)
+    recomputed = set(missing)
+    points.update(fresh)
+    for semester in semesters:
+        if semester.closed_at is not None and semester.id in recomputed:
+            _remember((scope, semester.id, semester.closed_at), fresh.get(semester.id))
+
+    return [{
+        'semester_id': semester.id,
+        'semester': semester.number,
+        'year': semester.year.name,
+        'closed': semester.closed_at is not None,
+        **points[semester.id],
+    } for semester in semesters if points.get(semester.id)]
+
+
+def invalidate():
+    with _closed_lock:
+        _closed.clear()
@@ -17,6 +17,7 @@ urlpatterns = [
     path('teacher/download-data/', views.download_feedback_data, name='download_feedback'),
     #  CLASS TEACHER ENDPOINTS 
     path('class-teacher/dashboard/', views.class_teacher_dashboard, name='class_teacher_dashboard'),
+    path('class-teacher/events/', views.class_teacher_events, name='class_teacher_events'),
     path('class-teacher/student-tracking/', views.class_teacher_student_tracking, name='class_teacher_tracking'),
     path('class-teacher/download-report/', views.download_class_teacher_report, name='download_class_report'),
     #  ADMIN - CREATE ENDPOINTS 
@@ -44,17 +45,33 @@ urlpatterns = [
     path('admin/all-subjects/', views.get_all_subjects, name='get_all_subjects'),  # NEW - For View Subjects tab
     path('admin/manage-access/', views.manage_access, name='manage_access'),
     path('admin/statistics/', views.get_admin_statistics, name='get_admin_statistics'),  # NEW
+    path('admin/completion-statistics/', views.get_completion_statistics, name='completion_statistics'),
+    path('admin/submission-rates/', views.get_submission_rates, name='submission_rates'),
+    path('hod/analytics/', views.get_hod_analytics, name='hod_analytics'),
+    path('admin/teacher-rankings/', views.get_teacher_rankings, name='teacher_rankings'),
+    path('trends/', views.get_feedback_trends, name='feedback_trends'),
     #  ADMIN - REPORTS 
     path('admin/download-all-feedback/', views.download_all_feedback_report, name='download_all_feedback'),  # NEW
+    path('reports/jobs/<int:job_id>/', views.report_job_status, name='report_job_status'),
+    path('reports/jobs/<int:job_id>/download/', views.download_report_job, name='download_report_job'),
     #  DATA ENDPOINTS (PUBLIC) 
     path('branches/', views.get_branches, name='get_branches'),
     path('years/', views.get_years, name='get_years'),
     path('semesters/<int:year_id>/', views.get_semesters, name='get_semesters'),
     path('subjects/<int:year_id>/<int:branch_id>/<int:semester_id>/', views.get_subjects, name='get_subjects'),
     path('divisions/', views.get_divisions, name='get_divisions'),
+    #  ASYNC VARIANTS (ASGI)
+    path('async/student/dashboard/', views.student_dashboard_async, name='student_dashboard_async'),
+    path('async/admin/statistics/', views.get_admin_statistics_async, name='get_admin_statistics_async'),
+    path('async/branches/', views.get_branches_async, name='get_branches_async'),
+    path('async/years/', views.get_years_async, name='get_years_async'),
+    path('async/semesters/<int:year_id>/', views.get_semesters_async, name='get_semesters_async'),
+    path('async/divisions/', views.get_divisions_async, name='get_divisions_async'),
     #  SEARCH & UTILITY 
     path('search/', views.search_users, name='search_users'),  # NEW
     path('health/', views.health_check, name='health_check'),  # NEW
+    path('metrics/', views.metrics, name='metrics'),
+    path('admin/sql-stats/', views.get_sql_stats, name='sql_stats'),
         #  TEACHER-SUBJECT ASSIGNMENT ENDPOINTS 
     path('admin/subjects-by-class/', views.get_subjects_by_class, name='subjects_by_class'),
     path('admin/assign-subject-to-teacher/', views.assign_subject_to_teacher, name='assign_subject_to_teacher'),
@@ -1,53 +1,41 @@
 
-from textblob import TextBlob
+import asyncio
 import re
+from asgiref.sync import sync_to_async
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, Http404, StreamingHttpResponse
 from django.contrib.auth import authenticate, login, logout
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
-from django.db import transaction
-from django.db.models import Avg, Count, Q
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Avg, Count, Exists, OuterRef, Prefetch, Q
+from django.utils import timezone
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import csv
-import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment
-from openpyxl.utils import get_column_letter
 
 from .models import (
     CustomUser, Student, Teacher, Subject, Branch, Year,
-    Semester, Feedback, FeedbackSummary, Division, TeacherSubject
+    Semester, Feedback, FeedbackSummary, Division, TeacherSubject,
+    IdempotencyKey, FeedbackObligation, ReportJob
+)
+from .completion import CompletionMatrix
+from .events import broker as event_broker, class_key, completion_event
+from .middleware import render_prometheus
+from .querybudget import query_budget
+from .sentiment import analyze_sentiment, analyzer_version
+from .sqlstats import snapshot as sql_stats_snapshot, reset as reset_sql_stats
+from .tracing import span
+from .obligations import CURRENT, class_students, completion_stats, completion_by, scoped
+from .ranking import get_ranking
+from .rates import submission_rates
+from .trends import trend as feedback_trend
+from .rollups import LEVELS as ROLLUP_LEVELS, refresh_if_due as refresh_rollups, slice_rollups
+from .reports import (
+    request_report, class_report_version, all_feedback_version,
+    download_filename, REPORT_TYPES, CLASS_REPORT, ALL_FEEDBACK_REPORT
 )
-
-#SENTIMENT ANALYSIS
-
-def analyze_sentiment(text):
-    """Analyze sentiment of text and return sentiment label and score"""
-    if not text or text.strip() == '':
-        return None, 0.0
-    
-    text_lower = text.lower()
-    
-    negative_keywords = [
-        'not', 'no', 'bad', 'poor', 'worst', 'terrible', 'awful',
-        'useless', 'waste', 'boring', 'confusing', 'difficult',
-        'never', 'late', 'absent', 'rude', 'unprofessional'
-    ]
-    
-    has_negative_keywords = any(keyword in text_lower for keyword in negative_keywords)
-    
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    
-    if has_negative_keywords and polarity <= 0:
-        return 'negative', polarity
-    elif polarity > 0.05:
-        return 'positive', polarity
-    elif polarity < -0.05:
-        return 'negative', polarity
-    else:
-        return 'neutral', polarity
 
 #AUTHENTICATION
 
@@ -126,6 +114,37 @@ def logout_view(request):
 
 #STUDENT VIEWS
 
+def _recent_student_feedback(student):
+    return Feedback.objects.filter(student=student).select_related(
+        'subject', 'teacher', 'teacher__user'
+    ).order_by('-created_at')[:5]
+
+def _student_dashboard_payload(user, student, feedback_count, recent_feedback):
+    recent_data = [{
+        'subject': fb.subject.name,
+        'teacher': fb.teacher.user.get_full_name(),
+        'rating': fb.overall_satisfaction,
+        'date': fb.created_at.strftime('%Y-%m-%d')
+    } for fb in recent_feedback]
+    
+    division_str = f"Division {student.division.name}" if student.division else "N/A"
+    
+    return {
+        'success': True,
+        'student': {
+            'prn': student.prn_number,
+            'name': user.get_full_name(),
+            'year': student.year.name,
+            'branch': student.branch.name,
+            'semester': f"Semester {student.semester.number}",
+            'division': division_str,
+            'email': user.email
+        },
+        'feedback_submitted': feedback_count,
+        'recent_feedback': recent_data
+    }
+
+@query_budget(10)
 def student_dashboard(request):
     """Get student dashboard data"""
     try:
@@ -140,34 +159,10 @@ def student_dashboard(request):
         student.refresh_from_db()
         
         feedback_count = Feedback.objects.filter(student=student).count()
+        recent_feedback = _recent_student_feedback(student)
         
-        recent_feedback = Feedback.objects.filter(student=student).select_related(
-            'subject', 'teacher', 'teacher__user'
-        ).order_by('-created_at')[:5]
-        
-        recent_data = [{
-            'subject': fb.subject.name,
-            'teacher': fb.teacher.user.get_full_name(),
-            'rating': fb.overall_satisfaction,
-            'date': fb.created_at.strftime('%Y-%m-%d')
-        } for fb in recent_feedback]
-        
-        division_str = f"Division {student.division.name}" if student.division else "N/A"
-        
-        return JsonResponse({
-            'success': True,
-            'student': {
-                'prn': student.prn_number,
-                'name': user.get_full_name(),
-                'year': student.year.name,
-                'branch': student.branch.name,
-                'semester': f"Semester {student.semester.number}",
-                'division': division_str,
-                'email': user.email
-            },
-            'feedback_submitted': feedback_count,
-            'recent_feedback': recent_data
-        })
+        with span('serialize'):
+            return JsonResponse(_student_dashboard_payload(user, student, feedback_count, recent_feedback))
         
     except CustomUser.DoesNotExist:
         return JsonResponse({'error': 'Student not found'}, status=404)
@@ -495,122 +490,310 @@ def bulk_add_students(request):
 
 #STATISTICS & REPORTS
 
+def _admin_count_querysets():
+    return {
+        'total_students': Student.objects.all(),
+        'total_teachers': Teacher.objects.all(),
+        'total_subjects': Subject.objects.all(),
+        'total_feedback': Feedback.objects.all(),
+        'active_students': Student.objects.filter(user__is_active=True),
+        'active_teachers': Teacher.objects.filter(user__is_active=True),
+    }
+
+def _admin_rating_averages():
+    return {
+        'avg_overall': Avg('overall_satisfaction'),
+        'avg_teaching': Avg('teaching_effectiveness'),
+        'avg_content': Avg('course_content')
+    }
+
+def _branch_distribution():
+    return Student.objects.values('branch__name').annotate(count=Count('id')).order_by('-count')
+
+def _year_distribution():
+    return Student.objects.values('year__name').annotate(count=Count('id')).order_by('year__name')
+
+def _recent_admin_feedback():
+    return Feedback.objects.select_related(
+        'student', 'student__user', 'teacher', 'teacher__user', 'subject'
+    ).order_by('-created_at')[:10]
+
+def _admin_statistics_payload(counts, avg_ratings, branch_distribution, year_distribution, recent_feedback):
+    recent_feedback_data = [{
+        'id': fb.id,
+        'student': fb.student.user.get_full_name() if not fb.is_anonymous else 'Anonymous',
+        'teacher': fb.teacher.user.get_full_name(),
+        'subject': fb.subject.name,
+        'rating': fb.overall_satisfaction,
+        'date': fb.created_at.strftime('%Y-%m-%d %H:%M')
+    } for fb in recent_feedback]
+    
+    return {
+        'success': True,
+        'statistics': {
+            **counts,
+            'average_ratings': {
+                'overall': round(avg_ratings['avg_overall'] or 0, 2),
+                'teaching': round(avg_ratings['avg_teaching'] or 0, 2),
+                'content': round(avg_ratings['avg_content'] or 0, 2)
+            },
+            'branch_distribution': branch_distribution,
+            'year_distribution': year_distribution
+        },
+        'recent_feedback': recent_feedback_data
+    }
+
+@query_budget(12)
 def get_admin_statistics(request):
     """Get overall system statistics for admin dashboard"""
     try:
-        total_students = Student.objects.count()
-        total_teachers = Teacher.objects.count()
-        total_subjects = Subject.objects.count()
-        total_feedback = Feedback.objects.count()
-        
-        active_students = Student.objects.filter(user__is_active=True).count()
-        active_teachers = Teacher.objects.filter(user__is_active=True).count()
-        
-        avg_ratings = Feedback.objects.aggregate(
-            avg_overall=Avg('overall_satisfaction'),
-            avg_teaching=Avg('teaching_effectiveness'),
-            avg_content=Avg('course_content')
-        )
+        counts = {name: queryset.count() for name, queryset in _admin_count_querysets().items()}
+        avg_ratings = Feedback.objects.aggregate(**_admin_rating_averages())
+        branch_distribution = list(_branch_distribution())
+        year_distribution = list(_year_distribution())
+        recent_feedback = _recent_admin_feedback()
         
-        branch_distribution = Student.objects.values('branch__name').annotate(
-            count=Count('id')
-        ).order_by('-count')
+        return JsonResponse(_admin_statistics_payload(
+            counts, avg_ratings, branch_distribution, year_distribution, recent_feedback
+        ))
+        
+    except Exception as e:
+        import traceback
+        print("GET ADMIN STATISTICS ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+
+def get_completion_statistics(request):
+    """Feedback completion for the institution, a branch or a single class"""
+    try:
+        branch_id = request.GET.get('branch_id')
+        semester_id = request.GET.get('semester_id')
+        division_id = request.GET.get('division_id')
         
-        year_distribution = Student.objects.values('year__name').annotate(
-            count=Count('id')
-        ).order_by('year__name')
+        obligations = scoped(branch_id, semester_id, division_id)
         
-        recent_feedback = Feedback.objects.select_related(
-            'student', 'student__user', 'teacher', 'teacher__user', 'subject'
-        ).order_by('-created_at')[:10]
+        if division_id or semester_id:
+            group_fields = ['branch__name', 'semester__year__name', 'semester__number', 'division__name']
+        elif branch_id:
+            group_fields = ['semester__year__name', 'semester__number', 'division__name']
+        else:
+            group_fields = ['branch__name']
         
-        recent_feedback_data = [{
-            'id': fb.id,
-            'student': fb.student.user.get_full_name() if not fb.is_anonymous else 'Anonymous',
-            'teacher': fb.teacher.user.get_full_name(),
-            'subject': fb.subject.name,
-            'rating': fb.overall_satisfaction,
-            'date': fb.created_at.strftime('%Y-%m-%d %H:%M')
-        } for fb in recent_feedback]
+        breakdown = [{
+            **row,
+            'completion_rate': round(row['fulfilled'] / row['expected'] * 100, 2) if row['expected'] else 0
+        } for row in completion_by(obligations, *group_fields)]
         
         return JsonResponse({
             'success': True,
-            'statistics': {
-                'total_students': total_students,
-                'total_teachers': total_teachers,
-                'total_subjects': total_subjects,
-                'total_feedback': total_feedback,
-                'active_students': active_students,
-                'active_teachers': active_teachers,
-                'average_ratings': {
-                    'overall': round(avg_ratings['avg_overall'] or 0, 2),
-                    'teaching': round(avg_ratings['avg_teaching'] or 0, 2),
-                    'content': round(avg_ratings['avg_content'] or 0, 2)
-                },
-                'branch_distribution': list(branch_distribution),
-                'year_distribution': list(year_distribution)
-            },
-            'recent_feedback': recent_feedback_data
+            'completion': completion_stats(obligations),
+            'breakdown': breakdown
         })
         
     except Exception as e:
         import traceback
-        print("GET ADMIN STATISTICS ERROR:", traceback.format_exc())
+        print("GET COMPLETION STATISTICS ERROR:", traceback.format_exc())
         return JsonResponse({'error': str(e)}, status=500)
 
-def download_all_feedback_report(request):
-    """Download comprehensive feedback report for all teachers"""
+def get_hod_analytics(request):
+    """Branch-wide averages, rating histograms and sentiment at any level of the hierarchy, read from rollups"""
     try:
-        feedbacks = Feedback.objects.all().select_related(
-            'student', 'student__user', 'student__branch', 'student__year', 'student__division',
-            'teacher', 'teacher__user', 'subject', 'semester', 'semester__year'
-        ).order_by('-created_at')
+        # Incremental, at most every ROLLUP_REFRESH_INTERVAL seconds per worker
+        refresh_rollups()
+    except Exception:
+        import traceback
+        print("ROLLUP REFRESH ERROR:", traceback.format_exc())
+    return _hod_analytics(request)
+
+@query_budget(3)
+def _hod_analytics(request):
+    try:
+        level = request.GET.get('level', 'branch')
+        if level not in ROLLUP_LEVELS:
+            return JsonResponse({'error': f"level must be one of: {', '.join(ROLLUP_LEVELS)}"}, status=400)
+        
+        filters = {}
+        for key in ('branch', 'year', 'semester', 'division', 'teacher', 'subject'):
+            value = request.GET.get(f'{key}_id')
+            if value:
+                if not value.isdigit():
+                    return JsonResponse({'error': f'{key}_id must be an integer'}, status=400)
+                filters[key] = int(value)
         
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = f'attachment; filename="all_feedback_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        response.write('\ufeff')
+        try:
+            data = slice_rollups(level, **filters)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
         
-        writer = csv.writer(response)
-        writer.writerow([
-            'Feedback ID', 'Date', 'Student PRN', 'Student Name', 'Year', 'Branch', 
-            'Division', 'Teacher ID', 'Teacher Name', 'Subject Code', 'Subject Name', 
-            'Semester', 'Teaching', 'Content', 'Interaction', 'Assignment', 'Overall',
-            'Comments', 'Comment Sentiment', 'Suggestions', 'Suggestion Sentiment', 'Anonymous'
-        ])
+        data['data_through'] = data['data_through'].strftime('%Y-%m-%d %H:%M:%S') if data['data_through'] else None
+        return JsonResponse({'success': True, **data})
         
-        for fb in feedbacks:
-            writer.writerow([
-                fb.id,
-                fb.created_at.strftime('%d-%m-%Y %H:%M'),
-                fb.student.prn_number if not fb.is_anonymous else 'Anonymous',
-                fb.student.user.get_full_name() if not fb.is_anonymous else 'Anonymous',
-                fb.student.year.name if not fb.is_anonymous else 'N/A',
-                fb.student.branch.name if not fb.is_anonymous else 'N/A',
-                fb.student.division.name if (not fb.is_anonymous and fb.student.division) else 'N/A',
-                fb.teacher.employee_id,
-                fb.teacher.user.get_full_name(),
-                fb.subject.code,
-                fb.subject.name,
-                f"{fb.semester.year.name} Sem-{fb.semester.number}",
-                fb.teaching_effectiveness,
-                fb.course_content,
-                fb.interaction_quality,
-                fb.assignment_feedback,
-                fb.overall_satisfaction,
-                fb.comments or 'No comments',
-                fb.comment_sentiment or 'Not analyzed',
-                fb.suggestions or 'No suggestions',
-                fb.suggestion_sentiment or 'Not analyzed',
-                'Yes' if fb.is_anonymous else 'No'
-            ])
+    except Exception as e:
+        import traceback
+        print("GET HOD ANALYTICS ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+
+@query_budget(6)
+def get_submission_rates(request):
+    """Live submission rate per minute and hour for the institution, a branch or a class, with projected completion"""
+    try:
+        try:
+            branch_id = int(request.GET['branch_id']) if request.GET.get('branch_id') else None
+            semester_id = int(request.GET['semester_id']) if request.GET.get('semester_id') else None
+            division_id = int(request.GET['division_id']) if request.GET.get('division_id') else None
+            minutes = min(max(int(request.GET.get('minutes', 60)), 2), 24 * 60)
+            hours = min(max(int(request.GET.get('hours', 24)), 1), 24 * 31)
+        except ValueError:
+            return JsonResponse({'error': 'branch_id, semester_id, division_id, minutes and hours must be integers'}, status=400)
         
-        return response
+        return JsonResponse({
+            'success': True,
+            **submission_rates(branch_id, semester_id, division_id, minutes=minutes, hours=hours)
+        })
+        
+    except Exception as e:
+        import traceback
+        print("GET SUBMISSION RATES ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+
+@query_budget(3)
+def get_teacher_rankings(request):
+    """Leaderboard of teachers by Bayesian-averaged overall satisfaction, with percentiles"""
+    try:
+        try:
+            semester_id = int(request.GET['semester_id']) if request.GET.get('semester_id') else None
+            department_id = int(request.GET['department_id']) if request.GET.get('department_id') else None
+            min_responses = max(int(request.GET.get('min_responses', 0)), 0)
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', 25)), 1), 100)
+        except ValueError:
+            return JsonResponse({'error': 'semester_id, department_id, min_responses, page and page_size must be integers'}, status=400)
+        
+        ranking = get_ranking(semester_id)
+        positions = ranking.select(department_id, min_responses)
+        offset = (page - 1) * page_size
+        rows = ranking.rows(positions[offset:offset + page_size])
+        
+        # Names for this page only
+        teachers = {
+            t['id']: t for t in Teacher.objects.filter(id__in=[row['teacher_id'] for row in rows]).values(
+                'id', 'employee_id', 'user__first_name', 'user__last_name', 'department__name'
+            )
+        }
+        for row in rows:
+            teacher = teachers.get(row['teacher_id'], {})
+            row['employee_id'] = teacher.get('employee_id')
+            row['name'] = f"{teacher.get('user__first_name', '')} {teacher.get('user__last_name', '')}".strip()
+            row['department'] = teacher.get('department__name')
+        
+        total = len(positions)
+        return JsonResponse({
+            'success': True,
+            'prior': {'mean': round(ranking.prior_mean, 3), 'weight': ranking.prior_weight},
+            'teachers_ranked': len(ranking),
+            'rankings': rows,
+            'pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total': total,
+                'total_pages': (total + page_size - 1) // page_size
+            }
+        })
+        
+    except Exception as e:
+        import traceback
+        print("GET TEACHER RANKINGS ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+
+@query_budget(2)
+def get_feedback_trends(request):
+    """Per-semester rating and sentiment series for a teacher, subject or branch"""
+    try:
+        filters = {}
+        for key in ('teacher', 'subject', 'branch'):
+            value = request.GET.get(f'{key}_id')
+            if value:
+                if not value.isdigit():
+                    return JsonResponse({'error': f'{key}_id must be an integer'}, status=400)
+                filters[key] = int(value)
+        if not filters:
+            return JsonResponse({'error': 'teacher_id, subject_id or branch_id is required'}, status=400)
+        
+        return JsonResponse({
+            'success': True,
+            'filters': filters,
+            'series': feedback_trend(**filters)
+        })
+        
+    except Exception as e:
+        import traceback
+        print("GET FEEDBACK TRENDS ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+
+def download_all_feedback_report(request):
+    """Download comprehensive feedback report for all teachers - served from cache or built by a background job"""
+    try:
+        job = request_report(ALL_FEEDBACK_REPORT, 'all', all_feedback_version())
+        return _report_job_response(job)
         
     except Exception as e:
         import traceback
         print("DOWNLOAD ALL FEEDBACK ERROR:", traceback.format_exc())
         return JsonResponse({'error': str(e)}, status=500)
 
+#REPORT JOBS
+
+def _report_job_data(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+        'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else None,
+        'error': job.error or None,
+        'status_url': f'/api/reports/jobs/{job.id}/',
+        'download_url': f'/api/reports/jobs/{job.id}/download/' if job.status == ReportJob.DONE else None
+    }
+
+def _report_file_response(job):
+    response = FileResponse(
+        open(job.file_path, 'rb'),
+        as_attachment=True,
+        filename=download_filename(job),
+        content_type=REPORT_TYPES[job.kind]['content_type']
+    )
+    response['X-Report-Job'] = str(job.id)
+    return response
+
+def _report_job_response(job):
+    """Serve a ready artifact instantly, otherwise tell the client where to poll"""
+    if job.status == ReportJob.DONE:
+        return _report_file_response(job)
+    if job.status == ReportJob.FAILED:
+        return JsonResponse({'success': False, 'error': job.error, 'job': _report_job_data(job)}, status=500)
+    return JsonResponse({'success': True, 'job': _report_job_data(job)}, status=202)
+
+def report_job_status(request, job_id):
+    """Poll a report job"""
+    try:
+        job = get_object_or_404(ReportJob, id=job_id)
+        return JsonResponse({'success': True, 'job': _report_job_data(job)})
+    except Http404:
+        return JsonResponse({'error': 'Report job not found'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+def download_report_job(request, job_id):
+    """Download the artifact of a finished report job"""
+    try:
+        job = get_object_or_404(ReportJob, id=job_id)
+        if job.status != ReportJob.DONE:
+            return JsonResponse({'success': False, 'job': _report_job_data(job)}, status=409)
+        return _report_file_response(job)
+    except (Http404, FileNotFoundError):
+        return JsonResponse({'error': 'Report not found'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
 #SEARCH & FILTER
 
 def search_users(request):
@@ -920,6 +1103,34 @@ def health_check(request):
             'error': str(e)
         }, status=500)
 
+def metrics(request):
+    """Per-view request, SQL and response-size metrics in Prometheus text format"""
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def get_sql_stats(request):
+    """SQL fingerprint stats of this process, heaviest first"""
+    try:
+        order_by = request.GET.get('order_by', 'total_ms')
+        if order_by not in ('total_ms', 'max_ms', 'mean_ms', 'count', 'slow'):
+            return JsonResponse({'error': 'order_by must be total_ms, max_ms, mean_ms, count or slow'}, status=400)
+        limit = int(request.GET.get('limit', 50))
+        
+        statements = sql_stats_snapshot(order_by=order_by, limit=limit)
+        if request.GET.get('reset', '').lower() == 'true':
+            reset_sql_stats()
+        
+        return JsonResponse({
+            'success': True,
+            'slow_query_ms': settings.SLOW_QUERY_MS,
+            'statements': statements
+        })
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+    except Exception as e:
+        import traceback
+        print("SQL STATS ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+
 #ADMIN VIEWS
 
 @csrf_exempt
@@ -1393,6 +1604,112 @@ def get_divisions(request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+#  ASYNC VIEWS
+# Async ORM variants of the read-heavy dashboard and reference-data views,
+# served under /api/async/ for ASGI deployments. Independent queries are
+# awaited together with asyncio.gather. Django's async ORM still runs each
+# query through sync_to_async(thread_sensitive=True), one at a time on the
+# request's thread, so gather saves thread hand-offs and not query time; the
+# gain is that a request waiting on the database holds no thread of its own.
+# Compare with `manage.py benchmark_async`.
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+async def student_dashboard_async(request):
+    """Async variant of student_dashboard"""
+    try:
+        username = request.GET.get('username')
+        if not username:
+            return JsonResponse({'error': 'Username required'}, status=400)
+        
+        user = await CustomUser.objects.select_related(
+            'student_profile__year', 'student_profile__branch',
+            'student_profile__semester', 'student_profile__division'
+        ).aget(username=username, user_type='student')
+        student = user.student_profile
+        
+        feedback_count, recent_feedback = await asyncio.gather(
+            Feedback.objects.filter(student=student).acount(),
+            _alist(_recent_student_feedback(student)),
+        )
+        
+        with span('serialize'):
+            return JsonResponse(_student_dashboard_payload(user, student, feedback_count, recent_feedback))
+        
+    except CustomUser.DoesNotExist:
+        return JsonResponse({'error': 'Student not found'}, status=404)
+    except Exception as e:
+        import traceback
+        print("STUDENT DASHBOARD ASYNC ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+
+async def get_admin_statistics_async(request):
+    """Async variant of get_admin_statistics"""
+    try:
+        count_querysets = _admin_count_querysets()
+        *totals, avg_ratings, branch_distribution, year_distribution, recent_feedback = await asyncio.gather(
+            *(queryset.acount() for queryset in count_querysets.values()),
+            Feedback.objects.aaggregate(**_admin_rating_averages()),
+            _alist(_branch_distribution()),
+            _alist(_year_distribution()),
+            _alist(_recent_admin_feedback()),
+        )
+        
+        return JsonResponse(_admin_statistics_payload(
+            dict(zip(count_querysets, totals)), avg_ratings, branch_distribution, year_distribution, recent_feedback
+        ))
+        
+    except Exception as e:
+        import traceback
+        print("GET ADMIN STATISTICS ASYNC ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+
+async def get_branches_async(request):
+    """Async variant of get_branches"""
+    try:
+        branches = await _alist(Branch.objects.all().order_by('name'))
+        return JsonResponse({
+            'success': True,
+            'branches': [{'id': b.id, 'name': b.name, 'code': b.code} for b in branches]
+        })
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+async def get_years_async(request):
+    """Async variant of get_years"""
+    try:
+        years = await _alist(Year.objects.all().order_by('name'))
+        return JsonResponse({
+            'success': True,
+            'years': [{'id': y.id, 'name': y.name} for y in years]
+        })
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+async def get_semesters_async(request, year_id):
+    """Async variant of get_semesters"""
+    try:
+        semesters = await _alist(Semester.objects.filter(year_id=year_id).order_by('number'))
+        return JsonResponse({
+            'success': True,
+            'semesters': [{'id': s.id, 'number': s.number} for s in semesters]
+        })
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+async def get_divisions_async(request):
+    """Async variant of get_divisions"""
+    try:
+        divisions = await _alist(Division.objects.all().order_by('name'))
+        return JsonResponse({
+            'success': True,
+            'divisions': [{'id': d.id, 'name': d.name} for d in divisions]
+        })
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+@query_budget(6)
 def get_student_subjects(request):
     """Get subjects for student's semester, branch, and division - FIXED"""
     try:
@@ -1401,33 +1718,37 @@ def get_student_subjects(request):
         if not username:
             return JsonResponse({'error': 'Username required'}, status=400)
         
-        # Force refresh from database
-        user = CustomUser.objects.select_related('student_profile').get(
-            username=username, 
-            user_type='student'
-        )
-        student = user.student_profile
-        
-        # Refresh student object from database to get latest data
-        student.refresh_from_db()
+        # Always read the latest class assignment from the database
+        user = CustomUser.objects.get(username=username, user_type='student')
+        student = Student.objects.select_related(
+            'year', 'branch', 'semester', 'division'
+        ).get(user=user)
         
-        # Get subjects for student's division or common subjects (division=None)
-        subjects = Subject.objects.filter(
+        # Get subjects for student's division or common subjects (division=None),
+        # with their teachers in one extra query instead of one per subject
+        subjects = list(Subject.objects.filter(
             semester=student.semester,
             branch=student.branch
         ).filter(
             Q(division=student.division) | Q(division__isnull=True)
-        ).select_related('semester', 'branch', 'division')
+        ).select_related('semester', 'branch', 'division').prefetch_related(
+            Prefetch(
+                'teacher_assignments',
+                queryset=TeacherSubject.objects.select_related('teacher', 'teacher__user')
+            )
+        ))
+        
+        submitted = set(Feedback.objects.filter(
+            student=student,
+            subject__in=subjects
+        ).values_list('subject_id', 'teacher_id'))
         
         subjects_data = []
         
         for subject in subjects:
-            # FIXED: Use TeacherSubject model correctly
-            teacher_assignments = TeacherSubject.objects.filter(
-                subject=subject
-            ).select_related('teacher', 'teacher__user')
+            teacher_assignments = subject.teacher_assignments.all()
             
-            if not teacher_assignments.exists():
+            if not teacher_assignments:
                 subjects_data.append({
                     'id': subject.id,
                     'code': subject.code,
@@ -1445,11 +1766,6 @@ def get_student_subjects(request):
             else:
                 for ts in teacher_assignments:
                     teacher = ts.teacher
-                    feedback_exists = Feedback.objects.filter(
-                        student=student,
-                        subject=subject,
-                        teacher=teacher
-                    ).exists()
                     
                     subjects_data.append({
                         'id': subject.id,
@@ -1462,32 +1778,65 @@ def get_student_subjects(request):
                             'name': teacher.user.get_full_name(),
                             'employee_id': teacher.employee_id
                         },
-                        'feedback_submitted': feedback_exists,
+                        'feedback_submitted': (subject.id, teacher.id) in submitted,
                         'no_teacher': False
                     })
         
-        return JsonResponse({
-            'success': True,
-            'subjects': subjects_data,
-            'student_info': {
-                'year': student.year.name,
-                'branch': student.branch.name,
-                'semester': student.semester.number,
-                'division': student.division.name if student.division else 'N/A'
-            }
-        })
+        with span('serialize'):
+            return JsonResponse({
+                'success': True,
+                'subjects': subjects_data,
+                'student_info': {
+                    'year': student.year.name,
+                    'branch': student.branch.name,
+                    'semester': student.semester.number,
+                    'division': student.division.name if student.division else 'N/A'
+                }
+            })
         
-    except CustomUser.DoesNotExist:
+    except (CustomUser.DoesNotExist, Student.DoesNotExist):
         return JsonResponse({'error': 'Student not found'}, status=404)
     except Exception as e:
         import traceback
         print("GET STUDENT SUBJECTS ERROR:", traceback.format_exc())
         return JsonResponse({'error': str(e)}, status=500)
 
+#IDEMPOTENCY
+
+def _get_idempotent_response(key, username, endpoint):
+    """Return the stored response for a replayed Idempotency-Key, if still valid"""
+    record = IdempotencyKey.objects.filter(
+        key=key,
+        username=username,
+        endpoint=endpoint,
+        expires_at__gt=timezone.now()
+    ).first()
+    if record is None:
+        return None
+    response = JsonResponse(record.response_body, status=record.response_status)
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+def _store_idempotent_response(key, username, endpoint, body, status):
+    """Remember a response under its Idempotency-Key and purge expired keys"""
+    now = timezone.now()
+    IdempotencyKey.objects.filter(expires_at__lte=now).delete()
+    IdempotencyKey.objects.update_or_create(
+        key=key,
+        username=username,
+        endpoint=endpoint,
+        defaults={
+            'response_status': status,
+            'response_body': body,
+            'expires_at': now + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+        }
+    )
+
 @csrf_exempt
 @require_http_methods(["POST"])
+@query_budget(16)
 def submit_feedback(request):
-    """Submit student feedback with sentiment analysis"""
+    """Submit student feedback with sentiment analysis (supports Idempotency-Key header)"""
     try:
         data = json.loads(request.body)
         username = data.get('username')
@@ -1495,56 +1844,83 @@ def submit_feedback(request):
         if not username:
             return JsonResponse({'error': 'Username is required'}, status=400)
         
-        user = CustomUser.objects.get(username=username, user_type='student')
-        student = user.student_profile
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip()[:255]
+        if idempotency_key:
+            replayed = _get_idempotent_response(idempotency_key, username, 'submit_feedback')
+            if replayed is not None:
+                return replayed
+        
+        student = Student.objects.select_related('semester').get(
+            user__username=username, user__user_type='student'
+        )
+        
+        # Closed semesters are final (trends cache them)
+        if student.semester is not None and student.semester.closed_at is not None:
+            return JsonResponse({'error': 'Feedback for this semester is closed'}, status=400)
         
         subject = get_object_or_404(Subject, id=data['subject_id'])
         teacher = get_object_or_404(Teacher, id=data['teacher_id'])
         
-        if Feedback.objects.filter(
-            student=student,
-            subject=subject,
-            teacher=teacher,
-            semester=student.semester
-        ).exists():
-            return JsonResponse({
-                'error': 'You have already submitted feedback for this subject and teacher'
-            }, status=400)
-        
         comments = data.get('comments', '').strip()
         suggestions = data.get('suggestions', '').strip()
         
         comment_sentiment, comment_score = analyze_sentiment(comments)
         suggestion_sentiment, suggestion_score = analyze_sentiment(suggestions)
         
-        feedback = Feedback.objects.create(
-            student=student,
-            teacher=teacher,
-            subject=subject,
-            semester=student.semester,
-            teaching_effectiveness=int(data['teaching_effectiveness']),
-            course_content=int(data['course_content']),
-            interaction_quality=int(data['interaction_quality']),
-            assignment_feedback=int(data['assignment_feedback']),
-            overall_satisfaction=int(data['overall_satisfaction']),
-            comments=comments,
-            comment_sentiment=comment_sentiment,
-            comment_sentiment_score=comment_score,
-            suggestions=suggestions,
-            suggestion_sentiment=suggestion_sentiment,
-            suggestion_sentiment_score=suggestion_score,
-            is_anonymous=data.get('is_anonymous', True)
-        )
-        
-        return JsonResponse({
-            'success': True,
-            'message': 'Feedback submitted successfully',
-            'feedback_id': feedback.id,
-            'sentiment': {
-                'comment': comment_sentiment,
-                'suggestion': suggestion_sentiment
-            }
-        }, status=201)
+        # Duplicates are rejected by the unique constraint on
+        # (student, teacher, subject, semester) instead of a pre-check query.
+        # The Idempotency-Key is stored in the same transaction as the row.
+        try:
+            with transaction.atomic():
+                feedback = Feedback.objects.create(
+                    student=student,
+                    teacher=teacher,
+                    subject=subject,
+                    semester_id=student.semester_id,
+                    teaching_effectiveness=int(data['teaching_effectiveness']),
+                    course_content=int(data['course_content']),
+                    interaction_quality=int(data['interaction_quality']),
+                    assignment_feedback=int(data['assignment_feedback']),
+                    overall_satisfaction=int(data['overall_satisfaction']),
+                    comments=comments,
+                    comment_sentiment=comment_sentiment,
+                    comment_sentiment_score=comment_score,
+                    suggestions=suggestions,
+                    suggestion_sentiment=suggestion_sentiment,
+                    suggestion_sentiment_score=suggestion_score,
+                    sentiment_version=analyzer_version(),
+                    is_anonymous=data.get('is_anonymous', True)
+                )
+                body = {
+                    'success': True,
+                    'message': 'Feedback submitted successfully',
+                    'feedback_id': feedback.id,
+                    'sentiment': {
+                        'comment': comment_sentiment,
+                        'suggestion': suggestion_sentiment
+                    }
+                }
+                status = 201
+                if idempotency_key:
+                    _store_idempotent_response(idempotency_key, username, 'submit_feedback', body, status)
+        except IntegrityError:
+            # A concurrent retry with the same key won the race: replay its response
+            if idempotency_key:
+                replayed = _get_idempotent_response(idempotency_key, username, 'submit_feedback')
+                if replayed is not None:
+                    return replayed
+            # Only the Feedback unique constraint means "already submitted"
+            if not Feedback.objects.filter(
+                student=student, teacher=teacher, subject=subject, semester_id=student.semester_id
+            ).exists():
+                raise
+            body = {'error': 'You have already submitted feedback for this subject and teacher'}
+            status = 400
+            if idempotency_key:
+                _store_idempotent_response(idempotency_key, username, 'submit_feedback', body, status)
+        
+        with span('serialize'):
+            return JsonResponse(body, status=status)
         
     except KeyError as e:
         return JsonResponse({'error': f'Missing required field: {str(e)}'}, status=400)
@@ -1555,6 +1931,7 @@ def submit_feedback(request):
 
 #  TEACHER VIEWS 
 
+@query_budget(9)
 def teacher_dashboard(request):
     """Get teacher dashboard with analytics"""
     try:
@@ -1603,10 +1980,12 @@ def teacher_dashboard(request):
                 'neutral': neutral_count,
             }
             
-            rating_distribution = []
-            for rating in range(1, 6):
-                count = feedbacks.filter(overall_satisfaction=rating).count()
-                rating_distribution.append({'rating': rating, 'count': count})
+            rating_counts = dict(
+                feedbacks.order_by().values_list('overall_satisfaction').annotate(Count('id'))
+            )
+            rating_distribution = [
+                {'rating': rating, 'count': rating_counts.get(rating, 0)} for rating in range(1, 6)
+            ]
             
         else:
             avg_ratings = {
@@ -1618,29 +1997,30 @@ def teacher_dashboard(request):
         
         subjects_taught = teacher.subjects.count()
         
-        return JsonResponse({
-            'success': True,
-            'teacher': {
-                'employee_id': teacher.employee_id,
-                'name': user.get_full_name(),
-                'department': teacher.department.name if teacher.department else 'N/A',
-                'email': user.email,
-                'is_class_teacher': teacher.is_class_teacher
-            },
-            'statistics': {
-                'total_feedback': total_feedback,
-                'subjects_taught': subjects_taught,
-                'average_ratings': {
-                    'teaching_effectiveness': round(avg_ratings['avg_teaching'] or 0, 2),
-                    'course_content': round(avg_ratings['avg_content'] or 0, 2),
-                    'interaction_quality': round(avg_ratings['avg_interaction'] or 0, 2),
-                    'assignment_feedback': round(avg_ratings['avg_assignment'] or 0, 2),
-                    'overall_satisfaction': round(avg_ratings['avg_overall'] or 0, 2)
+        with span('serialize'):
+            return JsonResponse({
+                'success': True,
+                'teacher': {
+                    'employee_id': teacher.employee_id,
+                    'name': user.get_full_name(),
+                    'department': teacher.department.name if teacher.department else 'N/A',
+                    'email': user.email,
+                    'is_class_teacher': teacher.is_class_teacher
                 },
-                'sentiment_distribution': sentiment_stats,
-                'rating_distribution': rating_distribution
-            }
-        })
+                'statistics': {
+                    'total_feedback': total_feedback,
+                    'subjects_taught': subjects_taught,
+                    'average_ratings': {
+                        'teaching_effectiveness': round(avg_ratings['avg_teaching'] or 0, 2),
+                        'course_content': round(avg_ratings['avg_content'] or 0, 2),
+                        'interaction_quality': round(avg_ratings['avg_interaction'] or 0, 2),
+                        'assignment_feedback': round(avg_ratings['avg_assignment'] or 0, 2),
+                        'overall_satisfaction': round(avg_ratings['avg_overall'] or 0, 2)
+                    },
+                    'sentiment_distribution': sentiment_stats,
+                    'rating_distribution': rating_distribution
+                }
+            })
         
     except CustomUser.DoesNotExist:
         return JsonResponse({'error': 'Teacher not found'}, status=404)
@@ -1649,6 +2029,7 @@ def teacher_dashboard(request):
         print("ERROR:", traceback.format_exc())
         return JsonResponse({'error': str(e)}, status=500)
 
+@query_budget(6)
 def teacher_feedback_data(request):
     """Get detailed feedback data for teacher"""
     try:
@@ -1731,10 +2112,12 @@ def teacher_feedback_data(request):
             'neutral': neutral_count,
         }
         
-        rating_distribution = []
-        for rating in range(1, 6):
-            count = feedbacks.filter(overall_satisfaction=rating).count()
-            rating_distribution.append({'rating': rating, 'count': count})
+        rating_counts = dict(
+            feedbacks.order_by().values_list('overall_satisfaction').annotate(Count('id'))
+        )
+        rating_distribution = [
+            {'rating': rating, 'count': rating_counts.get(rating, 0)} for rating in range(1, 6)
+        ]
         
         subject_stats = feedbacks.values(
             'subject__code', 'subject__name'
@@ -1743,17 +2126,18 @@ def teacher_feedback_data(request):
             avg_rating=Avg('overall_satisfaction')
         ).order_by('-feedback_count')
         
-        return JsonResponse({
-            'success': True,
-            'feedback': feedback_data,
-            'statistics': {
-                'total_feedback': total_feedback,
-                'sentiment_stats': sentiment_stats,
-                'rating_distribution': rating_distribution,
-                'subject_breakdown': list(subject_stats)
-            },
-            'sentiment_stats': sentiment_stats
-        })
+        with span('serialize'):
+            return JsonResponse({
+                'success': True,
+                'feedback': feedback_data,
+                'statistics': {
+                    'total_feedback': total_feedback,
+                    'sentiment_stats': sentiment_stats,
+                    'rating_distribution': rating_distribution,
+                    'subject_breakdown': list(subject_stats)
+                },
+                'sentiment_stats': sentiment_stats
+            })
         
     except CustomUser.DoesNotExist:
         return JsonResponse({'error': 'Teacher not found'}, status=404)
@@ -1778,47 +2162,48 @@ def download_feedback_data(request):
             'subject', 'semester', 'semester__year'
         ).order_by('-created_at')
         
-        response = HttpResponse(content_type='text/csv; charset=utf-8')
-        response['Content-Disposition'] = f'attachment; filename="feedback_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
-        response.write('\ufeff')
-        
-        writer = csv.writer(response)
-        writer.writerow([
-            'ID', 'Date', 
-             #'PRN',
-             #'Student Name',
-              'Year', 'Branch', 'Division', 'Subject Code',
-            'Subject Name', 'Semester', 'Teaching', 'Content', 'Interaction',
-            'Assignment', 'Overall', 'Comments', 'Comment Sentiment', 'Comment Score',
-            'Suggestions', 'Suggestion Sentiment', 'Suggestion Score', 'Is Anonymous'
-        ])
+        with span('render'):
+            response = HttpResponse(content_type='text/csv; charset=utf-8')
+            response['Content-Disposition'] = f'attachment; filename="feedback_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv"'
+            response.write('\ufeff')
         
-        for fb in feedbacks:
+            writer = csv.writer(response)
             writer.writerow([
-                fb.id,
-                fb.created_at.strftime('%d-%m-%Y %H:%M'),
-                #fb.student.prn_number,
-                #fb.student.user.get_full_name(),
-                fb.student.year.name,
-                fb.student.branch.name,
-                fb.student.division.name if fb.student.division else 'N/A',
-                fb.subject.code,
-                fb.subject.name,
-                f"{fb.semester.year.name} Sem-{fb.semester.number}",
-                fb.teaching_effectiveness,
-                fb.course_content,
-                fb.interaction_quality,
-                fb.assignment_feedback,
-                fb.overall_satisfaction,
-                fb.comments or 'No comments',
-                fb.comment_sentiment or 'Not analyzed',
-                f"{fb.comment_sentiment_score:.2f}" if fb.comment_sentiment_score else '0.00',
-                fb.suggestions or 'No suggestions',
-                fb.suggestion_sentiment or 'Not analyzed',
-                f"{fb.suggestion_sentiment_score:.2f}" if fb.suggestion_sentiment_score else '0.00',
-                'Yes' if fb.is_anonymous else 'No'
+                'ID', 'Date', 
+                 #'PRN',
+                 #'Student Name',
+                  'Year', 'Branch', 'Division', 'Subject Code',
+                'Subject Name', 'Semester', 'Teaching', 'Content', 'Interaction',
+                'Assignment', 'Overall', 'Comments', 'Comment Sentiment', 'Comment Score',
+                'Suggestions', 'Suggestion Sentiment', 'Suggestion Score', 'Is Anonymous'
             ])
         
+            for fb in feedbacks:
+                writer.writerow([
+                    fb.id,
+                    fb.created_at.strftime('%d-%m-%Y %H:%M'),
+                    #fb.student.prn_number,
+                    #fb.student.user.get_full_name(),
+                    fb.student.year.name,
+                    fb.student.branch.name,
+                    fb.student.division.name if fb.student.division else 'N/A',
+                    fb.subject.code,
+                    fb.subject.name,
+                    f"{fb.semester.year.name} Sem-{fb.semester.number}",
+                    fb.teaching_effectiveness,
+                    fb.course_content,
+                    fb.interaction_quality,
+                    fb.assignment_feedback,
+                    fb.overall_satisfaction,
+                    fb.comments or 'No comments',
+                    fb.comment_sentiment or 'Not analyzed',
+                    f"{fb.comment_sentiment_score:.2f}" if fb.comment_sentiment_score else '0.00',
+                    fb.suggestions or 'No suggestions',
+                    fb.suggestion_sentiment or 'Not analyzed',
+                    f"{fb.suggestion_sentiment_score:.2f}" if fb.suggestion_sentiment_score else '0.00',
+                    'Yes' if fb.is_anonymous else 'No'
+                ])
+        
         return response
         
     except CustomUser.DoesNotExist:
@@ -1828,6 +2213,7 @@ def download_feedback_data(request):
 
 #  CLASS TEACHER VIEWS 
 
+@query_budget(5)
 def class_teacher_dashboard(request):
     """Get class teacher specific dashboard data WITH DIVISION"""
     try:
@@ -1836,79 +2222,90 @@ def class_teacher_dashboard(request):
         if not username:
             return JsonResponse({'error': 'Username required'}, status=400)
         
-        user = CustomUser.objects.get(username=username, user_type='teacher')
+        user = CustomUser.objects.select_related(
+            'teacher_profile__assigned_class_year', 'teacher_profile__assigned_class_branch',
+            'teacher_profile__assigned_class_semester', 'teacher_profile__assigned_class_division'
+        ).get(username=username, user_type='teacher')
         teacher = user.teacher_profile
         
         if not teacher.is_class_teacher:
             return JsonResponse({'error': 'Not authorized as class teacher'}, status=403)
         
-        # Get assigned class students
-        students = Student.objects.filter(
-            class_teacher=teacher
-        ).select_related('user', 'year', 'branch', 'semester', 'division')
-        
-        # If no class_teacher assignment, use year/branch/semester/division
-        if not students.exists() and teacher.assigned_class_year:
-            students = Student.objects.filter(
-                year=teacher.assigned_class_year,
-                branch=teacher.assigned_class_branch,
-                semester=teacher.assigned_class_semester,
-                division=teacher.assigned_class_division
-            ).select_related('user', 'year', 'branch', 'semester', 'division')
-        
-        total_students = students.count()
-        
-        # Get all subjects for this class
-        if total_students > 0:
-            first_student = students.first()
-            subjects = Subject.objects.filter(
-                branch=first_student.branch,
-                semester=first_student.semester
-            ).filter(
-                Q(division=first_student.division) | Q(division__isnull=True)
-            ).prefetch_related('teachers')
-        else:
-            subjects = Subject.objects.none()
-        
-        # Calculate feedback statistics
-        students_submitted = set()
-        students_pending = []
-        
-        for student in students:
-            student_feedbacks = Feedback.objects.filter(student=student)
-            
-            if student_feedbacks.exists():
-                students_submitted.add(student.id)
-            else:
-                students_pending.append({
-                    'prn': student.prn_number,
-                    'name': student.user.get_full_name(),
-                    'email': student.user.email
-                })
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', 10)), 1), 100)
+        except ValueError:
+            return JsonResponse({'error': 'page and page_size must be integers'}, status=400)
+        
+        # Anti-join: one annotated query splits submitted from pending students
+        students = class_students(teacher).annotate(
+            has_submitted=Exists(FeedbackObligation.objects.filter(
+                student=OuterRef('pk'), semester_id=OuterRef('semester_id'), is_fulfilled=True
+            ))
+        )
+        counts = students.aggregate(
+            total=Count('id'),
+            submitted=Count('id', filter=Q(has_submitted=True))
+        )
         
-        submitted_count = len(students_submitted)
+        total_students = counts['total']
+        submitted_count = counts['submitted']
         pending_count = total_students - submitted_count
         completion_rate = (submitted_count / total_students * 100) if total_students > 0 else 0
         
+        offset = (page - 1) * page_size
+        students_pending = [{
+            'prn': student.prn_number,
+            'name': student.user.get_full_name(),
+            'email': student.user.email
+        } for student in students.filter(has_submitted=False).order_by('prn_number')[offset:offset + page_size]]
+        
+        # Per-obligation counts and gaps come from the same table as the student
+        # split above (and as student tracking), so all of them agree
+        columns = completion_by(
+            FeedbackObligation.objects.filter(CURRENT, student__in=class_students(teacher)),
+            'subject__code', 'teacher__employee_id', 'subject_id'
+        )
+        expected_feedback = sum(column['expected'] for column in columns)
+        received_feedback = sum(column['fulfilled'] for column in columns)
+        subject_gaps = sorted(({
+            'subject': column['subject__code'],
+            'teacher': column['teacher__employee_id'],
+            'expected': column['expected'],
+            'submitted': column['fulfilled'],
+            'pending': column['expected'] - column['fulfilled'],
+        } for column in columns), key=lambda gap: (-gap['pending'], gap['subject']))
+        
         division_str = teacher.assigned_class_division.name if teacher.assigned_class_division else 'N/A'
         
-        return JsonResponse({
-            'success': True,
-            'class_info': {
-                'year': teacher.assigned_class_year.name if teacher.assigned_class_year else 'N/A',
-                'branch': teacher.assigned_class_branch.name if teacher.assigned_class_branch else 'N/A',
-                'semester': f"Semester {teacher.assigned_class_semester.number}" if teacher.assigned_class_semester else 'N/A',
-                'division': division_str,
-            },
-            'statistics': {
-                'total_students': total_students,
-                'submitted_feedback': submitted_count,
-                'pending_feedback': pending_count,
-                'completion_rate': round(completion_rate, 2),
-                'total_subjects': subjects.count()
-            },
-            'pending_students': students_pending[:10]
-        })
+        with span('serialize'):
+            return JsonResponse({
+                'success': True,
+                'class_info': {
+                    'year': teacher.assigned_class_year.name if teacher.assigned_class_year else 'N/A',
+                    'branch': teacher.assigned_class_branch.name if teacher.assigned_class_branch else 'N/A',
+                    'semester': f"Semester {teacher.assigned_class_semester.number}" if teacher.assigned_class_semester else 'N/A',
+                    'division': division_str,
+                },
+                'statistics': {
+                    'total_students': total_students,
+                    'submitted_feedback': submitted_count,
+                    'pending_feedback': pending_count,
+                    'completion_rate': round(completion_rate, 2),
+                    'total_subjects': len({column['subject_id'] for column in columns}),
+                    'expected_feedback': expected_feedback,
+                    'received_feedback': received_feedback,
+                    'feedback_completion_rate': round(received_feedback / expected_feedback * 100, 2) if expected_feedback else 0
+                },
+                'subject_gaps': subject_gaps,
+                'pending_students': students_pending,
+                'pending_pagination': {
+                    'page': page,
+                    'page_size': page_size,
+                    'total': pending_count,
+                    'total_pages': (pending_count + page_size - 1) // page_size
+                }
+            })
         
     except CustomUser.DoesNotExist:
         return JsonResponse({'error': 'Teacher not found'}, status=404)
@@ -1917,94 +2314,116 @@ def class_teacher_dashboard(request):
         print("ERROR:", traceback.format_exc())
         return JsonResponse({'error': str(e)}, status=500)
 
-def class_teacher_student_tracking(request):
-    """Get detailed student tracking for class teacher WITH DIVISION"""
+def _sse(event):
+    return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+async def _class_event_stream(key, snapshot):
+    """Snapshot first, then live events; keepalive comments while idle; ends after EVENTS_MAX_STREAM_SECONDS"""
+    subscription = event_broker.subscribe(key)
+    loop = asyncio.get_running_loop()
+    # Bounded streams: EventSource reconnects after `retry`, and a stream whose client
+    # vanished without the server noticing cannot linger for more than one lifetime
+    deadline = loop.time() + settings.EVENTS_MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {settings.EVENTS_RETRY_MS}\n\n" + _sse(snapshot)
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                event = await asyncio.wait_for(
+                    subscription.queue.get(), min(settings.EVENTS_KEEPALIVE_SECONDS, remaining)
+                )
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield _sse(event)
+    finally:
+        event_broker.unsubscribe(subscription)
+
+async def class_teacher_events(request):
+    """Server-Sent Events stream of completion updates for a class teacher's class (serve under ASGI)"""
     try:
         username = request.GET.get('username')
         
         if not username:
             return JsonResponse({'error': 'Username required'}, status=400)
         
-        user = CustomUser.objects.get(username=username, user_type='teacher')
+        user = await CustomUser.objects.select_related('teacher_profile').aget(username=username, user_type='teacher')
         teacher = user.teacher_profile
         
         if not teacher.is_class_teacher:
             return JsonResponse({'error': 'Not authorized as class teacher'}, status=403)
         
-        # Get assigned class students
-        students = Student.objects.filter(
-            class_teacher=teacher
-        ).select_related('user', 'year', 'branch', 'semester', 'division')
+        key = class_key(
+            teacher.assigned_class_branch_id, teacher.assigned_class_semester_id, teacher.assigned_class_division_id
+        )
+        snapshot = await sync_to_async(completion_event)(key)
         
-        if not students.exists() and teacher.assigned_class_year:
-            students = Student.objects.filter(
-                year=teacher.assigned_class_year,
-                branch=teacher.assigned_class_branch,
-                semester=teacher.assigned_class_semester,
-                division=teacher.assigned_class_division
-            ).select_related('user', 'year', 'branch', 'semester', 'division')
-        
-        # Get all subjects for class
-        if students.exists():
-            first_student = students.first()
-            subjects = Subject.objects.filter(
-                branch=first_student.branch,
-                semester=first_student.semester
-            ).filter(
-                Q(division=first_student.division) | Q(division__isnull=True)
-            ).prefetch_related('teachers')
-        else:
-            subjects = Subject.objects.none()
+    except CustomUser.DoesNotExist:
+        return JsonResponse({'error': 'Teacher not found'}, status=404)
+    except Exception as e:
+        import traceback
+        print("CLASS TEACHER EVENTS ERROR:", traceback.format_exc())
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    response = StreamingHttpResponse(_class_event_stream(key, snapshot), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@query_budget(4)
+def class_teacher_student_tracking(request):
+    """Get detailed student tracking for class teacher WITH DIVISION"""
+    try:
+        username = request.GET.get('username')
+        
+        if not username:
+            return JsonResponse({'error': 'Username required'}, status=400)
         
-        total_possible_feedbacks = subjects.count() * Teacher.objects.filter(subjects__in=subjects).distinct().count()
+        user = CustomUser.objects.select_related('teacher_profile').get(username=username, user_type='teacher')
+        teacher = user.teacher_profile
+        
+        if not teacher.is_class_teacher:
+            return JsonResponse({'error': 'Not authorized as class teacher'}, status=403)
+        
+        # Built per request from the obligations the dashboard counts, so both screens agree
+        matrix = CompletionMatrix.build(class_students(teacher))
         
         students_data = []
         
-        for student in students:
-            feedbacks_given = Feedback.objects.filter(student=student)
-            feedback_count = feedbacks_given.count()
+        for row, student in enumerate(matrix.students):
+            subjects_with_feedback = matrix.completed(row)
+            subjects_without_feedback = matrix.pending(row)
             
-            # Calculate which subjects have feedback
-            subjects_with_feedback = []
-            subjects_without_feedback = []
-            
-            for subject in subjects:
-                teachers_for_subject = Teacher.objects.filter(subjects=subject)
-                for teacher_obj in teachers_for_subject:
-                    has_feedback = Feedback.objects.filter(
-                        student=student,
-                        subject=subject,
-                        teacher=teacher_obj
-                    ).exists()
-                    
-                    if has_feedback:
-                        subjects_with_feedback.append(f"{subject.code} ({teacher_obj.employee_id})")
-                    else:
-                        subjects_without_feedback.append(f"{subject.code} ({teacher_obj.employee_id})")
+            feedback_count = len(subjects_with_feedback)
+            total_expected = feedback_count + len(subjects_without_feedback)
             
             students_data.append({
-                'prn': student.prn_number,
-                'name': student.user.get_full_name(),
-                'email': student.user.email,
-                'division': student.division.name if student.division else 'N/A',
+                'prn': student['prn'],
+                'name': student['name'],
+                'email': student['email'],
+                'division': student['division'],
                 'feedback_submitted': feedback_count,
                 'feedback_pending': len(subjects_without_feedback),
-                'completion_percentage': round((feedback_count / total_possible_feedbacks * 100), 2) if total_possible_feedbacks > 0 else 0,
+                'completion_percentage': round((feedback_count / total_expected * 100), 2) if total_expected > 0 else 0,
                 'subjects_completed': subjects_with_feedback,
                 'subjects_pending': subjects_without_feedback,
                 'status': 'Complete' if len(subjects_without_feedback) == 0 else 'Pending'
             })
         
-        return JsonResponse({
-            'success': True,
-            'students': students_data,
-            'summary': {
-                'total_students': len(students_data),
-                'total_subjects': subjects.count(),
-                'completed_students': len([s for s in students_data if s['status'] == 'Complete']),
-                'pending_students': len([s for s in students_data if s['status'] == 'Pending'])
-            }
-        })
+        with span('serialize'):
+            return JsonResponse({
+                'success': True,
+                'students': students_data,
+                'summary': {
+                    'total_students': len(students_data),
+                    'total_subjects': matrix.subject_count(),
+                    'completed_students': len([s for s in students_data if s['status'] == 'Complete']),
+                    'pending_students': len([s for s in students_data if s['status'] == 'Pending'])
+                },
+                'subject_gaps': matrix.column_gaps()
+            })
         
     except CustomUser.DoesNotExist:
         return JsonResponse({'error': 'Teacher not found'}, status=404)
@@ -2014,7 +2433,7 @@ def class_teacher_student_tracking(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 def download_class_teacher_report(request):
-    """Download Excel report for class teacher - ENHANCED WITH ROLL NO & STUDENT NAMES"""
+    """Download Excel report for class teacher - served from cache or built by a background job"""
     try:
         username = request.GET.get('username')
         
@@ -2027,280 +2446,8 @@ def download_class_teacher_report(request):
         if not teacher.is_class_teacher:
             return JsonResponse({'error': 'Not authorized as class teacher'}, status=403)
         
-        # Get assigned class students
-        students = Student.objects.filter(
-            class_teacher=teacher
-        ).select_related('user', 'year', 'branch', 'semester', 'division')
-        
-        if not students.exists() and teacher.assigned_class_year:
-            students = Student.objects.filter(
-                year=teacher.assigned_class_year,
-                branch=teacher.assigned_class_branch,
-                semester=teacher.assigned_class_semester,
-                division=teacher.assigned_class_division
-            ).select_related('user', 'year', 'branch', 'semester', 'division')
-        
-        # Get subjects
-        if students.exists():
-            first_student = students.first()
-            subjects = Subject.objects.filter(
-                branch=first_student.branch,
-                semester=first_student.semester
-            ).filter(
-                Q(division=first_student.division) | Q(division__isnull=True)
-            ).prefetch_related('teachers')
-        else:
-            subjects = Subject.objects.none()
-        
-        # Create Excel workbook
-        wb = openpyxl.Workbook()
-        
-        # Sheet 1: Summary
-        ws_summary = wb.active
-        ws_summary.title = "Summary"
-        
-        # Header styling
-        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        
-        # Summary info
-        ws_summary['A1'] = 'CLASS FEEDBACK TRACKING REPORT'
-        ws_summary['A1'].font = Font(bold=True, size=16)
-        ws_summary.merge_cells('A1:D1')
-        
-        ws_summary['A3'] = 'Class Teacher:'
-        ws_summary['B3'] = teacher.user.get_full_name()
-        ws_summary['A4'] = 'Employee ID:'
-        ws_summary['B4'] = teacher.employee_id
-        ws_summary['A5'] = 'Class:'
-        division_name = teacher.assigned_class_division.name if teacher.assigned_class_division else 'N/A'
-        ws_summary['B5'] = f"{teacher.assigned_class_year.name if teacher.assigned_class_year else 'N/A'} - {teacher.assigned_class_branch.name if teacher.assigned_class_branch else 'N/A'} - Semester {teacher.assigned_class_semester.number if teacher.assigned_class_semester else 'N/A'} - Division {division_name}"
-        ws_summary['A6'] = 'Report Date:'
-        ws_summary['B6'] = datetime.now().strftime('%d-%m-%Y %H:%M')
-        
-        # Statistics
-        total_students = students.count()
-        students_with_feedback = set()
-        total_feedbacks = 0
-        
-        for student in students:
-            feedbacks = Feedback.objects.filter(student=student)
-            if feedbacks.exists():
-                students_with_feedback.add(student.id)
-                total_feedbacks += feedbacks.count()
-        
-        ws_summary['A8'] = 'STATISTICS'
-        ws_summary['A8'].font = Font(bold=True, size=14)
-        
-        ws_summary['A10'] = 'Total Students:'
-        ws_summary['B10'] = total_students
-        ws_summary['A11'] = 'Students Submitted Feedback:'
-        ws_summary['B11'] = len(students_with_feedback)
-        ws_summary['A12'] = 'Students Pending:'
-        ws_summary['B12'] = total_students - len(students_with_feedback)
-        ws_summary['A13'] = 'Total Feedbacks Received:'
-        ws_summary['B13'] = total_feedbacks
-        ws_summary['A14'] = 'Completion Rate:'
-        ws_summary['B14'] = f"{round((len(students_with_feedback) / total_students * 100), 2)}%" if total_students > 0 else "0%"
-        
-        # Sheet 2: Students Submitted Feedback (ENHANCED)
-        ws_submitted = wb.create_sheet("Students Submitted")
-        
-        headers_submitted = ['Sr.No', 'Roll No', 'PRN', 'Student Name', 'Email', 'Year', 'Branch', 'Semester', 'Division', 'Total Feedbacks', 'Status']
-        for col, header in enumerate(headers_submitted, 1):
-            cell = ws_submitted.cell(row=1, column=col)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        row = 2
-        sr_no = 1
-        # Sort students by roll number if available, otherwise by PRN
-        sorted_students = sorted(students, key=lambda s: (s.prn_number))
-        
-        for student in sorted_students:
-            feedbacks = Feedback.objects.filter(student=student)
-            if feedbacks.exists():
-                ws_submitted.cell(row=row, column=1, value=sr_no)
-                # Roll Number (using PRN as roll number - modify if you have separate field)
-                ws_submitted.cell(row=row, column=2, value=student.prn_number)
-                ws_submitted.cell(row=row, column=3, value=student.prn_number)
-                ws_submitted.cell(row=row, column=4, value=student.user.get_full_name())
-                ws_submitted.cell(row=row, column=5, value=student.user.email)
-                ws_submitted.cell(row=row, column=6, value=student.year.name)
-                ws_submitted.cell(row=row, column=7, value=student.branch.name)
-                ws_submitted.cell(row=row, column=8, value=f"Semester {student.semester.number}")
-                ws_submitted.cell(row=row, column=9, value=student.division.name if student.division else 'N/A')
-                ws_submitted.cell(row=row, column=10, value=feedbacks.count())
-                
-                status_cell = ws_submitted.cell(row=row, column=11, value='Submitted')
-                status_cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-                status_cell.font = Font(color="006100", bold=True)
-                
-                row += 1
-                sr_no += 1
-        
-        # Sheet 3: Students Pending Feedback (ENHANCED)
-        ws_pending = wb.create_sheet("Students Pending")
-        
-        headers_pending = ['Sr.No', 'Roll No', 'PRN', 'Student Name', 'Email', 'Year', 'Branch', 'Semester', 'Division', 'Status']
-        for col, header in enumerate(headers_pending, 1):
-            cell = ws_pending.cell(row=1, column=col)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        row = 2
-        sr_no = 1
-        for student in sorted_students:
-            feedbacks = Feedback.objects.filter(student=student)
-            if not feedbacks.exists():
-                ws_pending.cell(row=row, column=1, value=sr_no)
-                # Roll Number
-                ws_pending.cell(row=row, column=2, value=student.prn_number)
-                ws_pending.cell(row=row, column=3, value=student.prn_number)
-                ws_pending.cell(row=row, column=4, value=student.user.get_full_name())
-                ws_pending.cell(row=row, column=5, value=student.user.email)
-                ws_pending.cell(row=row, column=6, value=student.year.name)
-                ws_pending.cell(row=row, column=7, value=student.branch.name)
-                ws_pending.cell(row=row, column=8, value=f"Semester {student.semester.number}")
-                ws_pending.cell(row=row, column=9, value=student.division.name if student.division else 'N/A')
-                
-                status_cell = ws_pending.cell(row=row, column=10, value='Pending')
-                status_cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-                status_cell.font = Font(color="9C0006", bold=True)
-                
-                row += 1
-                sr_no += 1
-        
-        # Sheet 4: Detailed Student Tracking (ENHANCED)
-        ws_detailed = wb.create_sheet("Detailed Tracking")
-        
-        headers_detailed = ['Roll No', 'PRN', 'Student Name', 'Email', 'Division']
-        
-        # Add subject columns
-        subject_teacher_combos = []
-        for subject in subjects:
-            teachers_for_subject = Teacher.objects.filter(subjects=subject)
-            for teacher_obj in teachers_for_subject:
-                combo_name = f"{subject.code}\n({teacher_obj.employee_id})"
-                headers_detailed.append(combo_name)
-                subject_teacher_combos.append((subject, teacher_obj))
-        
-        headers_detailed.extend(['Total Submitted', 'Total Pending', 'Completion %'])
-        
-        # Write headers
-        for col, header in enumerate(headers_detailed, 1):
-            cell = ws_detailed.cell(row=1, column=col)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-        
-        # Write student data
-        row = 2
-        for student in sorted_students:
-            ws_detailed.cell(row=row, column=1, value=student.prn_number)  # Roll No
-            ws_detailed.cell(row=row, column=2, value=student.prn_number)  # PRN
-            ws_detailed.cell(row=row, column=3, value=student.user.get_full_name())
-            ws_detailed.cell(row=row, column=4, value=student.user.email)
-            ws_detailed.cell(row=row, column=5, value=student.division.name if student.division else 'N/A')
-            
-            col = 6
-            submitted_count = 0
-            pending_count = 0
-            
-            for subject, teacher_obj in subject_teacher_combos:
-                has_feedback = Feedback.objects.filter(
-                    student=student,
-                    subject=subject,
-                    teacher=teacher_obj
-                ).exists()
-                
-                cell = ws_detailed.cell(row=row, column=col)
-                if has_feedback:
-                    cell.value = '✓'
-                    cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-                    cell.font = Font(color="006100", bold=True, size=14)
-                    submitted_count += 1
-                else:
-                    cell.value = '✗'
-                    cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-                    cell.font = Font(color="9C0006", bold=True, size=14)
-                    pending_count += 1
-                
-                cell.alignment = Alignment(horizontal='center', vertical='center')
-                col += 1
-            
-            ws_detailed.cell(row=row, column=col, value=submitted_count)
-            ws_detailed.cell(row=row, column=col+1, value=pending_count)
-            
-            completion_percent = (submitted_count / (submitted_count + pending_count) * 100) if (submitted_count + pending_count) > 0 else 0
-            ws_detailed.cell(row=row, column=col+2, value=f"{round(completion_percent, 2)}%")
-            
-            row += 1
-        
-        # Sheet 5: Complete Student List (NEW)
-        ws_complete_list = wb.create_sheet("Complete Student List")
-        
-        headers_complete = ['Sr.No', 'Roll No', 'PRN', 'Student Name', 'Email', 'Year', 'Branch', 'Semester', 'Division', 'Feedbacks Given', 'Status']
-        for col, header in enumerate(headers_complete, 1):
-            cell = ws_complete_list.cell(row=1, column=col)
-            cell.value = header
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        row = 2
-        for idx, student in enumerate(sorted_students, 1):
-            feedbacks = Feedback.objects.filter(student=student)
-            has_feedback = feedbacks.exists()
-            
-            ws_complete_list.cell(row=row, column=1, value=idx)
-            ws_complete_list.cell(row=row, column=2, value=student.prn_number)
-            ws_complete_list.cell(row=row, column=3, value=student.prn_number)
-            ws_complete_list.cell(row=row, column=4, value=student.user.get_full_name())
-            ws_complete_list.cell(row=row, column=5, value=student.user.email)
-            ws_complete_list.cell(row=row, column=6, value=student.year.name)
-            ws_complete_list.cell(row=row, column=7, value=student.branch.name)
-            ws_complete_list.cell(row=row, column=8, value=f"Semester {student.semester.number}")
-            ws_complete_list.cell(row=row, column=9, value=student.division.name if student.division else 'N/A')
-            ws_complete_list.cell(row=row, column=10, value=feedbacks.count() if has_feedback else 0)
-            
-            status_cell = ws_complete_list.cell(row=row, column=11, value='Submitted' if has_feedback else 'Pending')
-            if has_feedback:
-                status_cell.fill = PatternFill(start_color="C6EFCE", end_color="C6EFCE", fill_type="solid")
-                status_cell.font = Font(color="006100", bold=True)
-            else:
-                status_cell.fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
-                status_cell.font = Font(color="9C0006", bold=True)
-            
-            row += 1
-        
-        # Adjust column widths for all sheets
-        for ws in [ws_summary, ws_submitted, ws_pending, ws_detailed, ws_complete_list]:
-            for column in ws.columns:
-                max_length = 0
-                column_letter = get_column_letter(column[0].column)
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to response
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="Class_Feedback_Report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.xlsx"'
-        
-        wb.save(response)
-        return response
+        job = request_report(CLASS_REPORT, str(teacher.id), class_report_version(teacher))
+        return _report_job_response(job)
         
     except CustomUser.DoesNotExist:
         return JsonResponse({'error': 'Teacher not found'}, status=404)
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'feedback_app.middleware.MetricsMiddleware',
+    'feedback_app.middleware.TracingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -39,6 +41,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'feedback_app.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'feedback_system.urls'
@@ -139,4 +142,79 @@ if os.getenv('EMAIL_HOST'):
     EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
     EMAIL_USE_TLS = True
     EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
-    EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
\ No newline at end of file
+    EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+# Idempotency-Key replay window for feedback submission
+IDEMPOTENCY_KEY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+
+# Background report generation
+REPORTS_DIR = Path(os.getenv('REPORTS_DIR', BASE_DIR / 'reports'))
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', 2))
+REPORT_JOB_TIMEOUT = int(os.getenv('REPORT_JOB_TIMEOUT', 600))  # seconds before a stuck job is re-queued
+REPORT_JOBS_EAGER = os.getenv('REPORT_JOBS_EAGER', 'False').lower() == 'true'  # build inline (tests)
+
+# Per-view request/SQL metrics exposed at /api/metrics/
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+
+# Server-Timing header and sampled slow-request trace log (JSON lines; empty path disables the log)
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'True').lower() == 'true'
+TRACE_LOG_PATH = os.getenv('TRACE_LOG_PATH', '')
+TRACE_SLOW_MS = float(os.getenv('TRACE_SLOW_MS', 500))
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', 1.0))
+TRACE_TOP_SQL = int(os.getenv('TRACE_TOP_SQL', 5))
+
+# Per-request profiling triggered by a signed token (manage.py profiles token)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True').lower() == 'true'
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', BASE_DIR / 'profiles'))
+PROFILER = os.getenv('PROFILER', 'auto')  # auto (pyinstrument if installed), pyinstrument or cprofile
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.001))  # pyinstrument sampling interval, seconds
+PROFILE_TOKEN_MAX_AGE = int(os.getenv('PROFILE_TOKEN_MAX_AGE', 3600))
+
+# SQL fingerprint stats and slow-query log (feedback_app.sql logger), dumped at /api/admin/sql-stats/
+SQL_STATS_ENABLED = os.getenv('SQL_STATS_ENABLED', 'True').lower() == 'true'
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 100))
+
+# Query budgets per view (feedback_app.querybudget); strict raises instead of logging
+QUERY_BUDGET_ENABLED = os.getenv('QUERY_BUDGET_ENABLED', 'True').lower() == 'true'
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'False').lower() == 'true'
+QUERY_BUDGET_REPEAT_THRESHOLD = int(os.getenv('QUERY_BUDGET_REPEAT_THRESHOLD', 5))
+
+# Import TextBlob and openpyxl at boot instead of on first use (warm workers; with gunicorn --preload they are shared)
+PRELOAD_HEAVY_IMPORTS = os.getenv('PRELOAD_HEAVY_IMPORTS', 'False').lower() == 'true'
+
+# Load the sentiment lexicon at boot and gc.freeze() it (on by default when DEBUG is off)
+SENTIMENT_WARMUP = os.getenv('SENTIMENT_WARMUP', str(not DEBUG)).lower() == 'true'
+
+# Negative-keyword lexicon (SentimentKeyword): summed weight that flags a text, seconds between version checks
+SENTIMENT_KEYWORD_THRESHOLD = float(os.getenv('SENTIMENT_KEYWORD_THRESHOLD', 1.0))
+SENTIMENT_KEYWORD_TTL = float(os.getenv('SENTIMENT_KEYWORD_TTL', 60))
+
+# Polarity backend for analyze_sentiment: textblob or lexicon (pure-Python, same lexicon, much faster)
+SENTIMENT_BACKEND = os.getenv('SENTIMENT_BACKEND', 'textblob')
+
+# Comments and suggestions with fewer letters than this are placeholders and are not scored
+SENTIMENT_MIN_LETTERS = int(os.getenv('SENTIMENT_MIN_LETTERS', 3))
+
+# HOD rollups: seconds of recent feedback re-read on each incremental refresh (late commits), and
+# minimum seconds between refreshes triggered by the analytics endpoint in one worker
+ROLLUP_REFRESH_OVERLAP = int(os.getenv('ROLLUP_REFRESH_OVERLAP', 120))
+ROLLUP_REFRESH_INTERVAL = float(os.getenv('ROLLUP_REFRESH_INTERVAL', 60))
+
+# Teacher ranking: responses worth of prior (institution mean) each teacher's mean is shrunk toward;
+# unset uses the median response count
+RANKING_PRIOR_WEIGHT = float(os.environ['RANKING_PRIOR_WEIGHT']) if os.getenv('RANKING_PRIOR_WEIGHT') else None
+
+# Trend points of closed semesters kept per process (they never change)
+TREND_CACHE_SIZE = int(os.getenv('TREND_CACHE_SIZE', 50000))
+
+# Submission-rate counters: seconds a worker buffers counts before writing them, hours of minute buckets kept
+SUBMISSION_RATE_FLUSH_SECONDS = float(os.getenv('SUBMISSION_RATE_FLUSH_SECONDS', 5))
+SUBMISSION_RATE_MINUTE_RETENTION = int(os.getenv('SUBMISSION_RATE_MINUTE_RETENTION', 48))
+
+# Live class-teacher events (SSE): 'local' in-process pub/sub for a single worker, 'polling' for several;
+# poll interval, keepalive interval, stream lifetime before the browser reconnects, reconnect delay
+EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'local')
+EVENTS_POLL_SECONDS = float(os.getenv('EVENTS_POLL_SECONDS', 5))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv('EVENTS_KEEPALIVE_SECONDS', 15))
+EVENTS_MAX_STREAM_SECONDS = float(os.getenv('EVENTS_MAX_STREAM_SECONDS', 300))
+EVENTS_RETRY_MS = int(os.getenv('EVENTS_RETRY_MS', 3000))
+EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
@@ -53,8 +53,11 @@ export const getStudentSubjects = async (username) => {
   return response.data;
 };
 
-export const submitFeedback = async (feedbackData) => {
-  const response = await api.post('/student/submit-feedback/', feedbackData);
+export const submitFeedback = async (feedbackData, idempotencyKey = crypto.randomUUID()) => {
+  // Reuse the same key when retrying so the server replays the stored response
+  const response = await api.post('/student/submit-feedback/', feedbackData, {
+    headers: { 'Idempotency-Key': idempotencyKey },
+  });
   return response.data;
 };
 
@@ -87,11 +90,27 @@ export const getClassTeacherTracking = async (username) => {
   return response.data;
 };
 
+// Reports are built by background jobs: a cached report comes back as a file,
+// otherwise the server answers 202 with a job to poll until it is done.
+const waitForReport = async (response) => {
+  if (response.status !== 202) return response.data;
+
+  let { job } = JSON.parse(await response.data.text());
+  while (job.status === 'pending' || job.status === 'running') {
+    await new Promise((resolve) => setTimeout(resolve, 1500));
+    ({ job } = (await api.get(`/reports/jobs/${job.id}/`)).data);
+  }
+  if (job.status !== 'done') throw new Error(job.error || 'Report generation failed');
+
+  const file = await api.get(`/reports/jobs/${job.id}/download/`, { responseType: 'blob' });
+  return file.data;
+};
+
 export const downloadClassTeacherReport = async (username) => {
   const response = await api.get(`/class-teacher/download-report/?username=${username}`, {
     responseType: 'blob',
   });
-  return response.data;
+  return waitForReport(response);
 };
 
 // Admin APIs